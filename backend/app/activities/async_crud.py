@@ -0,0 +1,299 @@
+import logging
+
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import desc, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+import models
+import pagination_utils
+
+import activities.crud as activities_crud
+import activities.schema as activities_schema
+
+import user_activity_rollups.crud as user_activity_rollups_crud
+
+# Define a loggger created on main.py
+logger = logging.getLogger("myLogger")
+
+# Async versions of the activities read queries used by the most requested routes,
+# they return the same records as the functions of the same name in activities.crud
+
+
+def format_activity_dates(activity: models.Activity):
+    # Format the dates the same way as the sync CRUD
+    activity.start_time = activity.start_time.strftime("%Y-%m-%d %H:%M:%S")
+    activity.end_time = activity.end_time.strftime("%Y-%m-%d %H:%M:%S")
+    activity.created_at = activity.created_at.strftime("%Y-%m-%d %H:%M:%S")
+
+
+async def get_user_activities_with_cursor(
+    user_id: int, db: AsyncSession, cursor: str | None = None, num_records: int = 5
+) -> dict:
+    # Decode the cursor before querying, an invalid cursor is a client error
+    values = (
+        pagination_utils.decode_cursor(cursor, [datetime.fromisoformat, int])
+        if cursor
+        else None
+    )
+
+    try:
+        # Get the activities from the database after the cursor
+        statement = select(models.Activity).where(models.Activity.user_id == user_id)
+        if values:
+            statement = statement.where(
+                pagination_utils.keyset_condition(
+                    [models.Activity.start_time, models.Activity.id],
+                    values,
+                    descending=True,
+                )
+            )
+        activities = (
+            await db.scalars(
+                statement.order_by(
+                    desc(models.Activity.start_time), desc(models.Activity.id)
+                ).limit(num_records + 1)
+            )
+        ).all()
+
+        # Build the page before the dates are formatted
+        page = pagination_utils.cursor_page(
+            activities, num_records, lambda activity: [activity.start_time, activity.id]
+        )
+
+        for activity in page["records"]:
+            format_activity_dates(activity)
+
+        # Return the page of activities
+        return page
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_user_activities_with_cursor: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+async def get_user_activities_per_timeframe(
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    db: AsyncSession,
+):
+    try:
+        range_start, range_end = activities_crud.timeframe_bounds(start, end)
+
+        # Get the activities from the database
+        activities = (
+            await db.scalars(
+                select(models.Activity)
+                .where(
+                    models.Activity.user_id == user_id,
+                    models.Activity.start_time >= range_start,
+                    models.Activity.start_time < range_end,
+                )
+                .order_by(desc(models.Activity.start_time))
+            )
+        ).all()
+
+        # Check if there are activities if not return None
+        if not activities:
+            return None
+
+        for activity in activities:
+            format_activity_dates(activity)
+
+        # Return the activities
+        return activities
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_activities_per_timeframe: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+async def get_user_activities_distances_per_timeframe(
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    db: AsyncSession,
+    visibilities: list[int] | None = None,
+) -> activities_schema.ActivityDistances:
+    try:
+        # Sum the distances of each category from the rollups of the days in the timeframe
+        totals = await db.execute(
+            user_activity_rollups_crud.get_user_activity_rollups_totals_statement(
+                user_id,
+                start.date(),
+                end.date(),
+                visibilities=visibilities,
+                group_by=activities_crud.activity_distances_category(),
+            )
+        )
+        return activities_crud.activity_distances_from_totals(totals.all())
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_activities_distances_per_timeframe: {err}",
+            exc_info=True,
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+async def get_user_following_activities_per_timeframe(
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    db: AsyncSession,
+):
+    try:
+        range_start, range_end = activities_crud.timeframe_bounds(start, end)
+
+        # Get the activities from the database
+        activities = (
+            await db.scalars(
+                select(models.Activity)
+                .where(
+                    models.Activity.user_id == user_id,
+                    models.Activity.visibility.in_([0, 1]),
+                    models.Activity.start_time >= range_start,
+                    models.Activity.start_time < range_end,
+                )
+                .order_by(desc(models.Activity.start_time))
+            )
+        ).all()
+
+        # Check if there are activities if not return None
+        if not activities:
+            return None
+
+        for activity in activities:
+            format_activity_dates(activity)
+
+        # Return the activities
+        return activities
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_following_activities_per_timeframe: {err}",
+            exc_info=True,
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+async def get_user_following_activities_with_cursor(
+    user_id: int, cursor: str | None, num_records: int, db: AsyncSession
+) -> dict:
+    # Decode the cursor before querying, an invalid cursor is a client error
+    values = (
+        pagination_utils.decode_cursor(cursor, [datetime.fromisoformat, int])
+        if cursor
+        else None
+    )
+
+    try:
+        # Get the activities from the database after the cursor
+        statement = (
+            select(models.Activity)
+            .join(
+                models.Follower, models.Follower.following_id == models.Activity.user_id
+            )
+            .where(
+                models.Follower.follower_id == user_id,
+                models.Follower.is_accepted,
+                models.Activity.visibility.in_([0, 1]),
+            )
+        )
+        if values:
+            statement = statement.where(
+                pagination_utils.keyset_condition(
+                    [models.Activity.start_time, models.Activity.id],
+                    values,
+                    descending=True,
+                )
+            )
+        activities = (
+            await db.scalars(
+                statement.order_by(
+                    desc(models.Activity.start_time), desc(models.Activity.id)
+                )
+                .limit(num_records + 1)
+                .options(joinedload(models.Activity.user))
+            )
+        ).all()
+
+        # Build the page before the dates are formatted
+        page = pagination_utils.cursor_page(
+            activities, num_records, lambda activity: [activity.start_time, activity.id]
+        )
+
+        # Iterate and format the dates
+        for activity in page["records"]:
+            format_activity_dates(activity)
+
+        # Return the page of activities
+        return page
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_following_activities_with_cursor: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+async def get_activity_by_id_from_user_id_or_has_visibility(
+    activity_id: int, user_id: int, db: AsyncSession
+):
+    try:
+        # Get the activity from the database
+        activity = await db.scalar(
+            select(models.Activity)
+            .where(
+                or_(
+                    models.Activity.user_id == user_id,
+                    models.Activity.visibility.in_([0, 1]),
+                ),
+                models.Activity.id == activity_id,
+            )
+            .limit(1)
+        )
+
+        # Check if there is an activity if not return None
+        if not activity:
+            return None
+
+        format_activity_dates(activity)
+
+        # Return the activity
+        return activity
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_activity_by_id_from_user_id_or_has_visibility: {err}",
+            exc_info=True,
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
@@ -0,0 +1,239 @@
+import calendar
+
+from typing import Annotated, Callable
+
+from fastapi import APIRouter, Depends, Security, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+
+import activities.schema as activities_schema
+import activities.async_crud as activities_async_crud
+import activities.dependencies as activities_dependencies
+
+import session.security as session_security
+
+import users.dependencies as users_dependencies
+
+import caching_utils
+import database
+import dependencies_global
+import pagination_utils
+
+# Define the API router, it is included before activities.router when
+# DB_ASYNC_ENABLED is set so these routes take over the sync routes of the same path.
+# They are left out of the schema, the sync routes already document them.
+router = APIRouter(include_in_schema=False)
+
+
+@router.get(
+    "/user/{user_id}/week/{week_number}",
+    response_model=list[activities_schema.Activity] | None,
+)
+async def read_activities_user_activities_week(
+    user_id: int,
+    validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
+    week_number: int,
+    validate_week_number: Annotated[
+        Callable, Depends(activities_dependencies.validate_week_number)
+    ],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    token_user_id: Annotated[
+        int,
+        Depends(session_security.get_user_id_from_access_token),
+    ],
+    db: Annotated[
+        AsyncSession,
+        Depends(database.get_async_db),
+    ],
+):
+    # Calculate the start of the requested week
+    today = datetime.now(timezone.utc)
+    start_of_week = today - timedelta(days=(today.weekday() + 7 * week_number))
+    end_of_week = start_of_week + timedelta(days=6)
+
+    if user_id == token_user_id:
+        # Get all user activities for the requested week if the user is the owner of the token
+        return await activities_async_crud.get_user_activities_per_timeframe(
+            user_id, start_of_week, end_of_week, db
+        )
+
+    # Get user following activities for the requested week if the user is not the owner of the token
+    return await activities_async_crud.get_user_following_activities_per_timeframe(
+        user_id, start_of_week, end_of_week, db
+    )
+
+
+@router.get(
+    "/user/{user_id}/thisweek/distances",
+    response_model=activities_schema.ActivityDistances | None,
+)
+async def read_activities_user_activities_this_week_distances(
+    user_id: int,
+    validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    token_user_id: Annotated[
+        int,
+        Depends(session_security.get_user_id_from_access_token),
+    ],
+    db: Annotated[
+        AsyncSession,
+        Depends(database.get_async_db),
+    ],
+):
+    # Calculate the start of the current week
+    today = datetime.now(timezone.utc)
+    start_of_week = today - timedelta(days=today.weekday())
+    end_of_week = start_of_week + timedelta(days=6)
+
+    # Sum the distances in the database, only public and followers activities are
+    # summed if the user is not the owner of the token
+    return await activities_async_crud.get_user_activities_distances_per_timeframe(
+        user_id,
+        start_of_week,
+        end_of_week,
+        db,
+        visibilities=None if user_id == token_user_id else [0, 1],
+    )
+
+
+@router.get(
+    "/user/{user_id}/thismonth/distances",
+    response_model=activities_schema.ActivityDistances | None,
+)
+async def read_activities_user_activities_this_month_distances(
+    user_id: int,
+    validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    token_user_id: Annotated[
+        int,
+        Depends(session_security.get_user_id_from_access_token),
+    ],
+    db: Annotated[
+        AsyncSession,
+        Depends(database.get_async_db),
+    ],
+):
+    # Calculate the start of the current month
+    today = datetime.now(timezone.utc)
+    start_of_month = today.replace(day=1)
+    end_of_month = start_of_month.replace(
+        day=calendar.monthrange(today.year, today.month)[1]
+    )
+
+    # Sum the distances in the database, only public and followers activities are
+    # summed if the user is not the owner of the token
+    return await activities_async_crud.get_user_activities_distances_per_timeframe(
+        user_id,
+        start_of_month,
+        end_of_month,
+        db,
+        visibilities=None if user_id == token_user_id else [0, 1],
+    )
+
+
+@router.get(
+    "/user/{user_id}/cursor/num_records/{num_records}",
+    response_model=pagination_utils.CursorPage[activities_schema.Activity],
+)
+async def read_activities_user_activities_cursor(
+    user_id: int,
+    validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
+    num_records: int,
+    validate_pagination_values: Annotated[
+        Callable, Depends(dependencies_global.validate_cursor_pagination_values)
+    ],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    db: Annotated[
+        AsyncSession,
+        Depends(database.get_async_db),
+    ],
+    cursor: str | None = None,
+):
+    # Get the page of activities for the user after the cursor
+    return await activities_async_crud.get_user_activities_with_cursor(
+        user_id, db, cursor, num_records
+    )
+
+
+@router.get(
+    "/user/{user_id}/followed/cursor/num_records/{num_records}",
+    response_model=pagination_utils.CursorPage[activities_schema.Activity],
+)
+async def read_activities_followed_user_activities_cursor(
+    user_id: int,
+    validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
+    num_records: int,
+    validate_pagination_values: Annotated[
+        Callable, Depends(dependencies_global.validate_cursor_pagination_values)
+    ],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    db: Annotated[
+        AsyncSession,
+        Depends(database.get_async_db),
+    ],
+    cursor: str | None = None,
+):
+    # Get the page of activities for the following users after the cursor
+    return await activities_async_crud.get_user_following_activities_with_cursor(
+        user_id, cursor, num_records, db
+    )
+
+
+@router.get(
+    "/{activity_id}",
+    response_model=activities_schema.Activity | None,
+)
+async def read_activities_activity_from_id(
+    request: Request,
+    response: Response,
+    activity_id: int,
+    validate_activity_id: Annotated[
+        Callable, Depends(activities_dependencies.validate_activity_id)
+    ],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    token_user_id: Annotated[
+        int,
+        Depends(session_security.get_user_id_from_access_token),
+    ],
+    db: Annotated[
+        AsyncSession,
+        Depends(database.get_async_db),
+    ],
+):
+    # Get the activity from the database
+    activity = (
+        await activities_async_crud.get_activity_by_id_from_user_id_or_has_visibility(
+            activity_id, token_user_id, db
+        )
+    )
+
+    # Activities not found are not cached
+    if activity is None:
+        return None
+
+    # The ETag changes with every activity update, the user is part of it as the visibility depends on it
+    etag = caching_utils.create_etag(
+        "activity", activity.id, activity.version, token_user_id
+    )
+    if caching_utils.is_etag_matched(request, etag):
+        return caching_utils.not_modified_response(
+            etag, caching_utils.REVALIDATE_CACHE_CONTROL
+        )
+
+    # Return the activity
+    caching_utils.set_cache_headers(
+        response, etag, caching_utils.REVALIDATE_CACHE_CONTROL
+    )
+    return activity
@@ -0,0 +1,210 @@
+import logging
+import os
+import threading
+import time
+import uuid
+import multiprocessing
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import activities.schema as activities_schema
+import activities.utils as activities_utils
+
+from config import BULK_IMPORT_MAX_WORKERS
+from database import SessionLocal
+
+# Define a loggger created on main.py
+logger = logging.getLogger("myLogger")
+
+# Directory where the files to bulk import are placed
+BULK_IMPORT_DIR = "files/bulk_import"
+
+# File extensions that can be bulk imported
+BULK_IMPORT_EXTENSIONS = (".gpx", ".fit")
+
+# Process pool shared by all bulk import jobs, created on first use
+executor: ProcessPoolExecutor | None = None
+
+# Completed jobs are kept for this number of seconds so their status can be read
+BULK_IMPORT_JOBS_TTL = 24 * 60 * 60
+
+# Bulk import jobs by job ID, completion time of the completed ones and files
+# currently queued for import
+jobs: dict[str, activities_schema.ActivityBulkImportJob] = {}
+jobs_completed_at: dict[str, float] = {}
+queued_files: set[str] = set()
+jobs_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global executor
+
+    with jobs_lock:
+        if executor is None:
+            # Use spawn so workers don't inherit the API threads and DB connections
+            executor = ProcessPoolExecutor(
+                max_workers=BULK_IMPORT_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+
+        return executor
+
+
+def shutdown_executor():
+    global executor
+
+    with jobs_lock:
+        if executor is not None:
+            # Cancel queued files and wait for the running ones
+            executor.shutdown(wait=True, cancel_futures=True)
+            executor = None
+
+
+def prune_completed_jobs():
+    # Remove the jobs completed more than the TTL ago, jobs_lock must be held
+    expired_job_ids = [
+        job_id
+        for job_id, completed_at in jobs_completed_at.items()
+        if time.monotonic() - completed_at > BULK_IMPORT_JOBS_TTL
+    ]
+    for job_id in expired_job_ids:
+        del jobs[job_id]
+        del jobs_completed_at[job_id]
+
+
+def init_worker():
+    # Workers are new processes, so the logger from main.py needs a handler
+    if not logger.handlers:
+        logger.setLevel(logging.DEBUG)
+        file_handler = logging.FileHandler("logs/app.log")
+        file_handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+        logger.addHandler(file_handler)
+
+
+def import_file(token_user_id: int, file_path: str) -> int | None:
+    # Each file gets its own database session
+    db = SessionLocal()
+
+    try:
+        # Parse and store the activity
+        created_activities = activities_utils.parse_and_store_activity_from_file(
+            token_user_id, file_path, db
+        )
+
+        # Return the number of created activities or None if the file failed
+        return len(created_activities) if created_activities is not None else None
+    finally:
+        # Ensure the session is closed after use
+        db.close()
+
+
+def create_bulk_import_job(
+    token_user_id: int,
+) -> activities_schema.ActivityBulkImportJob:
+    # Ensure the 'bulk_import' directory exists
+    os.makedirs(BULK_IMPORT_DIR, exist_ok=True)
+
+    # Get the files to import, ignoring files already queued by another job
+    with jobs_lock:
+        prune_completed_jobs()
+
+        file_paths = [
+            os.path.join(BULK_IMPORT_DIR, filename)
+            for filename in sorted(os.listdir(BULK_IMPORT_DIR))
+            if os.path.isfile(os.path.join(BULK_IMPORT_DIR, filename))
+            and os.path.splitext(filename)[1].lower() in BULK_IMPORT_EXTENSIONS
+            and os.path.join(BULK_IMPORT_DIR, filename) not in queued_files
+        ]
+        queued_files.update(file_paths)
+
+        # Create the job
+        job = activities_schema.ActivityBulkImportJob(
+            id=uuid.uuid4().hex,
+            user_id=token_user_id,
+            status="running" if file_paths else "completed",
+            total_files=len(file_paths),
+            started_at=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        if not file_paths:
+            job.finished_at = job.started_at
+            jobs_completed_at[job.id] = time.monotonic()
+        jobs[job.id] = job
+
+        # Return a copy so the counters don't change while being serialized
+        job_copy = job.model_copy()
+
+    logger.info(
+        f"User {token_user_id}: Bulk import job {job.id} started with {len(file_paths)} files"
+    )
+
+    # Submit each file to the process pool
+    pool = get_executor()
+    for file_path in file_paths:
+        future = pool.submit(import_file, token_user_id, file_path)
+        future.add_done_callback(
+            lambda future, file_path=file_path: update_bulk_import_job(
+                job.id, file_path, future
+            )
+        )
+
+    # Return the job
+    return job_copy
+
+
+def update_bulk_import_job(job_id: str, file_path: str, future: Future):
+    # Get the number of created activities, None if the file failed
+    created_activities = None
+    if not future.cancelled():
+        try:
+            created_activities = future.result()
+        except Exception as err:
+            # Log the exception
+            logger.error(
+                f"Error in bulk import job {job_id} for file {file_path}: {err}",
+                exc_info=True,
+            )
+
+    with jobs_lock:
+        queued_files.discard(file_path)
+        job = jobs[job_id]
+
+        # Update the job progress counters
+        job.processed_files += 1
+        if created_activities is None:
+            job.failed_files += 1
+        else:
+            job.imported_files += 1
+            job.created_activities += created_activities
+
+        # Mark the job as completed when all files are processed
+        if job.processed_files == job.total_files:
+            job.status = "completed"
+            job.finished_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            jobs_completed_at[job_id] = time.monotonic()
+
+        # Copy the job so it can be logged outside the lock
+        job_copy = job.model_copy()
+
+    if job_copy.status == "completed":
+        logger.info(
+            f"User {job_copy.user_id}: Bulk import job {job_id} completed, {job_copy.imported_files} files imported and {job_copy.failed_files} failed"
+        )
+
+
+def get_bulk_import_job(
+    job_id: str, token_user_id: int
+) -> activities_schema.ActivityBulkImportJob | None:
+    with jobs_lock:
+        prune_completed_jobs()
+        job = jobs.get(job_id)
+
+        # Only the user that started the job can see it
+        if job is None or job.user_id != token_user_id:
+            return None
+
+        # Return a copy so the counters don't change while being serialized
+        return job.model_copy()
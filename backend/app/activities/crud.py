@@ -1,20 +1,63 @@
 import logging
 
 from operator import and_, or_
+from typing import Callable
 from fastapi import HTTPException, status
-from datetime import datetime
-from sqlalchemy import func, desc
+from datetime import datetime, time, timedelta
+from sqlalchemy import case, func, desc, insert
 from sqlalchemy.orm import Session, joinedload
 from urllib.parse import unquote
 from pydantic import BaseModel
 
 import models
+import pagination_utils
 
 import activities.schema as activities_schema
 
+import activity_streams.crud as activity_streams_crud
+import activity_streams.storage_utils as activity_streams_storage_utils
+
+import user_activity_rollups.crud as user_activity_rollups_crud
+
 # Define a loggger created on main.py
 logger = logging.getLogger("myLogger")
 
+# Activity types summed in each distance category
+ACTIVITY_DISTANCES_TYPES = {
+    "run": [1, 2, 3],
+    "bike": [4, 5, 6, 7],
+    "swim": [8, 9],
+}
+
+
+def timeframe_bounds(start: datetime, end: datetime) -> tuple[datetime, datetime]:
+    # Half-open range from the start of the first day to the start of the day
+    # after the last one, so the start_time index can be used
+    return (
+        datetime.combine(start.date(), time.min),
+        datetime.combine(end.date() + timedelta(days=1), time.min),
+    )
+
+
+def activity_distances_category():
+    # Map the activity types to their distance category in the database
+    return case(
+        *(
+            (models.UserActivityRollup.activity_type.in_(activity_types), name)
+            for name, activity_types in ACTIVITY_DISTANCES_TYPES.items()
+        ),
+        else_=None,
+    ).label("category")
+
+
+def activity_distances_from_totals(totals: list) -> activities_schema.ActivityDistances:
+    # Return the distances of the rollups totals grouped by category, categories
+    # without activities are 0
+    distances = {name: distance for name, _, distance, *_ in totals}
+    return activities_schema.ActivityDistances(
+        **{name: float(distances.get(name) or 0) for name in ACTIVITY_DISTANCES_TYPES}
+    )
+
 
 def get_all_activities(db: Session):
     try:
@@ -78,6 +121,24 @@ def get_user_activities(
         ) from err
 
 
+def get_user_activities_number(user_id: int, db: Session) -> int:
+    try:
+        # Count the activities in the database without loading them
+        return (
+            db.query(func.count(models.Activity.id))
+            .filter(models.Activity.user_id == user_id)
+            .scalar()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_user_activities_number: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_user_activities_with_pagination(
     user_id: int, db: Session, page_number: int = 1, num_records: int = 5
 ):
@@ -116,6 +177,56 @@ def get_user_activities_with_pagination(
         ) from err
 
 
+def get_user_activities_with_cursor(
+    user_id: int, db: Session, cursor: str | None = None, num_records: int = 5
+) -> dict:
+    # Decode the cursor before querying, an invalid cursor is a client error
+    values = (
+        pagination_utils.decode_cursor(cursor, [datetime.fromisoformat, int])
+        if cursor
+        else None
+    )
+
+    try:
+        # Get the activities from the database after the cursor
+        query = db.query(models.Activity).filter(models.Activity.user_id == user_id)
+        if values:
+            query = query.filter(
+                pagination_utils.keyset_condition(
+                    [models.Activity.start_time, models.Activity.id],
+                    values,
+                    descending=True,
+                )
+            )
+        activities = (
+            query.order_by(desc(models.Activity.start_time), desc(models.Activity.id))
+            .limit(num_records + 1)
+            .all()
+        )
+
+        # Build the page before the dates are formatted
+        page = pagination_utils.cursor_page(
+            activities, num_records, lambda activity: [activity.start_time, activity.id]
+        )
+
+        for activity in page["records"]:
+            activity.start_time = activity.start_time.strftime("%Y-%m-%d %H:%M:%S")
+            activity.end_time = activity.end_time.strftime("%Y-%m-%d %H:%M:%S")
+            activity.created_at = activity.created_at.strftime("%Y-%m-%d %H:%M:%S")
+
+        # Return the page of activities
+        return page
+
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_user_activities_with_cursor: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_user_activities_per_timeframe(
     user_id: int,
     start: datetime,
@@ -123,13 +234,15 @@ def get_user_activities_per_timeframe(
     db: Session,
 ):
     try:
+        range_start, range_end = timeframe_bounds(start, end)
+
         # Get the activities from the database
         activities = (
             db.query(models.Activity)
             .filter(
                 models.Activity.user_id == user_id,
-                func.date(models.Activity.start_time) >= start.date(),
-                func.date(models.Activity.start_time) <= end.date(),
+                models.Activity.start_time >= range_start,
+                models.Activity.start_time < range_end,
             )
             .order_by(desc(models.Activity.start_time))
         ).all()
@@ -158,6 +271,62 @@ def get_user_activities_per_timeframe(
         ) from err
 
 
+def get_user_activities_per_timeframe_number(
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    db: Session,
+) -> int:
+    try:
+        # Sum the number of activities of the days in the timeframe
+        totals = user_activity_rollups_crud.get_user_activity_rollups_totals(
+            user_id, start.date(), end.date(), db
+        )
+        return int(totals[0][0])
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_activities_per_timeframe_number: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_user_activities_distances_per_timeframe(
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    db: Session,
+    visibilities: list[int] | None = None,
+) -> activities_schema.ActivityDistances:
+    try:
+        # Sum the distances of each category from the rollups of the days in the timeframe
+        return activity_distances_from_totals(
+            user_activity_rollups_crud.get_user_activity_rollups_totals(
+                user_id,
+                start.date(),
+                end.date(),
+                db,
+                visibilities=visibilities,
+                group_by=activity_distances_category(),
+            )
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_activities_distances_per_timeframe: {err}",
+            exc_info=True,
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_user_following_activities_per_timeframe(
     user_id: int,
     start: datetime,
@@ -165,6 +334,8 @@ def get_user_following_activities_per_timeframe(
     db: Session,
 ):
     try:
+        range_start, range_end = timeframe_bounds(start, end)
+
         # Get the activities from the database
         activities = (
             db.query(models.Activity)
@@ -173,8 +344,8 @@ def get_user_following_activities_per_timeframe(
                     models.Activity.user_id == user_id,
                     models.Activity.visibility.in_([0, 1]),
                 ),
-                func.date(models.Activity.start_time) >= start,
-                func.date(models.Activity.start_time) <= end,
+                models.Activity.start_time >= range_start,
+                models.Activity.start_time < range_end,
             )
             .order_by(desc(models.Activity.start_time))
         ).all()
@@ -204,6 +375,31 @@ def get_user_following_activities_per_timeframe(
         ) from err
 
 
+def get_user_following_activities_per_timeframe_number(
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    db: Session,
+) -> int:
+    try:
+        # Sum the number of public and followers activities of the days in the timeframe
+        totals = user_activity_rollups_crud.get_user_activity_rollups_totals(
+            user_id, start.date(), end.date(), db, visibilities=[0, 1]
+        )
+        return int(totals[0][0])
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_following_activities_per_timeframe_number: {err}",
+            exc_info=True,
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_user_following_activities_with_pagination(
     user_id: int, page_number: int, num_records: int, db: Session
 ):
@@ -250,6 +446,71 @@ def get_user_following_activities_with_pagination(
         ) from err
 
 
+def get_user_following_activities_with_cursor(
+    user_id: int, cursor: str | None, num_records: int, db: Session
+) -> dict:
+    # Decode the cursor before querying, an invalid cursor is a client error
+    values = (
+        pagination_utils.decode_cursor(cursor, [datetime.fromisoformat, int])
+        if cursor
+        else None
+    )
+
+    try:
+        # Get the activities from the database after the cursor
+        query = (
+            db.query(models.Activity)
+            .join(
+                models.Follower, models.Follower.following_id == models.Activity.user_id
+            )
+            .filter(
+                and_(
+                    models.Follower.follower_id == user_id,
+                    models.Follower.is_accepted,
+                ),
+                models.Activity.visibility.in_([0, 1]),
+            )
+        )
+        if values:
+            query = query.filter(
+                pagination_utils.keyset_condition(
+                    [models.Activity.start_time, models.Activity.id],
+                    values,
+                    descending=True,
+                )
+            )
+        activities = (
+            query.order_by(desc(models.Activity.start_time), desc(models.Activity.id))
+            .limit(num_records + 1)
+            .options(joinedload(models.Activity.user))
+            .all()
+        )
+
+        # Build the page before the dates are formatted
+        page = pagination_utils.cursor_page(
+            activities, num_records, lambda activity: [activity.start_time, activity.id]
+        )
+
+        # Iterate and format the dates
+        for activity in page["records"]:
+            activity.start_time = activity.start_time.strftime("%Y-%m-%d %H:%M:%S")
+            activity.end_time = activity.end_time.strftime("%Y-%m-%d %H:%M:%S")
+            activity.created_at = activity.created_at.strftime("%Y-%m-%d %H:%M:%S")
+
+        # Return the page of activities
+        return page
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_following_activities_with_cursor: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_user_following_activities(user_id, db):
     try:
         # Get the activities from the database
@@ -290,6 +551,35 @@ def get_user_following_activities(user_id, db):
         ) from err
 
 
+def get_user_following_activities_number(user_id: int, db: Session) -> int:
+    try:
+        # Count the activities of the followed users without loading them
+        return (
+            db.query(func.count(models.Activity.id))
+            .join(
+                models.Follower, models.Follower.following_id == models.Activity.user_id
+            )
+            .filter(
+                and_(
+                    models.Follower.follower_id == user_id,
+                    models.Follower.is_accepted,
+                ),
+                models.Activity.visibility.in_([0, 1]),
+            )
+            .scalar()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_user_following_activities_number: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_user_activities_by_gear_id_and_user_id(user_id: int, gear_id: int, db: Session):
     try:
         # Get the activities from the database
@@ -365,6 +655,24 @@ def get_activity_by_id_from_user_id_or_has_visibility(
         ) from err
 
 
+def get_activity_version(activity_id: int, db: Session):
+    try:
+        # Get the activity version from the database, None if the activity doesn't exist
+        return (
+            db.query(models.Activity.version)
+            .filter(models.Activity.id == activity_id)
+            .scalar()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_activity_version: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_activity_by_id_from_user_id(
     activity_id: int, user_id: int, db: Session
 ) -> activities_schema.Activity:
@@ -476,6 +784,86 @@ def get_activity_by_garminconnect_id_from_user_id(
         ) from err
 
 
+def get_activities_by_file_hash_from_user_id(
+    file_hash: str, user_id: int, db: Session
+):
+    try:
+        # Get the activities imported from a file with the same hash
+        activities = (
+            db.query(models.Activity)
+            .filter(
+                models.Activity.user_id == user_id,
+                models.Activity.file_hash == file_hash,
+            )
+            .order_by(models.Activity.id)
+            .all()
+        )
+
+        # Check if there are activities if not return None
+        if not activities:
+            return None
+
+        # Iterate and format the dates
+        for activity in activities:
+            activity.start_time = activity.start_time.strftime("%Y-%m-%d %H:%M:%S")
+            activity.end_time = activity.end_time.strftime("%Y-%m-%d %H:%M:%S")
+            activity.created_at = activity.created_at.strftime("%Y-%m-%d %H:%M:%S")
+
+        # Return the activities
+        return activities
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_activities_by_file_hash_from_user_id: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_activities_by_fit_file_id_from_user_id(
+    serial_number: int, time_created: datetime, user_id: int, db: Session
+):
+    try:
+        # Get the activities imported from a FIT file with the same file_id
+        activities = (
+            db.query(models.Activity)
+            .filter(
+                models.Activity.user_id == user_id,
+                models.Activity.fit_file_id_serial_number == serial_number,
+                models.Activity.fit_file_id_time_created == time_created,
+            )
+            .order_by(models.Activity.id)
+            .all()
+        )
+
+        # Check if there are activities if not return None
+        if not activities:
+            return None
+
+        # Iterate and format the dates
+        for activity in activities:
+            activity.start_time = activity.start_time.strftime("%Y-%m-%d %H:%M:%S")
+            activity.end_time = activity.end_time.strftime("%Y-%m-%d %H:%M:%S")
+            activity.created_at = activity.created_at.strftime("%Y-%m-%d %H:%M:%S")
+
+        # Return the activities
+        return activities
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_activities_by_fit_file_id_from_user_id: {err}",
+            exc_info=True,
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_activities_if_contains_name(name: str, user_id: int, db: Session):
     try:
         # Define a search term
@@ -514,62 +902,127 @@ def get_activities_if_contains_name(name: str, user_id: int, db: Session):
         ) from err
 
 
-def create_activity(activity: activities_schema.Activity, db: Session):
+def activity_to_row(activity: activities_schema.Activity) -> dict:
+    # Return the columns of the activity to insert in the database
+    return dict(
+        user_id=activity.user_id,
+        distance=activity.distance,
+        name=activity.name,
+        activity_type=activity.activity_type,
+        start_time=activity.start_time,
+        end_time=activity.end_time,
+        total_elapsed_time=activity.total_elapsed_time,
+        total_timer_time=activity.total_timer_time,
+        city=activity.city,
+        town=activity.town,
+        country=activity.country,
+        initial_latitude=activity.initial_latitude,
+        initial_longitude=activity.initial_longitude,
+        # Activities with a start position and no location are resolved in the background
+        location_pending=activity.initial_latitude is not None
+        and activity.initial_longitude is not None
+        and activity.city is None
+        and activity.town is None
+        and activity.country is None,
+        elevation_gain=activity.elevation_gain,
+        elevation_loss=activity.elevation_loss,
+        pace=activity.pace,
+        average_speed=activity.average_speed,
+        max_speed=activity.max_speed,
+        average_power=activity.average_power,
+        max_power=activity.max_power,
+        normalized_power=activity.normalized_power,
+        average_hr=activity.average_hr,
+        max_hr=activity.max_hr,
+        average_cad=activity.average_cad,
+        max_cad=activity.max_cad,
+        workout_feeling=activity.workout_feeling,
+        workout_rpe=activity.workout_rpe,
+        calories=activity.calories,
+        visibility=activity.visibility,
+        gear_id=activity.gear_id,
+        strava_gear_id=activity.strava_gear_id,
+        strava_activity_id=activity.strava_activity_id,
+        garminconnect_activity_id=activity.garminconnect_activity_id,
+        file_hash=activity.file_hash,
+        fit_file_id_serial_number=activity.fit_file_id_serial_number,
+        fit_file_id_time_created=activity.fit_file_id_time_created,
+    )
+
+
+def insert_activities(rows: list[dict], db: Session) -> list[int]:
+    # Created at is set by the database for every row of the batch
+    statement = insert(models.Activity).values(created_at=func.now())
+
+    # Insert every activity in a single executemany returning the ids in order
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        return list(
+            db.scalars(
+                statement.returning(models.Activity.id, sort_by_parameter_order=True),
+                rows,
+            )
+        )
+
+    # Backends without RETURNING, like MySQL, get the id of each row from its insert
+    connection = db.connection()
+    return [connection.execute(statement, row).inserted_primary_key[0] for row in rows]
+
+
+def create_activities(
+    activities: list[activities_schema.Activity],
+    db: Session,
+    get_activity_streams: Callable[[int, int], list] | None = None,
+):
+    # get_activity_streams(index, activity_id) returns the streams of activities[index]
+    activity_ids = []
     try:
-        # Create a new activity
-        db_activity = models.Activity(
-            user_id=activity.user_id,
-            distance=activity.distance,
-            name=activity.name,
-            activity_type=activity.activity_type,
-            start_time=activity.start_time,
-            end_time=activity.end_time,
-            total_elapsed_time=activity.total_elapsed_time,
-            total_timer_time=activity.total_timer_time,
-            city=activity.city,
-            town=activity.town,
-            country=activity.country,
-            created_at=func.now(),
-            elevation_gain=activity.elevation_gain,
-            elevation_loss=activity.elevation_loss,
-            pace=activity.pace,
-            average_speed=activity.average_speed,
-            max_speed=activity.max_speed,
-            average_power=activity.average_power,
-            max_power=activity.max_power,
-            normalized_power=activity.normalized_power,
-            average_hr=activity.average_hr,
-            max_hr=activity.max_hr,
-            average_cad=activity.average_cad,
-            max_cad=activity.max_cad,
-            workout_feeling=activity.workout_feeling,
-            workout_rpe=activity.workout_rpe,
-            calories=activity.calories,
-            visibility=activity.visibility,
-            gear_id=activity.gear_id,
-            strava_gear_id=activity.strava_gear_id,
-            strava_activity_id=activity.strava_activity_id,
-            garminconnect_activity_id=activity.garminconnect_activity_id,
-        )
-
-        # Add the activity to the database
-        db.add(db_activity)
+        # Insert the activities without committing
+        activity_ids = insert_activities(
+            [activity_to_row(activity) for activity in activities], db
+        )
+
+        # Add the activities to the user activity rollups in the same transaction
+        user_activity_rollups_crud.add_activities_to_rollups(activity_ids, db)
+
+        # Insert the activities streams in the same transaction
+        if get_activity_streams is not None:
+            activity_streams_crud.insert_activity_streams(
+                [
+                    activity_stream
+                    for index, activity_id in enumerate(activity_ids)
+                    for activity_stream in get_activity_streams(index, activity_id)
+                ],
+                db,
+            )
+
+        # Get the created at of the activities in a single query
+        created_at = dict(
+            db.query(models.Activity.id, models.Activity.created_at).filter(
+                models.Activity.id.in_(activity_ids)
+            )
+        )
+
+        # Commit the activities and their streams at once
         db.commit()
-        db.refresh(db_activity)
 
-        activity.id = db_activity.id
-        activity.created_at = db_activity.created_at.strftime("%Y-%m-%d %H:%M:%S")
-        activity.end_time = db_activity.end_time.strftime("%Y-%m-%d %H:%M:%S")
-        activity.created_at = db_activity.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        for activity, activity_id in zip(activities, activity_ids):
+            activity.id = activity_id
+            activity.created_at = created_at[activity_id].strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
 
-        # Return the activity
-        return activity
+        # Return the activities
+        return activities
     except Exception as err:
         # Rollback the transaction
         db.rollback()
 
+        # Remove the stream files written for the activities, if any
+        for activity_id in activity_ids:
+            activity_streams_storage_utils.delete_activity_streams_files(activity_id)
+
         # Log the exception
-        logger.error(f"Error in create_activity: {err}", exc_info=True)
+        logger.error(f"Error in create_activities: {err}", exc_info=True)
         # Raise an HTTPException with a 500 Internal Server Error status code
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -604,10 +1057,17 @@ def edit_activity(user_id: int, activity: activities_schema.Activity, db: Sessio
                 key: value for key, value in vars(activity).items() if value is not None
             }
 
+        # Remove the activity from the user activity rollups before changing it
+        user_activity_rollups_crud.remove_activities_from_rollups([db_activity.id], db)
+
         # Iterate over the fields and update the db_activity dynamically
         for key, value in activity_data.items():
             setattr(db_activity, key, value)
 
+        # Add the changed activity back to the user activity rollups
+        db.flush()
+        user_activity_rollups_crud.add_activities_to_rollups([db_activity.id], db)
+
         # Commit the transaction
         db.commit()
     except Exception as err:
@@ -675,8 +1135,68 @@ def edit_multiple_activities_gear_id(
         ) from err
 
 
+def get_activities_with_pending_location(limit: int, db: Session):
+    try:
+        # Get the oldest activities waiting for the location to be resolved
+        return (
+            db.query(models.Activity)
+            .filter(models.Activity.location_pending.is_(True))
+            .order_by(models.Activity.id)
+            .limit(limit)
+            .all()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_activities_with_pending_location: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def edit_multiple_activities_location(locations: dict[int, dict | None], db: Session):
+    try:
+        # Get the activities from the database
+        db_activities = (
+            db.query(models.Activity)
+            .filter(models.Activity.id.in_(locations.keys()))
+            .all()
+        )
+
+        for db_activity in db_activities:
+            location = locations[db_activity.id]
+
+            # Update the activity location, activities without a location are not retried
+            if location:
+                db_activity.city = location["city"]
+                db_activity.town = location["town"]
+                db_activity.country = location["country"]
+            db_activity.location_pending = False
+
+        # Commit the transaction
+        db.commit()
+    except Exception as err:
+        # Rollback the transaction
+        db.rollback()
+
+        # Log the exception
+        logger.error(f"Error in edit_multiple_activities_location: {err}", exc_info=True)
+
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def delete_activity(activity_id: int, db: Session):
     try:
+        # Remove the activity from the user activity rollups
+        user_activity_rollups_crud.remove_activities_from_rollups([activity_id], db)
+
         # Delete the activity
         num_deleted = (
             db.query(models.Activity).filter(models.Activity.id == activity_id).delete()
@@ -707,6 +1227,18 @@ def delete_activity(activity_id: int, db: Session):
 
 def delete_all_strava_activities_for_user(user_id: int, db: Session):
     try:
+        # Get the strava activities ids to delete their streams files
+        activity_ids = [
+            activity_id
+            for activity_id, in db.query(models.Activity.id).filter(
+                models.Activity.user_id == user_id,
+                models.Activity.strava_activity_id.isnot(None),
+            )
+        ]
+
+        # Remove the strava activities from the user activity rollups
+        user_activity_rollups_crud.remove_activities_from_rollups(activity_ids, db)
+
         # Delete the strava activities for the user
         num_deleted = (
             db.query(models.Activity)
@@ -721,6 +1253,12 @@ def delete_all_strava_activities_for_user(user_id: int, db: Session):
         if num_deleted != 0:
             # Commit the transaction
             db.commit()
+
+            # Delete the activities streams files, if any
+            for activity_id in activity_ids:
+                activity_streams_storage_utils.delete_activity_streams_files(
+                    activity_id
+                )
     except Exception as err:
         # Rollback the transaction
         db.rollback()
@@ -0,0 +1,99 @@
+import numpy as np
+
+# Mean Earth radius in meters used by the haversine formula
+EARTH_MEAN_RADIUS = 6371008.8
+
+# WGS84 ellipsoid parameters used by the ellipsoidal mode
+WGS84_SEMI_MAJOR_AXIS = 6378137.0
+WGS84_FLATTENING = 1 / 298.257223563
+WGS84_ECCENTRICITY_SQUARED = WGS84_FLATTENING * (2 - WGS84_FLATTENING)
+
+
+def calculate_segment_distances(
+    latitudes, longitudes, ellipsoidal: bool = False
+) -> np.ndarray:
+    # Convert the coordinates to radians
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.radians(np.asarray(longitudes, dtype=np.float64))
+
+    # The first point has no previous point, so its segment is NaN
+    distances = np.full(len(latitudes), np.nan, dtype=np.float64)
+    if len(latitudes) < 2:
+        return distances
+
+    delta_latitudes = np.diff(latitudes)
+    # Wrap longitude differences to [-pi, pi] to handle the antimeridian
+    delta_longitudes = (np.diff(longitudes) + np.pi) % (2 * np.pi) - np.pi
+
+    if ellipsoidal:
+        # Use the WGS84 meridional and prime vertical radii at the segment mid latitude.
+        # GPS segments are short, so this matches the geodesic distance to the millimeter
+        mid_latitudes = (latitudes[1:] + latitudes[:-1]) / 2
+        sin_squared = np.sin(mid_latitudes) ** 2
+        denominator = 1 - WGS84_ECCENTRICITY_SQUARED * sin_squared
+        meridional_radius = (
+            WGS84_SEMI_MAJOR_AXIS
+            * (1 - WGS84_ECCENTRICITY_SQUARED)
+            / denominator**1.5
+        )
+        prime_vertical_radius = WGS84_SEMI_MAJOR_AXIS / np.sqrt(denominator)
+
+        distances[1:] = np.hypot(
+            meridional_radius * delta_latitudes,
+            prime_vertical_radius * np.cos(mid_latitudes) * delta_longitudes,
+        )
+    else:
+        # Haversine formula on the mean Earth radius
+        haversine = (
+            np.sin(delta_latitudes / 2) ** 2
+            + np.cos(latitudes[:-1])
+            * np.cos(latitudes[1:])
+            * np.sin(delta_longitudes / 2) ** 2
+        )
+        distances[1:] = (
+            2 * EARTH_MEAN_RADIUS * np.arcsin(np.sqrt(np.clip(haversine, 0, 1)))
+        )
+
+    # Segments with a missing coordinate on either end stay NaN
+    return distances
+
+
+def calculate_track_distances(
+    times, latitudes, longitudes, ellipsoidal_total: bool = False
+) -> dict:
+    # Calculate the distance between consecutive points in a single pass
+    segment_distances = calculate_segment_distances(latitudes, longitudes)
+
+    # Cumulative distance ignores segments with missing coordinates
+    cumulative_distances = np.nancumsum(segment_distances)
+
+    # Calculate the time difference between consecutive points in seconds
+    time_differences = np.full(len(segment_distances), np.nan, dtype=np.float64)
+    time_differences[1:] = np.diff(np.asarray(times, dtype=np.float64))
+
+    # Instant speed in m/s, 0 if the time difference is not positive and NaN if there is no segment
+    with np.errstate(divide="ignore", invalid="ignore"):
+        instant_speeds = np.where(
+            time_differences > 0, segment_distances / time_differences, 0.0
+        )
+    instant_speeds[np.isnan(segment_distances)] = np.nan
+
+    # Total distance, optionally refined on the WGS84 ellipsoid
+    if ellipsoidal_total:
+        total_distance = float(
+            np.nansum(
+                calculate_segment_distances(latitudes, longitudes, ellipsoidal=True)
+            )
+        )
+    else:
+        total_distance = (
+            float(cumulative_distances[-1]) if len(cumulative_distances) else 0.0
+        )
+
+    # Return the distances and speeds
+    return {
+        "segment_distances": segment_distances,
+        "cumulative_distances": cumulative_distances,
+        "instant_speeds": instant_speeds,
+        "total_distance": total_distance,
+    }
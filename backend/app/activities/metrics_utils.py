@@ -0,0 +1,137 @@
+import numpy as np
+
+# Rolling window in seconds used to smooth power before calculating normalized power
+NORMALIZED_POWER_WINDOW_SECONDS = 30
+
+# Elevation changes smaller than this threshold in meters are considered noise
+ELEVATION_HYSTERESIS_THRESHOLD = 2.0
+
+# Minimum speed in m/s for a record to count as moving
+MOVING_SPEED_THRESHOLD = 0.5
+
+
+def as_values(values) -> np.ndarray | None:
+    # Convert a channel to a float array, None values become NaN
+    if values is None:
+        return None
+
+    return np.array(
+        [np.nan if value is None else value for value in values]
+        if isinstance(values, list)
+        else values,
+        dtype=np.float64,
+    )
+
+
+def calculate_avg_and_max(values) -> tuple:
+    # Only set values are used, NaN marks a missing value
+    values = as_values(values)
+    if values is None:
+        return None, None
+
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None, None
+
+    return float(values.mean()), float(values.max())
+
+
+def calculate_normalized_power(times, power) -> float | None:
+    times = np.asarray(times, dtype=np.float64)
+    power = as_values(power)
+    if power is None:
+        return None
+
+    # Only records with power set are used
+    mask = ~np.isnan(power)
+    times, power = times[mask], power[mask]
+    if len(power) == 0:
+        return None
+
+    # Resample power to 1 second, each second holds the last recorded value
+    seconds = np.arange(times[0], times[-1] + 1)
+    indexes = np.searchsorted(times, seconds, side="right") - 1
+    power = power[indexes]
+
+    # 30 seconds rolling average, activities shorter than the window use the overall average
+    window = min(NORMALIZED_POWER_WINDOW_SECONDS, len(power))
+    cumulative_power = np.concatenate(([0.0], np.cumsum(power)))
+    rolling_power = (cumulative_power[window:] - cumulative_power[:-window]) / window
+
+    # Fourth root of the average of the fourth powers of the rolling average
+    return float(np.mean(rolling_power**4) ** 0.25)
+
+
+def calculate_elevation_gain_loss(elevations) -> tuple:
+    elevations = as_values(elevations)
+    if elevations is None:
+        return None, None
+
+    # Only records with elevation set are used
+    elevations = elevations[~np.isnan(elevations)]
+    if len(elevations) == 0:
+        return None, None
+
+    # Keep only the turning points, the hysteresis only changes state on them
+    differences = np.diff(elevations)
+    nonzero = np.flatnonzero(differences)
+    signs = np.sign(differences[nonzero])
+    turning = nonzero[np.flatnonzero(signs[1:] != signs[:-1])] + 1
+    turning_points = np.concatenate(
+        (elevations[:1], elevations[turning], elevations[-1:])
+    ).tolist()
+
+    elevation_gain = elevation_loss = 0.0
+    reference = turning_points[0]
+
+    # Changes are only counted once they move past the threshold from the last counted elevation
+    for elevation in turning_points[1:]:
+        difference = elevation - reference
+        if difference >= ELEVATION_HYSTERESIS_THRESHOLD:
+            elevation_gain += difference
+            reference = elevation
+        elif difference <= -ELEVATION_HYSTERESIS_THRESHOLD:
+            elevation_loss -= difference
+            reference = elevation
+
+    return elevation_gain, elevation_loss
+
+
+def calculate_moving_time(times, vel) -> float | None:
+    times = np.asarray(times, dtype=np.float64)
+    vel = as_values(vel)
+    if vel is None or len(vel) < 2 or np.all(np.isnan(vel)):
+        return None
+
+    # Time between records counts as moving if the speed at the end of the segment is over the threshold
+    time_differences = np.diff(times)
+    moving = vel[1:] >= MOVING_SPEED_THRESHOLD
+
+    return float(time_differences[moving & (time_differences > 0)].sum())
+
+
+def calculate_activity_metrics(
+    times, hr=None, cad=None, power=None, vel=None, ele=None
+) -> dict:
+    # Every channel is an optional array aligned with the epoch seconds times column
+    avg_hr, max_hr = calculate_avg_and_max(hr)
+    avg_cadence, max_cadence = calculate_avg_and_max(cad)
+    avg_power, max_power = calculate_avg_and_max(power)
+    avg_speed, max_speed = calculate_avg_and_max(vel)
+    ele_gain, ele_loss = calculate_elevation_gain_loss(ele)
+
+    # Return all the summary metrics
+    return {
+        "avg_hr": avg_hr,
+        "max_hr": max_hr,
+        "avg_cadence": avg_cadence,
+        "max_cadence": max_cadence,
+        "avg_power": avg_power,
+        "max_power": max_power,
+        "np": calculate_normalized_power(times, power),
+        "avg_speed": avg_speed,
+        "max_speed": max_speed,
+        "ele_gain": ele_gain,
+        "ele_loss": ele_loss,
+        "moving_time": calculate_moving_time(times, vel),
+    }
@@ -12,7 +12,8 @@ from fastapi import (
     status,
     UploadFile,
     Security,
-    BackgroundTasks,
+    Request,
+    Response,
 )
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
@@ -21,6 +22,9 @@ import activities.schema as activities_schema
 import activities.utils as activities_utils
 import activities.crud as activities_crud
 import activities.dependencies as activities_dependencies
+import activities.bulk_import_utils as activities_bulk_import_utils
+
+import activity_streams.storage_utils as activity_streams_storage_utils
 
 import session.security as session_security
 
@@ -29,8 +33,10 @@ import gears.dependencies as gears_dependencies
 
 import users.dependencies as users_dependencies
 
+import caching_utils
 import database
 import dependencies_global
+import pagination_utils
 
 # Define the API router
 router = APIRouter()
@@ -43,7 +49,7 @@ logger = logging.getLogger("myLogger")
     "/user/{user_id}/week/{week_number}",
     response_model=list[activities_schema.Activity] | None,
 )
-async def read_activities_user_activities_week(
+def read_activities_user_activities_week(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     week_number: int,
@@ -91,7 +97,7 @@ async def read_activities_user_activities_week(
     "/user/{user_id}/thisweek/distances",
     response_model=activities_schema.ActivityDistances | None,
 )
-async def read_activities_user_activities_this_week_distances(
+def read_activities_user_activities_this_week_distances(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -111,31 +117,22 @@ async def read_activities_user_activities_this_week_distances(
     start_of_week = today - timedelta(days=today.weekday())
     end_of_week = start_of_week + timedelta(days=6)
 
-    if user_id == token_user_id:
-        # Get all user activities for the requested week if the user is the owner of the token
-        activities = activities_crud.get_user_activities_per_timeframe(
-            user_id, start_of_week, end_of_week, db
-        )
-    else:
-        # Get user following activities for the requested week if the user is not the owner of the token
-        activities = activities_crud.get_user_following_activities_per_timeframe(
-            user_id, start_of_week, end_of_week, db
-        )
-
-    # Check if activities is None
-    # if activities is None:
-    # Return None if activities is None
-    #    return None
-
-    # Return the activities distances for this week
-    return activities_utils.calculate_activity_distances(activities)
+    # Sum the distances in the database, only public and followers activities are
+    # summed if the user is not the owner of the token
+    return activities_crud.get_user_activities_distances_per_timeframe(
+        user_id,
+        start_of_week,
+        end_of_week,
+        db,
+        visibilities=None if user_id == token_user_id else [0, 1],
+    )
 
 
 @router.get(
     "/user/{user_id}/thismonth/distances",
     response_model=activities_schema.ActivityDistances | None,
 )
-async def read_activities_user_activities_this_month_distances(
+def read_activities_user_activities_this_month_distances(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -157,30 +154,22 @@ async def read_activities_user_activities_this_month_distances(
         day=calendar.monthrange(today.year, today.month)[1]
     )
 
-    if user_id == token_user_id:
-        # Get all user activities for the requested month if the user is the owner of the token
-        activities = activities_crud.get_user_activities_per_timeframe(
-            user_id, start_of_month, end_of_month, db
-        )
-    else:
-        # Get user following activities for the requested month if the user is not the owner of the token
-        activities = activities_crud.get_user_following_activities_per_timeframe(
-            user_id, start_of_month, end_of_month, db
-        )
-
-    # if activities is None:
-    # Return None if activities is None
-    #    return None
-
-    # Return the activities distances for this month
-    return activities_utils.calculate_activity_distances(activities)
+    # Sum the distances in the database, only public and followers activities are
+    # summed if the user is not the owner of the token
+    return activities_crud.get_user_activities_distances_per_timeframe(
+        user_id,
+        start_of_month,
+        end_of_month,
+        db,
+        visibilities=None if user_id == token_user_id else [0, 1],
+    )
 
 
 @router.get(
     "/user/{user_id}/thismonth/number",
     response_model=int,
 )
-async def read_activities_user_activities_this_month_number(
+def read_activities_user_activities_this_month_number(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -203,29 +192,22 @@ async def read_activities_user_activities_this_month_number(
     )
 
     if user_id == token_user_id:
-        # Get all user activities for the requested month if the user is the owner of the token
-        activities = activities_crud.get_user_activities_per_timeframe(
-            user_id, start_of_month, end_of_month, db
-        )
-    else:
-        # Get user following activities for the requested month if the user is not the owner of the token
-        activities = activities_crud.get_user_following_activities_per_timeframe(
+        # Count all user activities for the requested month if the user is the owner of the token
+        return activities_crud.get_user_activities_per_timeframe_number(
             user_id, start_of_month, end_of_month, db
         )
 
-    # Check if activities is None and return 0 if it is
-    if activities is None:
-        return 0
-
-    # Return the number of activities
-    return len(activities)
+    # Count user following activities for the requested month if the user is not the owner of the token
+    return activities_crud.get_user_following_activities_per_timeframe_number(
+        user_id, start_of_month, end_of_month, db
+    )
 
 
 @router.get(
     "/user/gear/{gear_id}",
     response_model=list[activities_schema.Activity] | None,
 )
-async def read_activities_gear_activities(
+def read_activities_gear_activities(
     gear_id: int,
     validate_gear_id: Annotated[Callable, Depends(gears_dependencies.validate_gear_id)],
     check_scopes: Annotated[
@@ -250,7 +232,7 @@ async def read_activities_gear_activities(
     "/user/{user_id}/number",
     response_model=int,
 )
-async def read_activities_user_activities_number(
+def read_activities_user_activities_number(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -261,22 +243,15 @@ async def read_activities_user_activities_number(
         Depends(database.get_db),
     ],
 ):
-    # Get the number of activities for the user
-    activities = activities_crud.get_user_activities(user_id, db)
-
-    # Check if activities is None and return 0 if it is
-    if activities is None:
-        return 0
-
-    # Return the number of activities
-    return len(activities)
+    # Return the number of activities for the user
+    return activities_crud.get_user_activities_number(user_id, db)
 
 
 @router.get(
     "/user/{user_id}/page_number/{page_number}/num_records/{num_records}",
     response_model=list[activities_schema.Activity] | None,
 )
-async def read_activities_user_activities_pagination(
+def read_activities_user_activities_pagination(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     page_number: int,
@@ -305,11 +280,37 @@ async def read_activities_user_activities_pagination(
     return activities
 
 
+@router.get(
+    "/user/{user_id}/cursor/num_records/{num_records}",
+    response_model=pagination_utils.CursorPage[activities_schema.Activity],
+)
+def read_activities_user_activities_cursor(
+    user_id: int,
+    validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
+    num_records: int,
+    validate_pagination_values: Annotated[
+        Callable, Depends(dependencies_global.validate_cursor_pagination_values)
+    ],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    db: Annotated[
+        Session,
+        Depends(database.get_db),
+    ],
+    cursor: str | None = None,
+):
+    # Get the page of activities for the user after the cursor
+    return activities_crud.get_user_activities_with_cursor(
+        user_id, db, cursor, num_records
+    )
+
+
 @router.get(
     "/user/{user_id}/followed/page_number/{page_number}/num_records/{num_records}",
     response_model=list[activities_schema.Activity] | None,
 )
-async def read_activities_followed_user_activities_pagination(
+def read_activities_followed_user_activities_pagination(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     page_number: int,
@@ -332,12 +333,16 @@ async def read_activities_followed_user_activities_pagination(
 
 
 @router.get(
-    "/user/{user_id}/followed/number",
-    response_model=int,
+    "/user/{user_id}/followed/cursor/num_records/{num_records}",
+    response_model=pagination_utils.CursorPage[activities_schema.Activity],
 )
-async def read_activities_followed_user_activities_number(
+def read_activities_followed_user_activities_cursor(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
+    num_records: int,
+    validate_pagination_values: Annotated[
+        Callable, Depends(dependencies_global.validate_cursor_pagination_values)
+    ],
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["activities:read"])
     ],
@@ -345,23 +350,40 @@ async def read_activities_followed_user_activities_number(
         Session,
         Depends(database.get_db),
     ],
+    cursor: str | None = None,
 ):
-    # Get the number of activities for the following users
-    activities = activities_crud.get_user_following_activities(user_id, db)
+    # Get the page of activities for the following users after the cursor
+    return activities_crud.get_user_following_activities_with_cursor(
+        user_id, cursor, num_records, db
+    )
 
-    # Check if activities is None and return 0 if it is
-    if activities is None:
-        return 0
 
-    # Return the number of activities
-    return len(activities)
+@router.get(
+    "/user/{user_id}/followed/number",
+    response_model=int,
+)
+def read_activities_followed_user_activities_number(
+    user_id: int,
+    validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    db: Annotated[
+        Session,
+        Depends(database.get_db),
+    ],
+):
+    # Return the number of activities for the following users
+    return activities_crud.get_user_following_activities_number(user_id, db)
 
 
 @router.get(
     "/{activity_id}",
     response_model=activities_schema.Activity | None,
 )
-async def read_activities_activity_from_id(
+def read_activities_activity_from_id(
+    request: Request,
+    response: Response,
     activity_id: int,
     validate_activity_id: Annotated[
         Callable, Depends(activities_dependencies.validate_activity_id)
@@ -378,17 +400,36 @@ async def read_activities_activity_from_id(
         Depends(database.get_db),
     ],
 ):
-    # Get the activity from the database and return it
-    return activities_crud.get_activity_by_id_from_user_id_or_has_visibility(
+    # Get the activity from the database
+    activity = activities_crud.get_activity_by_id_from_user_id_or_has_visibility(
         activity_id, token_user_id, db
     )
 
+    # Activities not found are not cached
+    if activity is None:
+        return None
+
+    # The ETag changes with every activity update, the user is part of it as the visibility depends on it
+    etag = caching_utils.create_etag(
+        "activity", activity.id, activity.version, token_user_id
+    )
+    if caching_utils.is_etag_matched(request, etag):
+        return caching_utils.not_modified_response(
+            etag, caching_utils.REVALIDATE_CACHE_CONTROL
+        )
+
+    # Return the activity
+    caching_utils.set_cache_headers(
+        response, etag, caching_utils.REVALIDATE_CACHE_CONTROL
+    )
+    return activity
+
 
 @router.get(
     "/name/contains/{name}",
     response_model=list[activities_schema.Activity] | None,
 )
-async def read_activities_contain_name(
+def read_activities_contain_name(
     name: str,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["activities:read"])
@@ -411,7 +452,7 @@ async def read_activities_contain_name(
     status_code=201,
     response_model=list[activities_schema.Activity],
 )
-async def create_activity_with_uploaded_file(
+def create_activity_with_uploaded_file(
     token_user_id: Annotated[
         int,
         Depends(session_security.get_user_id_from_access_token),
@@ -439,8 +480,10 @@ async def create_activity_with_uploaded_file(
 
 @router.post(
     "/create/bulkimport",
+    status_code=202,
+    response_model=activities_schema.ActivityBulkImportJob,
 )
-async def create_activity_with_bulk_import(
+def create_activity_with_bulk_import(
     token_user_id: Annotated[
         int,
         Depends(session_security.get_user_id_from_access_token),
@@ -448,35 +491,10 @@ async def create_activity_with_bulk_import(
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["activities:write"])
     ],
-    db: Annotated[
-        Session,
-        Depends(database.get_db),
-    ],
-    background_tasks: BackgroundTasks,
 ):
     try:
-        # Ensure the 'bulk_import' directory exists
-        bulk_import_dir = "files/bulk_import"
-        os.makedirs(bulk_import_dir, exist_ok=True)
-
-        # Iterate over each file in the 'bulk_import' directory
-        for filename in os.listdir(bulk_import_dir):
-            file_path = os.path.join(bulk_import_dir, filename)
-
-            if os.path.isfile(file_path):
-                # Log the file being processed
-                print(f"Processing file: {file_path}")
-                logger.info(f"Processing file: {file_path}")
-                # Parse and store the activity
-                background_tasks.add_task(
-                    activities_utils.parse_and_store_activity_from_file,
-                    token_user_id,
-                    file_path,
-                    db,
-                )
-
-        # Return a success message
-        return {"Bulk import initiated. Processing files in the background."}
+        # Queue the files in the 'bulk_import' directory in the process pool and return the job
+        return activities_bulk_import_utils.create_bulk_import_job(token_user_id)
     except Exception as err:
         # Log the exception
         logger.error(f"Error in create_activity_with_bulk_import: {err}", exc_info=True)
@@ -487,10 +505,38 @@ async def create_activity_with_bulk_import(
         ) from err
 
 
+@router.get(
+    "/bulkimport/{job_id}",
+    response_model=activities_schema.ActivityBulkImportJob,
+)
+def read_activities_bulk_import_job(
+    job_id: str,
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:write"])
+    ],
+    token_user_id: Annotated[
+        int,
+        Depends(session_security.get_user_id_from_access_token),
+    ],
+):
+    # Get the bulk import job progress
+    job = activities_bulk_import_utils.get_bulk_import_job(job_id, token_user_id)
+
+    # Check if job is None and raise an HTTPException with a 404 Not Found status code if it is
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bulk import job {job_id} not found",
+        )
+
+    # Return the job
+    return job
+
+
 @router.put(
     "/edit",
 )
-async def edit_activity(
+def edit_activity(
     token_user_id: Annotated[
         int,
         Depends(session_security.get_user_id_from_access_token),
@@ -514,7 +560,7 @@ async def edit_activity(
 @router.put(
     "/{activity_id}/addgear/{gear_id}",
 )
-async def activity_add_gear(
+def activity_add_gear(
     activity_id: int,
     validate_activity_id: Annotated[
         Callable, Depends(activities_dependencies.validate_activity_id)
@@ -565,7 +611,7 @@ async def activity_add_gear(
 @router.put(
     "/{activity_id}/deletegear",
 )
-async def delete_activity_gear(
+def delete_activity_gear(
     activity_id: int,
     validate_activity_id: Annotated[
         Callable, Depends(activities_dependencies.validate_activity_id)
@@ -604,7 +650,7 @@ async def delete_activity_gear(
 @router.delete(
     "/{activity_id}/delete",
 )
-async def delete_activity(
+def delete_activity(
     activity_id: int,
     validate_activity_id: Annotated[
         Callable, Depends(activities_dependencies.validate_activity_id)
@@ -636,6 +682,9 @@ async def delete_activity(
     # Delete the activity
     activities_crud.delete_activity(activity_id, db)
 
+    # Delete the activity streams files, if any
+    activity_streams_storage_utils.delete_activity_streams_files(activity_id)
+
     # Define the search pattern using the file ID (e.g., '1.*')
     pattern = f"files/processed/{activity_id}.*"
 
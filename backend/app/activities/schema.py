@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 
 
 class Activity(BaseModel):
@@ -15,6 +16,8 @@ class Activity(BaseModel):
     city: str | None = None
     town: str | None = None
     country: str | None = None
+    initial_latitude: float | None = None
+    initial_longitude: float | None = None
     created_at: str | None = None
     elevation_gain: int | None = None
     elevation_loss: int | None = None
@@ -36,6 +39,9 @@ class Activity(BaseModel):
     strava_gear_id: str | None = None
     strava_activity_id: int | None = None
     garminconnect_activity_id: int | None = None
+    file_hash: str | None = None
+    fit_file_id_serial_number: int | None = None
+    fit_file_id_time_created: datetime | None = None
 
     class Config:
         orm_mode = True
@@ -52,4 +58,16 @@ class ActivityEdit(BaseModel):
     description: str | None = None
     name: str
     activity_type: int
-    visibility: int | None = None
\ No newline at end of file
+    visibility: int | None = None
+
+class ActivityBulkImportJob(BaseModel):
+    id: str
+    user_id: int
+    status: str
+    total_files: int
+    processed_files: int = 0
+    imported_files: int = 0
+    failed_files: int = 0
+    created_activities: int = 0
+    started_at: str
+    finished_at: str | None = None
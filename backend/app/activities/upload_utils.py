@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import mmap
+import os
+import re
+import tempfile
+
+from contextlib import contextmanager
+
+from fastapi import HTTPException, status, UploadFile
+
+from config import UPLOAD_MAX_FILE_SIZE
+
+# Define a loggger created on main.py
+logger = logging.getLogger("myLogger")
+
+# Directory where the uploaded files are stored before being processed
+UPLOAD_DIR = "files"
+
+# Size of the chunks read from the uploaded file
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Matches the GPX root element, with or without a namespace prefix
+GPX_ROOT_ELEMENT = re.compile(rb"<(\w+:)?gpx[\s>]")
+
+
+def is_fit_content(chunk: bytes) -> bool:
+    # FIT files start with a 12 or 14 bytes header with the ".FIT" signature at offset 8
+    return len(chunk) >= 12 and chunk[0] in (12, 14) and chunk[8:12] == b".FIT"
+
+
+def is_gpx_content(chunk: bytes) -> bool:
+    # GPX files are XML documents, optionally starting with a BOM, with a gpx root element
+    content = chunk.removeprefix(b"\xef\xbb\xbf").lstrip()
+    return content.startswith(b"<") and GPX_ROOT_ELEMENT.search(content) is not None
+
+
+def check_file_content(file_extension: str, chunk: bytes):
+    # Check the first chunk of the file matches the file extension
+    if file_extension == ".fit":
+        is_valid = is_fit_content(chunk)
+    elif file_extension == ".gpx":
+        is_valid = is_gpx_content(chunk)
+    else:
+        # file extension not supported raise an HTTPException with a 406 Not Acceptable status code
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="File extension not supported. Supported file extensions are .gpx and .fit",
+        )
+
+    if not is_valid:
+        # Raise an HTTPException with a 415 Unsupported Media Type status code
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"File content is not a valid {file_extension} file",
+        )
+
+
+def save_uploaded_file(token_user_id: int, file: UploadFile) -> str:
+    # Get file extension
+    _, file_extension = os.path.splitext(file.filename)
+    file_extension = file_extension.lower()
+
+    # Ensure the 'files' directory exists
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+    # Create a unique file so concurrent uploads with the same name don't overwrite each other
+    file_descriptor, file_path = tempfile.mkstemp(
+        prefix=f"{token_user_id}_", suffix=file_extension, dir=UPLOAD_DIR
+    )
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as save_file:
+            file_size = 0
+
+            # Stream the uploaded file in fixed size chunks
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                # Check the file content before writing anything
+                if file_size == 0:
+                    check_file_content(file_extension, chunk)
+
+                file_size += len(chunk)
+
+                if file_size > UPLOAD_MAX_FILE_SIZE:
+                    # Raise an HTTPException with a 413 Request Entity Too Large status code
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File is larger than the maximum allowed size of {UPLOAD_MAX_FILE_SIZE} bytes",
+                    )
+
+                save_file.write(chunk)
+
+            if file_size == 0:
+                # Raise an HTTPException with a 400 Bad Request status code
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="File is empty",
+                )
+
+        # Return the path of the saved file
+        return file_path
+    except Exception:
+        # Remove the partially saved file
+        remove_file(file_path)
+        raise
+
+
+def hash_file(file_path: str) -> str:
+    # Hash the file in fixed size chunks so it is never fully loaded in memory
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(UPLOAD_CHUNK_SIZE):
+            file_hash.update(chunk)
+
+    # Return the hex digest of the file content
+    return file_hash.hexdigest()
+
+
+def remove_file(file_path: str):
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def map_file(file_path: str):
+    # Map the file in memory so the parsers read it without copying it to the Python heap
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # Empty files can't be mapped, the parsers will fail on them anyway
+            yield file
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            yield mapped_file
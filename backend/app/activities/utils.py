@@ -1,30 +1,31 @@
 import logging
 import os
 import shutil
-import requests
-from geopy.distance import geodesic
 import numpy as np
 
 from fastapi import HTTPException, status, UploadFile
 
-from datetime import datetime
-from urllib.parse import urlencode
-from statistics import mean
 from sqlalchemy.orm import Session
 
-
-import activities.schema as activities_schema
 import activities.crud as activities_crud
+import activities.upload_utils as activities_upload_utils
 
-import activity_streams.crud as activity_streams_crud
 import activity_streams.schema as activity_streams_schema
+import activity_streams.utils as activity_streams_utils
+
+import geocodes.utils as geocodes_utils
 
 import gpx.utils as gpx_utils
 import fit.utils as fit_utils
 
+from config import ACTIVITY_STREAMS_LAYOUT
+
 # Define a loggger created on main.py
 logger = logging.getLogger("myLogger")
 
+# Number of activities resolved per location enrichment batch
+LOCATION_ENRICHMENT_BATCH_SIZE = 50
+
 
 def parse_and_store_activity_from_file(
     token_user_id: int, file_path: str, db: Session, from_garmin: bool = False
@@ -40,7 +41,12 @@ def parse_and_store_activity_from_file(
         # Open the file and process it
         with open(file_path, "rb") as file:
             # Parse the file
-            parsed_info = parse_file(token_user_id, file_extension, file_path)
+            parsed_info = parse_file(token_user_id, file_extension, file_path, db)
+
+            if parsed_info is not None and "existing_activities" in parsed_info:
+                # The file was already imported, remove the duplicate and return the stored activities
+                activities_upload_utils.remove_file(file_path)
+                return parsed_info["existing_activities"]
 
             if parsed_info is not None:
                 created_activities = []
@@ -66,10 +72,10 @@ def parse_and_store_activity_from_file(
                             split_records_by_activity, token_user_id
                         )
 
-                    for activity in created_activities_objects:
-                        # Store the activity in the database
-                        created_activity = store_activity(activity, db)
-                        created_activities.append(created_activity)
+                    # Store the activities in the database, streams are inserted in a single batch
+                    created_activities = store_activities(
+                        created_activities_objects, db, parsed_info["file_hash"]
+                    )
 
                     for index, activity in enumerate(created_activities):
                         idsToFileName += str(activity.id)  # Add the id to the string
@@ -107,21 +113,19 @@ def parse_and_store_activity_from_uploaded_file(
 
     # Get file extension
     _, file_extension = os.path.splitext(file.filename)
+    file_path = None
 
     try:
-        # Ensure the 'files' directory exists
-        upload_dir = "files"
-        os.makedirs(upload_dir, exist_ok=True)
-
-        # Build the full path where the file will be saved
-        file_path = os.path.join(upload_dir, file.filename)
-
-        # Save the uploaded file in the 'files' directory
-        with open(file_path, "wb") as save_file:
-            save_file.write(file.file.read())
+        # Stream the uploaded file to a unique file in the 'files' directory
+        file_path = activities_upload_utils.save_uploaded_file(token_user_id, file)
 
         # Parse the file
-        parsed_info = parse_file(token_user_id, file_extension, file_path)
+        parsed_info = parse_file(token_user_id, file_extension, file_path, db)
+
+        if parsed_info is not None and "existing_activities" in parsed_info:
+            # The file was already imported, remove the duplicate and return the stored activities
+            activities_upload_utils.remove_file(file_path)
+            return parsed_info["existing_activities"]
 
         if parsed_info is not None:
             created_activities = []
@@ -142,10 +146,10 @@ def parse_and_store_activity_from_uploaded_file(
                     split_records_by_activity, token_user_id
                 )
 
-                for activity in created_activities_objects:
-                    # Store the activity in the database
-                    created_activity = store_activity(activity, db)
-                    created_activities.append(created_activity)
+                # Store the activities in the database, streams are inserted in a single batch
+                created_activities = store_activities(
+                    created_activities_objects, db, parsed_info["file_hash"]
+                )
 
                 for index, activity in enumerate(created_activities):
                     idsToFileName += str(activity.id)  # Add the id to the string
@@ -169,8 +173,15 @@ def parse_and_store_activity_from_uploaded_file(
         else:
             return None
     except HTTPException as http_err:
+        # Remove the uploaded file if it wasn't processed
+        if file_path is not None:
+            activities_upload_utils.remove_file(file_path)
         raise http_err
     except Exception as err:
+        # Remove the uploaded file if it wasn't processed
+        if file_path is not None:
+            activities_upload_utils.remove_file(file_path)
+
         # Log the exception
         logger.error(
             f"Error in parse_and_store_activity_from_uploaded_file - {str(err)}",
@@ -203,24 +214,61 @@ def move_file(new_dir: str, new_filename: str, file_path: str):
         ) from err
 
 
-def parse_file(token_user_id: int, file_extension: str, filename: str) -> dict:
+def parse_file(
+    token_user_id: int, file_extension: str, filename: str, db: Session
+) -> dict:
     try:
         if filename.lower() != "bulk_import/__init__.py":
-            logger.info(f"Parsing file: {filename}")
-            # Choose the appropriate parser based on file extension
-            if file_extension.lower() == ".gpx":
-                # Parse the GPX file
-                parsed_info = gpx_utils.parse_gpx_file(filename, token_user_id)
-            elif file_extension.lower() == ".fit":
-                # Parse the FIT file
-                parsed_info = fit_utils.parse_fit_file(filename)
-            else:
+            if file_extension.lower() not in (".gpx", ".fit"):
                 # file extension not supported raise an HTTPException with a 406 Not Acceptable status code
                 raise HTTPException(
                     status_code=status.HTTP_406_NOT_ACCEPTABLE,
                     detail="File extension not supported. Supported file extensions are .gpx and .fit",
                 )
 
+            # Hash the file and skip parsing it if it was already imported
+            file_hash = activities_upload_utils.hash_file(filename)
+            existing_activities = (
+                activities_crud.get_activities_by_file_hash_from_user_id(
+                    file_hash, token_user_id, db
+                )
+            )
+
+            if existing_activities is None and file_extension.lower() == ".fit":
+                # Check the FIT file_id, the same recording may have been exported to a different file
+                with activities_upload_utils.map_file(filename) as file:
+                    serial_number, time_created = fit_utils.read_fit_file_id(file)
+
+                if serial_number is not None and time_created is not None:
+                    existing_activities = (
+                        activities_crud.get_activities_by_fit_file_id_from_user_id(
+                            serial_number, time_created, token_user_id, db
+                        )
+                    )
+
+            if existing_activities is not None:
+                logger.info(
+                    f"User {token_user_id}: File {filename} already imported as activities {[activity.id for activity in existing_activities]}"
+                )
+                return {
+                    "file_hash": file_hash,
+                    "existing_activities": existing_activities,
+                }
+
+            logger.info(f"Parsing file: {filename}")
+            # Choose the appropriate parser based on file extension
+            if file_extension.lower() == ".gpx":
+                # Parse the GPX file directly from the memory mapped file
+                with activities_upload_utils.map_file(filename) as file:
+                    parsed_info = gpx_utils.parse_gpx_file(file, token_user_id)
+            else:
+                # Parse the FIT file directly from the memory mapped file
+                with activities_upload_utils.map_file(filename) as file:
+                    parsed_info = fit_utils.parse_fit_file(file)
+
+            # Keep the file hash to store it with the activities
+            parsed_info["file_hash"] = file_hash
+
             return parsed_info
         else:
             return None
@@ -237,32 +285,27 @@ def parse_file(token_user_id: int, file_extension: str, filename: str) -> dict:
 
 
 def store_activity(parsed_info: dict, db: Session):
-    # create the activity in the database
-    created_activity = activities_crud.create_activity(parsed_info["activity"], db)
+    # Store the activity and return it
+    return store_activities([parsed_info], db, parsed_info.get("file_hash"))[0]
 
-    # Check if created_activity is None
-    if created_activity is None:
-        # Log the error
-        logger.error(
-            "Error in store_activity - activity is None, error creating activity"
-        )
-        # raise an HTTPException with a 500 Internal Server Error status code
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error creating activity",
-        )
 
-    # Parse the activity streams from the parsed info
-    activity_streams = parse_activity_streams_from_file(
-        parsed_info, created_activity.id
+def store_activities(
+    parsed_infos: list[dict], db: Session, file_hash: str | None = None
+):
+    # Keep the hash of the file the activities were imported from
+    if file_hash is not None:
+        for parsed_info in parsed_infos:
+            parsed_info["activity"].file_hash = file_hash
+
+    # Create the activities and their streams in the database in a single transaction
+    return activities_crud.create_activities(
+        [parsed_info["activity"] for parsed_info in parsed_infos],
+        db,
+        lambda index, activity_id: parse_activity_streams_from_file(
+            parsed_infos[index], activity_id
+        ),
     )
 
-    # Create activity streams in the database
-    activity_streams_crud.create_activity_streams(activity_streams, db)
-
-    # Return the created activity
-    return created_activity
-
 
 def parse_activity_streams_from_file(parsed_info: dict, activity_id: int):
     # Create a dictionary mapping stream types to is_set keys and waypoints keys
@@ -276,21 +319,51 @@ def parse_activity_streams_from_file(parsed_info: dict, activity_id: int):
         7: ("is_lat_lon_set", "lat_lon_waypoints"),
     }
 
-    # Create a list of tuples containing stream type, is_set, and waypoints
+    # Stream types set in the parsed info
+    stream_types = [
+        stream_type
+        for stream_type, (is_set_key, _) in stream_mapping.items()
+        if parsed_info[is_set_key]
+    ]
+
+    # Columnar records are only converted to waypoints for the streams that are set
+    records = parsed_info.get("records")
+
+    if ACTIVITY_STREAMS_LAYOUT == "columnar":
+        if not stream_types:
+            return []
+
+        # Store every channel in a single stream sharing the same time list
+        if records is not None:
+            table = activity_streams_utils.records_to_table(records, stream_types)
+        else:
+            table = activity_streams_utils.waypoints_to_table(
+                {
+                    stream_type: parsed_info[stream_mapping[stream_type][1]]
+                    for stream_type in stream_types
+                }
+            )
+
+        return [
+            activity_streams_schema.ActivityStreams(
+                activity_id=activity_id,
+                stream_type=activity_streams_utils.STREAM_TYPE_COLUMNAR,
+                stream_waypoints=[table],
+                strava_activity_stream_id=None,
+            )
+        ]
+
+    # Create a list of tuples containing stream type and waypoints
     stream_data_list = [
         (
             stream_type,
             (
-                is_set_key(parsed_info)
-                if callable(is_set_key)
-                else parsed_info[is_set_key]
+                activity_streams_utils.records_to_waypoints(records, stream_type)
+                if records is not None
+                else parsed_info[stream_mapping[stream_type][1]]
             ),
-            parsed_info[waypoints_key],
-        )
-        for stream_type, (is_set_key, waypoints_key) in stream_mapping.items()
-        if (
-            is_set_key(parsed_info) if callable(is_set_key) else parsed_info[is_set_key]
         )
+        for stream_type in stream_types
     ]
 
     # Return activity streams as a list of ActivityStreams objects
@@ -301,68 +374,45 @@ def parse_activity_streams_from_file(parsed_info: dict, activity_id: int):
             stream_waypoints=waypoints,
             strava_activity_stream_id=None,
         )
-        for stream_type, is_set, waypoints in stream_data_list
+        for stream_type, waypoints in stream_data_list
     ]
 
 
-def calculate_activity_distances(activities: list[activities_schema.Activity]):
-    # Initialize the distances
-    run = bike = swim = 0.0
-
-    if activities is not None:
-        # Calculate the distances
-        for activity in activities:
-            if activity.activity_type in [1, 2, 3]:
-                run += activity.distance
-            elif activity.activity_type in [4, 5, 6, 7]:
-                bike += activity.distance
-            elif activity.activity_type in [8, 9]:
-                swim += activity.distance
-
-    # Return the distances
-    return activities_schema.ActivityDistances(run=run, bike=bike, swim=swim)
-
-
 def location_based_on_coordinates(latitude, longitude) -> dict | None:
-    if latitude is None or longitude is None:
-        return None
+    # Resolve the location through the grid cell cache, only cache misses reach the geocode maps API
+    return geocodes_utils.location_based_on_coordinates(latitude, longitude)
 
-    if os.environ.get("GEOCODES_MAPS_API") == "changeme":
-        return None
 
-    # Create a dictionary with the parameters for the request
-    url_params = {
-        "lat": latitude,
-        "lon": longitude,
-        "api_key": os.environ.get("GEOCODES_MAPS_API"),
-    }
+def enrich_activities_location(db: Session):
+    while True:
+        # Get the next batch of activities waiting for the location
+        activities = activities_crud.get_activities_with_pending_location(
+            LOCATION_ENRICHMENT_BATCH_SIZE, db
+        )
 
-    # Create the URL for the request
-    url = f"https://geocode.maps.co/reverse?{urlencode(url_params)}"
+        if not activities:
+            return
 
-    # Make the request and get the response
-    try:
-        # Make the request and get the response
-        response = requests.get(url)
-        response.raise_for_status()
-
-        # Get the data from the response
-        data = response.json().get("address", {})
-
-        # Return the data
-        return {
-            "city": data.get("city"),
-            "town": data.get("town"),
-            "country": data.get("country"),
-        }
-    except requests.exceptions.RequestException as err:
-        # Log the error
-        logger.error(f"Error in location_based_on_coordinates - {str(err)}")
-        print(f"Error in location_based_on_coordinates - {str(err)}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Error in location_based_on_coordinates: {str(err)}",
-        )
+        locations = {}
+        try:
+            for activity in activities:
+                # Use geocoding API to get city, town, and country based on coordinates
+                locations[activity.id] = location_based_on_coordinates(
+                    float(activity.initial_latitude), float(activity.initial_longitude)
+                )
+        except (HTTPException, geocodes_utils.GeocodeRequestError) as err:
+            # Keep the remaining activities pending and retry them on the next run
+            logger.warning(
+                f"Location enrichment stopped, {len(activities) - len(locations)} activities will be retried: {err}"
+            )
+        finally:
+            # Store the locations resolved so far
+            if locations:
+                activities_crud.edit_multiple_activities_location(locations, db)
+
+        # Stop if the batch was not fully resolved
+        if len(locations) < len(activities):
+            return
 
 
 def append_if_not_none(waypoint_list, time, value, key):
@@ -370,126 +420,6 @@ def append_if_not_none(waypoint_list, time, value, key):
         waypoint_list.append({"time": time, key: value})
 
 
-def calculate_instant_speed(
-    prev_time, time, latitude, longitude, prev_latitude, prev_longitude
-):
-    # Convert the time strings to datetime objects
-    time_calc = datetime.fromisoformat(time.strftime("%Y-%m-%dT%H:%M:%S"))
-
-    # If prev_time is None, return a default value
-    if prev_time is None:
-        return 0
-
-    # Convert the time strings to datetime objects
-    prev_time_calc = datetime.fromisoformat(prev_time.strftime("%Y-%m-%dT%H:%M:%S"))
-
-    # Calculate the time difference in seconds
-    time_difference = (time_calc - prev_time_calc).total_seconds()
-
-    # If the time difference is positive, calculate the instant speed
-    if time_difference > 0:
-        # Calculate the distance in meters
-        distance = geodesic(
-            (prev_latitude, prev_longitude), (latitude, longitude)
-        ).meters
-
-        # Calculate the instant speed in m/s
-        instant_speed = distance / time_difference
-    else:
-        # If the time difference is not positive, return a default value
-        instant_speed = 0
-
-    # Return the instant speed
-    return instant_speed
-
-
-def calculate_elevation_gain_loss(waypoints):
-    try:
-        # Get the values from the waypoints
-        values = [float(waypoint["ele"]) for waypoint in waypoints]
-    except (ValueError, KeyError):
-        # If there are no valid values, return 0
-        return 0, 0
-
-    elevation_gain = 0
-    elevation_loss = 0
-
-    # Iterate over the elevation data, comparing consecutive points
-    for i in range(1, len(values)):
-        diff = values[i] - values[i - 1]
-
-        if diff > 0:
-            elevation_gain += diff  # If elevation increases, add to gain
-        elif diff < 0:
-            elevation_loss += abs(diff)  # If elevation decreases, add to loss
-
-    return elevation_gain, elevation_loss
-
-
-def calculate_pace(distance, first_waypoint_time, last_waypoint_time):
-    # If the distance is 0, return 0
-    if distance == 0:
-        return 0
-
-    # Convert the time strings to datetime objects
-    start_datetime = datetime.fromisoformat(
-        first_waypoint_time.strftime("%Y-%m-%dT%H:%M:%S")
-    )
-    end_datetime = datetime.fromisoformat(
-        last_waypoint_time.strftime("%Y-%m-%dT%H:%M:%S")
-    )
-
-    # Calculate the time difference in seconds
-    total_time_in_seconds = (end_datetime - start_datetime).total_seconds()
-
-    # Calculate pace in seconds per meter
-    pace_seconds_per_meter = total_time_in_seconds / distance
-
-    # Return the pace
-    return pace_seconds_per_meter
-
-
-def calculate_avg_and_max(data, type):
-    try:
-        # Get the values from the data
-        values = [
-            float(waypoint[type]) for waypoint in data if waypoint.get(type) is not None
-        ]
-    except (ValueError, KeyError):
-        # If there are no valid values, return 0
-        return 0, 0
-
-    # Calculate the average and max values
-    avg_value = mean(values)
-    max_value = max(values)
-
-    return avg_value, max_value
-
-
-def calculate_np(data):
-    try:
-        # Get the power values from the data
-        values = [
-            float(waypoint["power"])
-            for waypoint in data
-            if waypoint["power"] is not None
-        ]
-    except:
-        # If there are no valid values, return 0
-        return 0
-
-    # Calculate the fourth power of each power value
-    fourth_powers = [p**4 for p in values]
-
-    # Calculate the average of the fourth powers
-    avg_fourth_power = sum(fourth_powers) / len(fourth_powers)
-
-    # Take the fourth root of the average of the fourth powers to get Normalized Power
-    normalized_power = avg_fourth_power ** (1 / 4)
-
-    return normalized_power
-
-
 def define_activity_type(activity_type):
     # Default value
     auxType = 10
@@ -0,0 +1,408 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Version of the binary stream format, stored in the first byte
+STREAM_CODEC_VERSION = 1
+
+# Layout of the stream data, stored in the second byte
+LAYOUT_JSON = 0
+LAYOUT_COLUMNAR = 1
+LAYOUT_TABLE = 2
+
+# How the time column is stored
+TIME_KIND_DATETIME = 0  # "%Y-%m-%dT%H:%M:%S" strings, stored as epoch seconds
+TIME_KIND_SECONDS = 1  # Seconds since the start of the activity (Strava streams)
+
+# How each channel is stored
+CHANNEL_KIND_INT16 = 0
+CHANNEL_KIND_FLOAT32 = 1
+CHANNEL_KIND_COORDINATE = 2
+CHANNEL_KIND_MASKED_COORDINATE = 3  # Coordinates with missing values, used by columnar streams
+
+# Missing int16 values
+INT16_MISSING = -32768
+
+# Coordinates are stored as delta encoded int32 in 1e-7 degrees (about 1 cm)
+COORDINATE_SCALE = 10**7
+COORDINATE_CHANNELS = ("lat", "lon")
+
+# zlib compression level used for the stream data
+COMPRESSION_LEVEL = 6
+
+# Significant decimal digits of the float32 channel values returned
+FLOAT32_SIGNIFICANT_DIGITS = 7
+
+
+class StreamEncodeError(Exception):
+    pass
+
+
+class StreamWaypointsType(TypeDecorator):
+    # Waypoints are stored with the binary stream codec and decoded transparently
+    impl = LargeBinary(length=2**32 - 1)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_waypoints(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return decode_waypoints(value) if value is not None else None
+
+
+def encode_waypoints(waypoints: list[dict]) -> bytes:
+    try:
+        # Store the waypoints in typed columns when they fit
+        if is_table(waypoints):
+            return encode_columns(LAYOUT_TABLE, *table_to_columns(waypoints[0]))
+
+        return encode_columns(LAYOUT_COLUMNAR, *waypoints_to_columns(waypoints))
+    except StreamEncodeError:
+        # Keep any other waypoints as compressed JSON
+        return struct.pack("<BB", STREAM_CODEC_VERSION, LAYOUT_JSON) + zlib.compress(
+            json.dumps(waypoints, separators=(",", ":")).encode(), COMPRESSION_LEVEL
+        )
+
+
+def decode_waypoints(
+    data: bytes, window: tuple | None = None, start_epoch: int = 0
+) -> list[dict]:
+    # The window is an inclusive (start, end) range in seconds since the start of the activity
+    layout, body = decompress(data)
+    if layout == LAYOUT_JSON:
+        return window_json_waypoints(json.loads(body), window, start_epoch)
+
+    columns = decode_columns(body, window, start_epoch)
+    if layout == LAYOUT_TABLE:
+        return [columns_to_table(*columns)]
+
+    return columns_to_waypoints(*columns)
+
+
+def decode_float_columns(data: bytes) -> tuple:
+    # Return the epochs and every channel as a float array with NaN for missing values
+    layout, body = decompress(data)
+    if layout == LAYOUT_JSON:
+        waypoints = json.loads(body)
+        if is_table(waypoints):
+            return table_to_columns(waypoints[0])
+        return waypoints_to_columns(waypoints)
+
+    time_kind, epochs, arrays = decode_arrays(body)
+    return (
+        time_kind,
+        epochs,
+        {
+            channel: np.where(missing, np.nan, array)
+            for channel, (_, array, missing) in arrays.items()
+        },
+    )
+
+
+def decompress(data: bytes) -> tuple:
+    version, layout = struct.unpack_from("<BB", data)
+    if version != STREAM_CODEC_VERSION:
+        raise ValueError(f"Unsupported stream codec version {version}")
+
+    return layout, zlib.decompress(data[2:])
+
+
+def window_selection(
+    time_kind: int, epochs: np.ndarray, window: tuple | None, start_epoch: int
+):
+    if window is None:
+        return slice(None)
+
+    # Datetime times are offset by the start of the activity, Strava times are already relative to it
+    offset = start_epoch if time_kind == TIME_KIND_DATETIME else 0
+    start, end = window
+    return (epochs >= offset + start) & (epochs <= offset + end)
+
+
+def window_json_waypoints(
+    waypoints: list[dict], window: tuple | None, start_epoch: int
+) -> list[dict]:
+    if window is None:
+        return waypoints
+
+    try:
+        selection = window_selection(
+            *times_to_epochs([waypoint["time"] for waypoint in waypoints]),
+            window,
+            start_epoch,
+        )
+    except (StreamEncodeError, KeyError, TypeError):
+        # Waypoints without valid times can't be sliced
+        return waypoints
+
+    return [waypoint for waypoint, selected in zip(waypoints, selection) if selected]
+
+
+def is_table(waypoints: list[dict]) -> bool:
+    # Columnar streams are stored as a single dict with a shared time list and one list per channel
+    return (
+        len(waypoints) == 1
+        and isinstance(waypoints[0].get("time"), list)
+        and all(isinstance(column, list) for column in waypoints[0].values())
+    )
+
+
+def times_to_epochs(times: list) -> tuple:
+    if times and isinstance(times[0], str):
+        try:
+            epochs = np.array(times, dtype="datetime64[s]")
+        except ValueError as err:
+            raise StreamEncodeError("Invalid waypoint time") from err
+
+        # Only times that format back to the same strings can be stored as epochs
+        if not np.array_equal(np.datetime_as_string(epochs), np.array(times)):
+            raise StreamEncodeError("Waypoint time is not %Y-%m-%dT%H:%M:%S")
+        return TIME_KIND_DATETIME, epochs.astype(np.int64)
+
+    try:
+        epochs = np.array(times, dtype=np.float64)
+    except (TypeError, ValueError) as err:
+        raise StreamEncodeError("Invalid waypoint time") from err
+    if not np.array_equal(epochs, np.round(epochs)):
+        raise StreamEncodeError("Waypoint time is not in whole seconds")
+    return TIME_KIND_SECONDS, epochs.astype(np.int64)
+
+
+def values_to_column(channel: str, values: list) -> np.ndarray:
+    try:
+        # Numeric strings are stored as numbers, None as missing values
+        return np.array(
+            [np.nan if value is None else float(value) for value in values],
+            dtype=np.float64,
+        )
+    except (TypeError, ValueError) as err:
+        raise StreamEncodeError(f"Waypoint {channel} is not a number") from err
+
+
+def waypoints_to_columns(waypoints: list[dict]) -> tuple:
+    if not waypoints:
+        raise StreamEncodeError("Empty stream")
+
+    # Every waypoint must have the time and the same channels
+    channels = tuple(key for key in waypoints[0] if key != "time")
+    keys = {"time", *channels}
+    if len(keys) != len(waypoints[0]) or any(
+        waypoint.keys() != keys for waypoint in waypoints
+    ):
+        raise StreamEncodeError("Waypoints don't share the same keys")
+
+    time_kind, epochs = times_to_epochs([waypoint["time"] for waypoint in waypoints])
+    values = {
+        channel: values_to_column(
+            channel, [waypoint[channel] for waypoint in waypoints]
+        )
+        for channel in channels
+    }
+
+    return time_kind, epochs, values
+
+
+def table_to_columns(table: dict) -> tuple:
+    if not table["time"]:
+        raise StreamEncodeError("Empty stream")
+
+    # Every channel must be aligned with the time list
+    if any(len(column) != len(table["time"]) for column in table.values()):
+        raise StreamEncodeError("Channels are not aligned with the time")
+
+    time_kind, epochs = times_to_epochs(table["time"])
+    values = {
+        channel: values_to_column(channel, column)
+        for channel, column in table.items()
+        if channel != "time"
+    }
+
+    return time_kind, epochs, values
+
+
+def columns_to_times(time_kind: int, epochs: np.ndarray) -> list:
+    # Rebuild the time as it was stored
+    if time_kind == TIME_KIND_DATETIME:
+        return np.datetime_as_string(epochs.astype("datetime64[s]")).tolist()
+
+    return epochs.tolist()
+
+
+def columns_to_waypoints(time_kind: int, epochs: np.ndarray, values: dict) -> list:
+    times = columns_to_times(time_kind, epochs)
+
+    # Rebuild one waypoint per time with every channel value
+    channels = list(values)
+    rows = zip(*values.values()) if channels else ((),) * len(times)
+
+    return [
+        {"time": time, **dict(zip(channels, row))} for time, row in zip(times, rows)
+    ]
+
+
+def columns_to_table(time_kind: int, epochs: np.ndarray, values: dict) -> dict:
+    # Columnar streams keep the shared time list and one list per channel
+    return {"time": columns_to_times(time_kind, epochs), **values}
+
+
+def encode_columns(
+    layout: int, time_kind: int, epochs: np.ndarray, values: dict
+) -> bytes:
+    # Time is stored as the first value and the int32 differences to the previous value
+    time_deltas = np.diff(epochs)
+    if len(time_deltas) and (
+        time_deltas.min() < np.iinfo(np.int32).min
+        or time_deltas.max() > np.iinfo(np.int32).max
+    ):
+        raise StreamEncodeError("Waypoint time differences don't fit in int32")
+
+    parts = [
+        struct.pack("<BIqB", time_kind, len(epochs), int(epochs[0]), len(values)),
+        time_deltas.astype("<i4").tobytes(),
+    ]
+
+    for channel, column in values.items():
+        missing = np.isnan(column)
+        if channel in COORDINATE_CHANNELS:
+            if (np.abs(column[~missing]) > 180).any():
+                raise StreamEncodeError("Invalid coordinates")
+            # Quantize the coordinates and store the differences to the previous value
+            quantized = np.round(np.where(missing, 0, column) * COORDINATE_SCALE)
+            if missing.any():
+                # Missing coordinates repeat the previous value and are flagged in a bit mask
+                kind = CHANNEL_KIND_MASKED_COORDINATE
+                indexes = np.where(missing, 0, np.arange(len(column)))
+                quantized = quantized[np.maximum.accumulate(indexes)]
+                mask = np.packbits(missing).tobytes()
+            else:
+                kind = CHANNEL_KIND_COORDINATE
+                mask = b""
+            deltas = np.diff(quantized.astype(np.int64), prepend=0)
+            if (np.abs(deltas) > np.iinfo(np.int32).max).any():
+                raise StreamEncodeError("Coordinate differences don't fit in int32")
+            data = mask + deltas.astype("<i4").tobytes()
+        elif (
+            np.array_equal(column[~missing], np.round(column[~missing]))
+            and (np.abs(column[~missing]) < -INT16_MISSING).all()
+        ):
+            # Integer channels that fit in int16, like heart rate, cadence and power
+            kind = CHANNEL_KIND_INT16
+            data = np.where(missing, INT16_MISSING, column).astype("<i2").tobytes()
+        else:
+            kind = CHANNEL_KIND_FLOAT32
+            data = column.astype("<f4").tobytes()
+
+        name = channel.encode()
+        parts.append(struct.pack(f"<B{len(name)}sB", len(name), name, kind))
+        parts.append(data)
+
+    return struct.pack("<BB", STREAM_CODEC_VERSION, layout) + zlib.compress(
+        b"".join(parts), COMPRESSION_LEVEL
+    )
+
+
+def decode_arrays(body: bytes) -> tuple:
+    time_kind, count, first_time, channel_count = struct.unpack_from("<BIqB", body)
+    offset = struct.calcsize("<BIqB")
+
+    # Rebuild the time from the first value and the differences
+    epochs = np.empty(count, dtype=np.int64)
+    epochs[0] = first_time
+    epochs[1:] = first_time + np.cumsum(
+        np.frombuffer(body, dtype="<i4", count=count - 1, offset=offset),
+        dtype=np.int64,
+    )
+    offset += 4 * (count - 1)
+
+    # Every channel is returned as its kind, its values array and its missing values mask
+    arrays = {}
+    for _ in range(channel_count):
+        name_length = body[offset]
+        channel = body[offset + 1 : offset + 1 + name_length].decode()
+        kind = body[offset + 1 + name_length]
+        offset += 2 + name_length
+
+        if kind in (CHANNEL_KIND_COORDINATE, CHANNEL_KIND_MASKED_COORDINATE):
+            missing = np.zeros(count, dtype=bool)
+            if kind == CHANNEL_KIND_MASKED_COORDINATE:
+                mask_length = (count + 7) // 8
+                mask = np.frombuffer(
+                    body, dtype=np.uint8, count=mask_length, offset=offset
+                )
+                missing = np.unpackbits(mask, count=count).astype(bool)
+                offset += mask_length
+
+            # Rebuild the coordinates from the quantized differences
+            array = np.frombuffer(body, dtype="<i4", count=count, offset=offset)
+            array = np.cumsum(array, dtype=np.int64) / COORDINATE_SCALE
+            offset += 4 * count
+        elif kind == CHANNEL_KIND_INT16:
+            array = np.frombuffer(body, dtype="<i2", count=count, offset=offset)
+            missing = array == INT16_MISSING
+            offset += 2 * count
+        else:
+            array = np.frombuffer(body, dtype="<f4", count=count, offset=offset)
+            missing = np.isnan(array)
+            offset += 4 * count
+
+        arrays[channel] = (kind, array, missing)
+
+    return time_kind, epochs, arrays
+
+
+def round_float32_values(array: np.ndarray) -> np.ndarray:
+    # Round to the significant digits float32 keeps so 123.4 isn't returned as 123.40000152
+    values = array.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitudes = np.floor(np.log10(np.abs(values)))
+    exponents = np.where(
+        np.isfinite(magnitudes), FLOAT32_SIGNIFICANT_DIGITS - 1 - magnitudes, 0
+    )
+
+    # Powers of ten are only exact as factors, so large values are divided instead
+    factors = 10.0 ** np.abs(exponents)
+    return np.where(
+        exponents >= 0,
+        np.round(values * factors) / factors,
+        np.round(values / factors) * factors,
+    )
+
+
+def array_to_values(kind: int, array: np.ndarray, missing: np.ndarray) -> list:
+    if kind == CHANNEL_KIND_FLOAT32:
+        values = round_float32_values(array).tolist()
+    else:
+        # Integer values are returned as int
+        values = array.tolist()
+
+    # Missing values are returned as None
+    if not missing.any():
+        return values
+
+    return [
+        None if is_missing else value
+        for value, is_missing in zip(values, missing.tolist())
+    ]
+
+
+def decode_columns(
+    body: bytes, window: tuple | None = None, start_epoch: int = 0
+) -> tuple:
+    time_kind, epochs, arrays = decode_arrays(body)
+
+    # Only the values inside the window are converted to Python values
+    selection = window_selection(time_kind, epochs, window, start_epoch)
+
+    return (
+        time_kind,
+        epochs[selection],
+        {
+            channel: array_to_values(kind, array[selection], missing[selection])
+            for channel, (kind, array, missing) in arrays.items()
+        },
+    )
@@ -1,33 +1,66 @@
 import logging
 
+import numpy as np
+
 from fastapi import HTTPException, status
+from sqlalchemy import LargeBinary, insert, type_coerce
 from sqlalchemy.orm import Session
 
 import activity_streams.schema as activity_streams_schema
+import activity_streams.utils as activity_streams_utils
+import activity_streams.codec_utils as activity_streams_codec_utils
+import activity_streams.levels_utils as activity_streams_levels_utils
+import activity_streams.storage_utils as activity_streams_storage_utils
+
+import activities.distance_utils as activities_distance_utils
 
 import models
 
+from config import ACTIVITY_STREAMS_STORAGE
+
 # Define a loggger created on main.py
 logger = logging.getLogger("myLogger")
 
 
-def get_activity_streams(activity_id: int, db: Session):
+def get_activity_streams(
+    activity_id: int, db: Session, max_points: int | None = None
+):
     try:
-        # Get the activity streams from the database
-        activity_streams = (
-            db.query(models.ActivityStreams)
-            .filter(
-                models.ActivityStreams.activity_id == activity_id,
-            )
-            .all()
+        # Use the precomputed levels of detail if they have enough points
+        level_streams = (
+            get_activity_streams_levels(activity_id, max_points, db) or []
+            if max_points is not None
+            else []
         )
 
+        # Streams without a stored level are shorter than it and are read in full,
+        # a columnar stream with levels has them for every stream type
+        query = db.query(models.ActivityStreams).filter(
+            models.ActivityStreams.activity_id == activity_id,
+        )
+        if level_streams:
+            query = query.filter(
+                models.ActivityStreams.stream_type.notin_(
+                    [
+                        activity_streams_utils.STREAM_TYPE_COLUMNAR,
+                        *(level_stream.stream_type for level_stream in level_streams),
+                    ]
+                )
+            )
+        activity_streams = query.all()
+
         # Check if there are activity streams if not return None
-        if not activity_streams:
+        if not level_streams and not activity_streams:
             return None
 
-        # Return the activity streams
-        return activity_streams
+        # Return the activity streams, columnar streams are split by stream type
+        return level_streams + [
+            downsample_stream(split_stream, max_points)
+            for activity_stream in activity_streams
+            for split_stream in split_columnar_stream(
+                load_activity_stream(activity_stream)
+            )
+        ]
     except Exception as err:
         # Log the exception
         logger.error(f"Error in get_activity_streams: {err}", exc_info=True)
@@ -38,14 +71,26 @@ def get_activity_streams(activity_id: int, db: Session):
         ) from err
 
 
-def get_activity_stream_by_type(activity_id: int, stream_type: int, db: Session):
+def get_activity_stream_by_type(
+    activity_id: int, stream_type: int, db: Session, max_points: int | None = None
+):
     try:
+        # Use the precomputed level of detail if it has enough points
+        if max_points is not None:
+            activity_streams = get_activity_streams_levels(
+                activity_id, max_points, db, stream_type
+            )
+            if activity_streams:
+                return activity_streams[0]
+
         # Get the activity stream from the database
         activity_stream = (
             db.query(models.ActivityStreams)
             .filter(
                 models.ActivityStreams.activity_id == activity_id,
-                models.ActivityStreams.stream_type == stream_type,
+                models.ActivityStreams.stream_type.in_(
+                    [stream_type, activity_streams_utils.STREAM_TYPE_COLUMNAR]
+                ),
             )
             .first()
         )
@@ -54,8 +99,17 @@ def get_activity_stream_by_type(activity_id: int, stream_type: int, db: Session)
         if not activity_stream:
             return None
 
-        # Return the activity stream
-        return activity_stream
+        # Return the activity stream, taken from the columnar stream if needed
+        return next(
+            (
+                downsample_stream(split_stream, max_points)
+                for split_stream in split_columnar_stream(
+                    load_activity_stream(activity_stream)
+                )
+                if split_stream.stream_type == stream_type
+            ),
+            None,
+        )
     except Exception as err:
         # Log the exception
         logger.error(f"Error in get_activity_stream_by_type: {err}", exc_info=True)
@@ -66,35 +120,443 @@ def get_activity_stream_by_type(activity_id: int, stream_type: int, db: Session)
         ) from err
 
 
-def create_activity_streams(
+def get_activity_streams_table(activity_id: int, db: Session):
+    try:
+        # Get the activity streams from the database
+        activity_streams = (
+            db.query(models.ActivityStreams)
+            .filter(
+                models.ActivityStreams.activity_id == activity_id,
+            )
+            .all()
+        )
+
+        # Check if there are activity streams if not return None
+        if not activity_streams:
+            return None
+
+        # Columnar streams are already aligned, other streams are aligned by time
+        activity_streams = [
+            load_activity_stream(activity_stream)
+            for activity_stream in activity_streams
+        ]
+        columnar_stream = next(
+            (
+                activity_stream
+                for activity_stream in activity_streams
+                if activity_stream.stream_type
+                == activity_streams_utils.STREAM_TYPE_COLUMNAR
+            ),
+            None,
+        )
+        if columnar_stream is not None:
+            table = dict(columnar_stream.stream_waypoints[0])
+        else:
+            table = activity_streams_utils.waypoints_to_table(
+                {
+                    activity_stream.stream_type: activity_stream.stream_waypoints
+                    for activity_stream in activity_streams
+                }
+            )
+
+        # Return the activity streams table
+        return activity_streams_schema.ActivityStreamsTable.model_construct(
+            activity_id=activity_id,
+            time=table.pop("time"),
+            channels=table,
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_activity_streams_table: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_activity_streams_window(
+    activity_id: int,
+    window: tuple,
+    window_type: str,
+    db: Session,
+    stream_type: int | None = None,
+    max_points: int | None = None,
+):
+    try:
+        # Times of the window are relative to the start of the activity
+        start_time = (
+            db.query(models.Activity.start_time)
+            .filter(models.Activity.id == activity_id)
+            .scalar()
+        )
+        if start_time is None:
+            return None
+        start_epoch = activity_streams_utils.datetime_to_epoch(start_time)
+
+        # Get the encoded activity streams from the database
+        stream_types = (
+            None
+            if stream_type is None
+            else [stream_type, activity_streams_utils.STREAM_TYPE_COLUMNAR]
+        )
+        activity_streams = get_activity_streams_data(activity_id, stream_types, db)
+
+        # Check if there are activity streams if not return None
+        if not activity_streams:
+            return None
+
+        # Convert a distance window to the time window covering it
+        if window_type == "distance":
+            window = distance_window_to_time_window(
+                activity_id, window, start_epoch, db
+            )
+            if window is None:
+                return None
+
+        # Only the waypoints inside the window are decoded
+        split_streams = [
+            split_stream
+            for activity_stream in activity_streams
+            for split_stream in split_columnar_stream(
+                activity_streams_schema.ActivityStreams.model_construct(
+                    id=activity_stream.id,
+                    activity_id=activity_stream.activity_id,
+                    stream_type=activity_stream.stream_type,
+                    stream_waypoints=decode_activity_stream_data(
+                        activity_stream, window, start_epoch
+                    ),
+                    strava_activity_stream_id=activity_stream.strava_activity_stream_id,
+                )
+            )
+            if stream_type is None or split_stream.stream_type == stream_type
+        ]
+
+        # Return the activity streams with at most max_points points
+        return [
+            downsample_stream(split_stream, max_points)
+            for split_stream in split_streams
+        ]
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_activity_streams_window: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_activity_streams_data(
+    activity_id: int, stream_types: list[int] | None, db: Session
+):
+    # Get the activity streams without decoding their waypoints
+    query = db.query(
+        models.ActivityStreams.id,
+        models.ActivityStreams.activity_id,
+        models.ActivityStreams.stream_type,
+        models.ActivityStreams.strava_activity_stream_id,
+        models.ActivityStreams.stream_file_path,
+        models.ActivityStreams.stream_file_checksum,
+        type_coerce(models.ActivityStreams.stream_waypoints, LargeBinary).label(
+            "stream_data"
+        ),
+    ).filter(models.ActivityStreams.activity_id == activity_id)
+    if stream_types is not None:
+        query = query.filter(models.ActivityStreams.stream_type.in_(stream_types))
+
+    return query.all()
+
+
+def decode_activity_stream_data(
+    activity_stream, window: tuple | None = None, start_epoch: int = 0
+) -> list[dict]:
+    # Streams stored in files only read the records inside the window from disk
+    if activity_stream.stream_file_path is not None:
+        return activity_streams_storage_utils.read_stream_file(
+            activity_stream.stream_file_path,
+            activity_stream.stream_file_checksum,
+            activity_stream.stream_type == activity_streams_utils.STREAM_TYPE_COLUMNAR,
+            window,
+            start_epoch,
+        )
+
+    return activity_streams_codec_utils.decode_waypoints(
+        activity_stream.stream_data, window, start_epoch
+    )
+
+
+def distance_window_to_time_window(
+    activity_id: int, window: tuple, start_epoch: int, db: Session
+) -> tuple | None:
+    # The distance is taken from the lat/lon track or, without it, from the velocity
+    stream_types = [
+        activity_streams_utils.STREAM_TYPE_LAT_LON,
+        activity_streams_utils.STREAM_TYPE_COLUMNAR,
+        activity_streams_utils.STREAM_TYPE_VELOCITY,
+    ]
+    activity_streams = sorted(
+        get_activity_streams_data(activity_id, stream_types, db),
+        key=lambda activity_stream: stream_types.index(activity_stream.stream_type),
+    )
+
+    for activity_stream in activity_streams:
+        try:
+            if activity_stream.stream_file_path is not None:
+                time_kind, epochs, columns = (
+                    activity_streams_storage_utils.read_stream_file_float_columns(
+                        activity_stream.stream_file_path,
+                        activity_stream.stream_file_checksum,
+                    )
+                )
+            else:
+                time_kind, epochs, columns = (
+                    activity_streams_codec_utils.decode_float_columns(
+                        activity_stream.stream_data
+                    )
+                )
+        except activity_streams_codec_utils.StreamEncodeError:
+            continue
+
+        if "lat" in columns and "lon" in columns:
+            mask = ~np.isnan(columns["lat"]) & ~np.isnan(columns["lon"])
+            distances = activities_distance_utils.calculate_track_distances(
+                epochs[mask], columns["lat"][mask], columns["lon"][mask]
+            )["cumulative_distances"]
+        elif "vel" in columns:
+            mask = ~np.isnan(columns["vel"])
+            # Integrate the velocity over the time between waypoints
+            distances = np.concatenate(
+                ([0.0], np.cumsum(columns["vel"][mask][1:] * np.diff(epochs[mask])))
+            )
+        else:
+            continue
+
+        # Times of the waypoints inside the distance window
+        times = epochs[mask][(distances >= window[0]) & (distances <= window[1])]
+        if len(times) == 0:
+            return None
+
+        # Return the window in seconds since the start of the activity
+        offset = (
+            start_epoch
+            if time_kind == activity_streams_codec_utils.TIME_KIND_DATETIME
+            else 0
+        )
+        return int(times.min()) - offset, int(times.max()) - offset
+
+    # The activity has no distance data
+    return None
+
+
+def get_activity_streams_levels(
+    activity_id: int, max_points: int, db: Session, stream_type: int | None = None
+):
+    # Smallest precomputed level of detail with at least max_points points
+    level = activity_streams_levels_utils.stored_level(max_points)
+    if level is None:
+        return None
+
+    # Get the activity streams levels from the database
+    query = db.query(models.ActivityStreamLevels).filter(
+        models.ActivityStreamLevels.activity_id == activity_id,
+        models.ActivityStreamLevels.max_points == level,
+    )
+    if stream_type is not None:
+        query = query.filter(models.ActivityStreamLevels.stream_type == stream_type)
+
+    # Return the levels as activity streams with at most max_points points
+    return [
+        downsample_stream(
+            activity_streams_schema.ActivityStreams.model_construct(
+                activity_id=stream_level.activity_id,
+                stream_type=stream_level.stream_type,
+                stream_waypoints=stream_level.stream_waypoints,
+            ),
+            max_points,
+        )
+        for stream_level in query.all()
+    ]
+
+
+def downsample_stream(activity_stream, max_points: int | None):
+    # Streams with fewer points are returned as they are
+    if max_points is None or len(activity_stream.stream_waypoints) <= max_points:
+        return activity_stream
+
+    return activity_streams_schema.ActivityStreams.model_construct(
+        id=activity_stream.id,
+        activity_id=activity_stream.activity_id,
+        stream_type=activity_stream.stream_type,
+        stream_waypoints=activity_streams_levels_utils.downsample_waypoints(
+            activity_stream.stream_type, activity_stream.stream_waypoints, max_points
+        ),
+        strava_activity_stream_id=activity_stream.strava_activity_stream_id,
+    )
+
+
+def load_activity_stream(activity_stream: models.ActivityStreams):
+    # Streams stored in the database are returned as they are
+    if activity_stream.stream_file_path is None:
+        return activity_stream
+
+    # Read the waypoints from the stream file
+    return activity_streams_schema.ActivityStreams.model_construct(
+        id=activity_stream.id,
+        activity_id=activity_stream.activity_id,
+        stream_type=activity_stream.stream_type,
+        stream_waypoints=activity_streams_storage_utils.read_stream_file(
+            activity_stream.stream_file_path,
+            activity_stream.stream_file_checksum,
+            activity_stream.stream_type == activity_streams_utils.STREAM_TYPE_COLUMNAR,
+        ),
+        strava_activity_stream_id=activity_stream.strava_activity_stream_id,
+    )
+
+
+def split_columnar_stream(activity_stream: models.ActivityStreams) -> list:
+    # Streams stored per stream type are returned as they are
+    if activity_stream.stream_type != activity_streams_utils.STREAM_TYPE_COLUMNAR:
+        return [activity_stream]
+
+    # Rebuild one stream per stream type set in the columnar stream
+    table = activity_stream.stream_waypoints[0]
+    return [
+        activity_streams_schema.ActivityStreams.model_construct(
+            id=activity_stream.id,
+            activity_id=activity_stream.activity_id,
+            stream_type=stream_type,
+            stream_waypoints=activity_streams_utils.table_to_waypoints(
+                table, stream_type
+            ),
+            strava_activity_stream_id=activity_stream.strava_activity_stream_id,
+        )
+        for stream_type in activity_streams_utils.table_stream_types(table)
+    ]
+
+
+def insert_activity_streams(
     activity_streams: list[activity_streams_schema.ActivityStreams], db: Session
 ):
+    # Create a list to store the activity streams and levels of detail rows
+    stream_rows = []
+    level_rows = []
+
+    # Iterate over the list of ActivityStreams objects
+    for stream in activity_streams:
+        stream_row = {
+            "activity_id": stream.activity_id,
+            "stream_type": stream.stream_type,
+            "stream_waypoints": stream.stream_waypoints,
+            "stream_file_path": None,
+            "stream_file_checksum": None,
+            "strava_activity_stream_id": stream.strava_activity_stream_id,
+        }
+
+        # Move the waypoints to a stream file if the files storage is used
+        if ACTIVITY_STREAMS_STORAGE == "files":
+            store_activity_stream_file(stream_row)
+
+        # Append the row to the list
+        stream_rows.append(stream_row)
+
+        # Precompute the levels of detail of every stream type
+        level_rows.extend(create_activity_stream_levels(stream))
+
+    # Insert the rows with executemany in the transaction of the caller
+    if stream_rows:
+        db.execute(insert(models.ActivityStreams), stream_rows)
+    if level_rows:
+        db.execute(insert(models.ActivityStreamLevels), level_rows)
+
+
+def store_activity_stream_file(stream_row: dict):
     try:
-        # Create a list to store the ActivityStreams objects
-        streams = []
-
-        # Iterate over the list of ActivityStreams objects
-        for stream in activity_streams:
-            # Create an ActivityStreams object
-            db_stream = models.ActivityStreams(
-                activity_id=stream.activity_id,
-                stream_type=stream.stream_type,
-                stream_waypoints=stream.stream_waypoints,
-                strava_activity_stream_id=stream.strava_activity_stream_id,
+        # Write the waypoints to the stream file, the database keeps its path and checksum
+        stream_row["stream_file_path"], stream_row["stream_file_checksum"] = (
+            activity_streams_storage_utils.write_stream_file(
+                stream_row["activity_id"],
+                stream_row["stream_type"],
+                stream_row["stream_waypoints"],
             )
+        )
+    except activity_streams_codec_utils.StreamEncodeError:
+        # Waypoints that don't fit in typed columns are kept in the database
+        return
+
+    stream_row["stream_waypoints"] = None
+
+
+def create_activity_stream_levels(
+    activity_stream: activity_streams_schema.ActivityStreams,
+) -> list:
+    stream_levels = []
+
+    # Columnar streams store the levels of every stream type below their number of
+    # records, so their levels are either all stored or all read from the full stream
+    stream_length = (
+        len(activity_stream.stream_waypoints[0]["time"])
+        if activity_stream.stream_type == activity_streams_utils.STREAM_TYPE_COLUMNAR
+        else None
+    )
+
+    # Create an activities streams levels row per stream type and level of detail
+    for split_stream in split_columnar_stream(activity_stream):
+        levels = activity_streams_levels_utils.create_stream_levels(
+            split_stream.stream_type, split_stream.stream_waypoints, stream_length
+        )
+        stream_levels.extend(
+            {
+                "activity_id": split_stream.activity_id,
+                "stream_type": split_stream.stream_type,
+                "max_points": max_points,
+                "stream_waypoints": waypoints,
+            }
+            for max_points, waypoints in levels.items()
+        )
+
+    # Return the list of activities streams levels rows
+    return stream_levels
 
-            # Append the object to the list
-            streams.append(db_stream)
 
-        # Bulk insert the list of ActivityStreams objects
-        db.bulk_save_objects(streams)
+def create_missing_activity_streams_levels(activity_id: int, db: Session):
+    try:
+        # Check if the activity already has levels of detail
+        if (
+            db.query(models.ActivityStreamLevels.id)
+            .filter(models.ActivityStreamLevels.activity_id == activity_id)
+            .first()
+        ):
+            return
+
+        # Get the activity streams from the database
+        activity_streams = (
+            db.query(models.ActivityStreams)
+            .filter(
+                models.ActivityStreams.activity_id == activity_id,
+            )
+            .all()
+        )
+
+        # Create the levels of detail of every activity stream
+        level_rows = [
+            stream_level
+            for activity_stream in activity_streams
+            for stream_level in create_activity_stream_levels(
+                load_activity_stream(activity_stream)
+            )
+        ]
+        if level_rows:
+            db.execute(insert(models.ActivityStreamLevels), level_rows)
         db.commit()
     except Exception as err:
         # Rollback the transaction
         db.rollback()
 
         # Log the exception
-        logger.error(f"Error in create_activity_streams: {err}", exc_info=True)
+        logger.error(
+            f"Error in create_missing_activity_streams_levels: {err}", exc_info=True
+        )
         # Raise an HTTPException with a 500 Internal Server Error status code
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
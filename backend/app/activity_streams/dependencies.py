@@ -1,5 +1,56 @@
+from fastapi import HTTPException, status
+
+import activity_streams.levels_utils as activity_streams_levels_utils
+
 import dependencies_global
 
 def validate_activity_stream_type(stream_type: int):
     # Check if gear type is between 1 and 3
-    dependencies_global.validate_type(type=stream_type, min=1, max=7, message="Invalid activity stream type")
\ No newline at end of file
+    dependencies_global.validate_type(type=stream_type, min=1, max=7, message="Invalid activity stream type")
+
+
+def validate_activity_streams_resolution(
+    resolution: str | None = None, max_points: int | None = None
+):
+    # Check if resolution is one of the levels of detail or the full streams
+    if resolution is not None and resolution not in (
+        *activity_streams_levels_utils.STREAM_LEVELS,
+        activity_streams_levels_utils.FULL_RESOLUTION,
+    ):
+        # Raise an HTTPException with a 422 Unprocessable Entity status code
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid activity streams resolution",
+        )
+
+    # Check if max_points higher than 1
+    if max_points is not None and not (int(max_points) > 1):
+        # Raise an HTTPException with a 422 Unprocessable Entity status code
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid maximum number of points",
+        )
+
+
+def validate_activity_streams_window(
+    start: float | None = None, end: float | None = None, window_type: str = "time"
+):
+    # Check if window_type is time or distance
+    if window_type not in ("time", "distance"):
+        # Raise an HTTPException with a 422 Unprocessable Entity status code
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid activity streams window type",
+        )
+
+    # Check if start and end are positive and start is not after end
+    if (
+        (start is not None and start < 0)
+        or (end is not None and end < 0)
+        or (start is not None and end is not None and start > end)
+    ):
+        # Raise an HTTPException with a 422 Unprocessable Entity status code
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid activity streams window",
+        )
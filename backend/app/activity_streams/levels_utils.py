@@ -0,0 +1,176 @@
+import heapq
+
+import numpy as np
+
+import activity_streams.utils as activity_streams_utils
+
+# Maximum number of points of the precomputed levels of detail by resolution
+STREAM_LEVELS = {
+    "low": 500,
+    "medium": 2000,
+    "high": 8000,
+}
+
+# Resolution returning the stored streams without any downsampling
+FULL_RESOLUTION = "full"
+
+
+def lttb_indexes(
+    times: np.ndarray, values: np.ndarray, max_points: int
+) -> np.ndarray:
+    # Largest Triangle Three Buckets, keeps the points that best preserve the shape of the series
+    count = len(times)
+    if max_points >= count:
+        return np.arange(count)
+    if max_points < 3:
+        return np.array([0, count - 1][:max_points])
+
+    # The first and last points are always kept, the others are split in max_points - 2 buckets
+    edges = np.append(
+        np.floor(np.linspace(1, count - 1, max_points - 1)).astype(np.int64), count
+    )
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+
+    # The third point of each triangle is the average of the next bucket, the last one is the last point
+    bucket_sizes = np.diff(edges)
+    average_times = np.add.reduceat(times, edges[:-1]) / bucket_sizes
+    average_values = np.add.reduceat(values, edges[:-1]) / bucket_sizes
+
+    indexes = np.empty(max_points, dtype=np.int64)
+    indexes[0] = selected = 0
+    indexes[-1] = count - 1
+
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        average_time = average_times[bucket + 1]
+        average_value = average_values[bucket + 1]
+
+        # Keep the point of the bucket forming the largest triangle with the last kept point
+        areas = np.abs(
+            (times[selected] - average_time) * (values[start:end] - values[selected])
+            - (times[selected] - times[start:end]) * (average_value - values[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indexes[bucket + 1] = selected
+
+    return indexes
+
+
+def segment_farthest_point(
+    x: np.ndarray, y: np.ndarray, start: int, end: int
+) -> tuple:
+    # Distance of the points between start and end to the line joining them
+    dx, dy = x[end] - x[start], y[end] - y[start]
+    px, py = x[start + 1 : end] - x[start], y[start + 1 : end] - y[start]
+    length = np.hypot(dx, dy)
+    if length == 0:
+        distances = np.hypot(px, py)
+    else:
+        distances = np.abs(dx * py - dy * px) / length
+
+    index = int(np.argmax(distances))
+    return float(distances[index]), start + 1 + index
+
+
+def douglas_peucker_order(lat: np.ndarray, lon: np.ndarray, max_points: int) -> list:
+    # Douglas-Peucker simplification where the farthest point of any segment is split first,
+    # so the first n points of the order are the simplification of the track to n points
+    count = len(lat)
+    if count <= 2:
+        return list(range(count))
+
+    # Scale the longitude so distances are close to planar distances
+    x = lon * np.cos(np.radians(np.mean(lat)))
+    y = lat
+
+    order = [0, count - 1]
+    segments = []
+
+    def push_segment(start: int, end: int):
+        if end - start > 1:
+            distance, index = segment_farthest_point(x, y, start, end)
+            heapq.heappush(segments, (-distance, start, end, index))
+
+    push_segment(0, count - 1)
+    while segments and len(order) < max_points:
+        _, start, end, index = heapq.heappop(segments)
+        order.append(index)
+        push_segment(start, index)
+        push_segment(index, end)
+
+    return order
+
+
+def downsample_waypoints(
+    stream_type: int, waypoints: list[dict], max_points: int
+) -> list[dict]:
+    # Streams with fewer points are returned as they are
+    if len(waypoints) <= max_points:
+        return waypoints
+
+    keys = activity_streams_utils.stream_type_keys(stream_type)
+    if keys == ("lat", "lon"):
+        _, lat = activity_streams_utils.waypoints_to_columns(waypoints, "lat")
+        _, lon = activity_streams_utils.waypoints_to_columns(waypoints, "lon")
+        indexes = sorted(douglas_peucker_order(lat, lon, max_points))
+    else:
+        times, values = activity_streams_utils.waypoints_to_columns(
+            waypoints, keys[0]
+        )
+        indexes = lttb_indexes(times, values, max_points).tolist()
+
+    return [waypoints[index] for index in indexes]
+
+
+def create_stream_levels(
+    stream_type: int, waypoints: list[dict], stream_length: int | None = None
+) -> dict:
+    # Only the levels with fewer points than the stream are stored, the full stream
+    # is read for the others instead of storing a copy of it
+    stream_length = len(waypoints) if stream_length is None else stream_length
+    levels = [
+        max_points
+        for max_points in STREAM_LEVELS.values()
+        if max_points < stream_length
+    ]
+    if not levels:
+        return {}
+
+    keys = activity_streams_utils.stream_type_keys(stream_type)
+    if keys == ("lat", "lon") and len(waypoints) > min(levels):
+        # The track is simplified once, every level keeps the first points of the order
+        _, lat = activity_streams_utils.waypoints_to_columns(waypoints, "lat")
+        _, lon = activity_streams_utils.waypoints_to_columns(waypoints, "lon")
+        order = douglas_peucker_order(lat, lon, max(levels))
+
+        return {
+            max_points: [waypoints[index] for index in sorted(order[:max_points])]
+            for max_points in levels
+        }
+
+    # Return the waypoints of every stored level of detail
+    return {
+        max_points: downsample_waypoints(stream_type, waypoints, max_points)
+        for max_points in levels
+    }
+
+
+def resolution_max_points(
+    resolution: str | None, max_points: int | None
+) -> int | None:
+    # The resolution caps the requested number of points, None means the full streams
+    if resolution is not None and resolution != FULL_RESOLUTION:
+        max_points = min(
+            max_points or STREAM_LEVELS[resolution], STREAM_LEVELS[resolution]
+        )
+
+    return max_points
+
+
+def stored_level(max_points: int) -> int | None:
+    # Smallest stored level with at least max_points points, None if the full streams are needed
+    return min(
+        (level for level in STREAM_LEVELS.values() if level >= max_points),
+        default=None,
+    )
@@ -0,0 +1,87 @@
+import orjson
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+import activities.crud as activities_crud
+
+import caching_utils
+
+
+class StreamsJSONResponse(Response):
+    # Streams are plain lists and dicts, so they are encoded without response model validation
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+def activity_stream_to_dict(activity_stream) -> dict:
+    # Works for ActivityStreams models and schemas
+    return {
+        "id": activity_stream.id,
+        "activity_id": activity_stream.activity_id,
+        "stream_type": activity_stream.stream_type,
+        "stream_waypoints": activity_stream.stream_waypoints,
+        "strava_activity_stream_id": activity_stream.strava_activity_stream_id,
+    }
+
+
+def activity_streams_response(activity_streams) -> StreamsJSONResponse:
+    # Return a single stream, a list of streams or null
+    if activity_streams is None:
+        return StreamsJSONResponse(None)
+
+    if isinstance(activity_streams, list):
+        return StreamsJSONResponse(
+            [activity_stream_to_dict(stream) for stream in activity_streams]
+        )
+
+    return StreamsJSONResponse(activity_stream_to_dict(activity_streams))
+
+
+def activity_streams_table_response(activity_streams_table) -> StreamsJSONResponse:
+    # Return the aligned table or null
+    if activity_streams_table is None:
+        return StreamsJSONResponse(None)
+
+    return StreamsJSONResponse(
+        {
+            "activity_id": activity_streams_table.activity_id,
+            "time": activity_streams_table.time,
+            "channels": activity_streams_table.channels,
+        }
+    )
+
+
+def activity_streams_etag(
+    request: Request, activity_id: int, db: Session
+) -> str | None:
+    # Streams don't change after ingest, the ETag only depends on the activity and the request
+    version = activities_crud.get_activity_version(activity_id, db)
+    if version is None:
+        return None
+
+    return caching_utils.create_etag(
+        "activity_streams", activity_id, version, request.url.path, request.url.query
+    )
+
+
+def cached_response(response: Response, etag: str | None) -> Response:
+    # Streams can be cached by the client for as long as it wants, missing streams are not cached
+    if etag is not None:
+        caching_utils.set_cache_headers(
+            response, etag, caching_utils.IMMUTABLE_CACHE_CONTROL
+        )
+
+    return response
+
+
+def not_modified_response(request: Request, etag: str | None) -> Response | None:
+    # Return a 304 Not Modified response if the client has the current streams
+    if etag is None or not caching_utils.is_etag_matched(request, etag):
+        return None
+
+    return caching_utils.not_modified_response(
+        etag, caching_utils.IMMUTABLE_CACHE_CONTROL
+    )
@@ -1,13 +1,16 @@
 import logging
+import math
 
 from typing import Annotated, Callable
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Request, Security
 from sqlalchemy.orm import Session
 
 import activity_streams.schema as activity_streams_schema
 import activity_streams.crud as activity_streams_crud
 import activity_streams.dependencies as activity_streams_dependencies
+import activity_streams.levels_utils as activity_streams_levels_utils
+import activity_streams.response_utils as activity_streams_response_utils
 
 import activities.dependencies as activities_dependencies
 
@@ -25,12 +28,22 @@ logger = logging.getLogger("myLogger")
 @router.get(
     "/activity_id/{activity_id}/all",
     response_model=list[activity_streams_schema.ActivityStreams] | None,
+    response_class=activity_streams_response_utils.StreamsJSONResponse,
 )
-async def read_activities_streams_for_activity_all(
+def read_activities_streams_for_activity_all(
+    request: Request,
     activity_id: int,
     validate_id: Annotated[
         Callable, Depends(activities_dependencies.validate_activity_id)
     ],
+    validate_resolution: Annotated[
+        Callable,
+        Depends(activity_streams_dependencies.validate_activity_streams_resolution),
+    ],
+    validate_window: Annotated[
+        Callable,
+        Depends(activity_streams_dependencies.validate_activity_streams_window),
+    ],
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["activities:read"])
     ],
@@ -38,16 +51,55 @@ async def read_activities_streams_for_activity_all(
         Session,
         Depends(database.get_db),
     ],
+    resolution: str | None = None,
+    max_points: int | None = None,
+    start: float | None = None,
+    end: float | None = None,
+    window_type: str = "time",
 ):
-    # Get the activity streams from the database and return them
-    return activity_streams_crud.get_activity_streams(activity_id, db)
+    # Clients with the current streams get a 304 without the streams being loaded
+    etag = activity_streams_response_utils.activity_streams_etag(
+        request, activity_id, db
+    )
+    not_modified_response = activity_streams_response_utils.not_modified_response(
+        request, etag
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    max_points = activity_streams_levels_utils.resolution_max_points(
+        resolution, max_points
+    )
+
+    # Get the activity streams inside the window from the database
+    if start is not None or end is not None:
+        activity_streams = activity_streams_crud.get_activity_streams_window(
+            activity_id,
+            (start or 0, end if end is not None else math.inf),
+            window_type,
+            db,
+            max_points=max_points,
+        )
+    else:
+        # Get the activity streams from the database
+        activity_streams = activity_streams_crud.get_activity_streams(
+            activity_id, db, max_points
+        )
+
+    # Return the activity streams encoded without response model validation
+    return activity_streams_response_utils.cached_response(
+        activity_streams_response_utils.activity_streams_response(activity_streams),
+        etag if activity_streams else None,
+    )
 
 
 @router.get(
     "/activity_id/{activity_id}/stream_type/{stream_type}",
     response_model=activity_streams_schema.ActivityStreams | None,
+    response_class=activity_streams_response_utils.StreamsJSONResponse,
 )
-async def read_activities_streams_for_activity_stream_type(
+def read_activities_streams_for_activity_stream_type(
+    request: Request,
     activity_id: int,
     validate_activity_id: Annotated[
         Callable, Depends(activities_dependencies.validate_activity_id)
@@ -56,6 +108,14 @@ async def read_activities_streams_for_activity_stream_type(
     validate_activity_stream_type: Annotated[
         Callable, Depends(activity_streams_dependencies.validate_activity_stream_type)
     ],
+    validate_resolution: Annotated[
+        Callable,
+        Depends(activity_streams_dependencies.validate_activity_streams_resolution),
+    ],
+    validate_window: Annotated[
+        Callable,
+        Depends(activity_streams_dependencies.validate_activity_streams_window),
+    ],
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["activities:read"])
     ],
@@ -63,8 +123,88 @@ async def read_activities_streams_for_activity_stream_type(
         Session,
         Depends(database.get_db),
     ],
+    resolution: str | None = None,
+    max_points: int | None = None,
+    start: float | None = None,
+    end: float | None = None,
+    window_type: str = "time",
 ):
-    # Get the activity stream from the database and return them
-    return activity_streams_crud.get_activity_stream_by_type(
-        activity_id, stream_type, db
+    # Clients with the current streams get a 304 without the streams being loaded
+    etag = activity_streams_response_utils.activity_streams_etag(
+        request, activity_id, db
+    )
+    not_modified_response = activity_streams_response_utils.not_modified_response(
+        request, etag
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    max_points = activity_streams_levels_utils.resolution_max_points(
+        resolution, max_points
+    )
+
+    # Get the activity stream inside the window from the database
+    if start is not None or end is not None:
+        activity_streams = activity_streams_crud.get_activity_streams_window(
+            activity_id,
+            (start or 0, end if end is not None else math.inf),
+            window_type,
+            db,
+            stream_type=stream_type,
+            max_points=max_points,
+        )
+        activity_stream = activity_streams[0] if activity_streams else None
+    else:
+        # Get the activity stream from the database
+        activity_stream = activity_streams_crud.get_activity_stream_by_type(
+            activity_id, stream_type, db, max_points
+        )
+
+    # Return the activity stream encoded without response model validation
+    return activity_streams_response_utils.cached_response(
+        activity_streams_response_utils.activity_streams_response(activity_stream),
+        etag if activity_stream else None,
+    )
+
+
+@router.get(
+    "/activity_id/{activity_id}/table",
+    response_model=activity_streams_schema.ActivityStreamsTable | None,
+    response_class=activity_streams_response_utils.StreamsJSONResponse,
+)
+def read_activities_streams_for_activity_table(
+    request: Request,
+    activity_id: int,
+    validate_id: Annotated[
+        Callable, Depends(activities_dependencies.validate_activity_id)
+    ],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["activities:read"])
+    ],
+    db: Annotated[
+        Session,
+        Depends(database.get_db),
+    ],
+):
+    # Clients with the current streams get a 304 without the streams being loaded
+    etag = activity_streams_response_utils.activity_streams_etag(
+        request, activity_id, db
+    )
+    not_modified_response = activity_streams_response_utils.not_modified_response(
+        request, etag
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    # Get every channel of the activity streams aligned on a shared time list
+    activity_streams_table = activity_streams_crud.get_activity_streams_table(
+        activity_id, db
+    )
+
+    # Return the table encoded without response model validation
+    return activity_streams_response_utils.cached_response(
+        activity_streams_response_utils.activity_streams_table_response(
+            activity_streams_table
+        ),
+        etag if activity_streams_table else None,
     )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List
 
 
 class ActivityStreams(BaseModel):
@@ -10,4 +10,10 @@ class ActivityStreams(BaseModel):
     strava_activity_stream_id: int | None = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class ActivityStreamsTable(BaseModel):
+    activity_id: int
+    time: List[str | int]
+    channels: Dict[str, List[int | float | None]]
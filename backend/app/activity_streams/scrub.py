@@ -0,0 +1,73 @@
+import argparse
+import sys
+
+import models
+
+import activity_streams.storage_utils as activity_streams_storage_utils
+
+from database import SessionLocal
+
+# Verify the checksum of every activity stream file:
+#   cd backend/app && python -m activity_streams.scrub [--activity-id 1]
+
+# Number of streams checked per query so big databases are not loaded in memory
+BATCH_SIZE = 1000
+
+
+def scrub_activity_streams_files(db, activity_id: int | None = None) -> list[int]:
+    # Return the ids of the streams whose file is missing or corrupted
+    failed_ids = []
+    last_id = 0
+
+    while True:
+        query = db.query(
+            models.ActivityStreams.id,
+            models.ActivityStreams.stream_file_path,
+            models.ActivityStreams.stream_file_checksum,
+        ).filter(
+            models.ActivityStreams.id > last_id,
+            models.ActivityStreams.stream_file_path.isnot(None),
+        )
+        if activity_id is not None:
+            query = query.filter(models.ActivityStreams.activity_id == activity_id)
+        rows = query.order_by(models.ActivityStreams.id).limit(BATCH_SIZE).all()
+        if not rows:
+            return failed_ids
+
+        for stream_id, file_path, checksum in rows:
+            try:
+                activity_streams_storage_utils.verify_stream_file(file_path, checksum)
+            except (
+                OSError,
+                activity_streams_storage_utils.StreamFileChecksumError,
+            ) as err:
+                print(f"Activity stream {stream_id}: {err}")
+                failed_ids.append(stream_id)
+
+        last_id = rows[-1].id
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verify the checksum of every activity stream file"
+    )
+    parser.add_argument(
+        "--activity-id", type=int, help="Only verify the streams of this activity"
+    )
+    args = parser.parse_args()
+
+    # Create a new database session
+    db = SessionLocal()
+
+    try:
+        failed_ids = scrub_activity_streams_files(db, args.activity_id)
+    finally:
+        # Ensure the session is closed after use
+        db.close()
+
+    print(f"{len(failed_ids)} activity stream files missing or corrupted")
+    sys.exit(1 if failed_ids else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import activity_streams.codec_utils as activity_streams_codec_utils
+
+from config import ACTIVITY_STREAMS_FILES_DIR
+
+# Define a loggger created on main.py
+logger = logging.getLogger("myLogger")
+
+# Number of directories the activities streams files are sharded in
+STREAMS_FILES_SHARDS = 256
+
+# Name of the time field by time kind
+TIME_FIELDS = {
+    activity_streams_codec_utils.TIME_KIND_DATETIME: "time",
+    activity_streams_codec_utils.TIME_KIND_SECONDS: "elapsed",
+}
+
+# Codec channel kind by field data type
+CHANNEL_KINDS = {
+    np.dtype("<i2"): activity_streams_codec_utils.CHANNEL_KIND_INT16,
+    np.dtype("<f4"): activity_streams_codec_utils.CHANNEL_KIND_FLOAT32,
+    np.dtype("<f8"): activity_streams_codec_utils.CHANNEL_KIND_COORDINATE,
+}
+
+
+class StreamFileChecksumError(Exception):
+    pass
+
+
+def activity_streams_dir(activity_id: int) -> str:
+    # Activities are spread over the shards so no directory gets too many entries
+    return os.path.join(
+        f"{activity_id % STREAMS_FILES_SHARDS:02x}", str(activity_id)
+    )
+
+
+def calculate_checksum(file_path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            file_hash.update(chunk)
+
+    # Return the hex digest of the file content
+    return file_hash.hexdigest()
+
+
+def columns_to_array(time_kind: int, epochs: np.ndarray, values: dict) -> np.ndarray:
+    fields = [(TIME_FIELDS[time_kind], "<i8")]
+    for channel, column in values.items():
+        missing = np.isnan(column)
+        if channel in activity_streams_codec_utils.COORDINATE_CHANNELS:
+            # Coordinates keep their full precision
+            fields.append((channel, "<f8"))
+        elif np.array_equal(column[~missing], np.round(column[~missing])) and (
+            np.abs(column[~missing]) < -activity_streams_codec_utils.INT16_MISSING
+        ).all():
+            # Integer channels that fit in int16, like heart rate, cadence and power
+            fields.append((channel, "<i2"))
+        else:
+            fields.append((channel, "<f4"))
+
+    # One record per waypoint with the time and every channel
+    array = np.empty(len(epochs), dtype=fields)
+    array[TIME_FIELDS[time_kind]] = epochs
+    for channel, column in values.items():
+        if array.dtype[channel] == np.dtype("<i2"):
+            column = np.where(
+                np.isnan(column), activity_streams_codec_utils.INT16_MISSING, column
+            )
+        array[channel] = column
+
+    return array
+
+
+def write_stream_file(activity_id: int, stream_type: int, waypoints: list) -> tuple:
+    # Raises StreamEncodeError if the waypoints can't be stored in typed columns
+    if activity_streams_codec_utils.is_table(waypoints):
+        columns = activity_streams_codec_utils.table_to_columns(waypoints[0])
+    else:
+        columns = activity_streams_codec_utils.waypoints_to_columns(waypoints)
+
+    file_path = os.path.join(activity_streams_dir(activity_id), f"{stream_type}.npy")
+    full_path = os.path.join(ACTIVITY_STREAMS_FILES_DIR, file_path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+    # Write to a temporary file first so readers never see a partial file
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        suffix=".npy", dir=os.path.dirname(full_path)
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            np.save(file, columns_to_array(*columns), allow_pickle=False)
+        checksum = calculate_checksum(temporary_path)
+        os.replace(temporary_path, full_path)
+    except Exception:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    # Return the path relative to the streams directory and the file checksum
+    return file_path, checksum
+
+
+def verify_stream_file(file_path: str, checksum: str | None):
+    # Hashing reads the whole file, so it is only done by the scrub and on errors
+    full_path = os.path.join(ACTIVITY_STREAMS_FILES_DIR, file_path)
+    if checksum is not None and calculate_checksum(full_path) != checksum:
+        raise StreamFileChecksumError(f"Checksum mismatch for stream file {file_path}")
+
+
+def load_stream_array(file_path: str, checksum: str | None = None) -> np.ndarray:
+    try:
+        # Map the file in memory, slices of the array don't copy the data
+        return np.load(
+            os.path.join(ACTIVITY_STREAMS_FILES_DIR, file_path),
+            mmap_mode="r",
+            allow_pickle=False,
+        )
+    except ValueError:
+        # Report a corrupted file if the content doesn't match the checksum
+        verify_stream_file(file_path, checksum)
+        raise
+
+
+def array_time(array: np.ndarray) -> tuple:
+    for time_kind, field in TIME_FIELDS.items():
+        if field in array.dtype.names:
+            return time_kind, field
+
+    raise ValueError("Stream file without time field")
+
+
+def read_stream_file(
+    file_path: str,
+    checksum: str | None,
+    is_table: bool,
+    window: tuple | None = None,
+    start_epoch: int = 0,
+) -> list[dict]:
+    array = load_stream_array(file_path, checksum)
+    time_kind, time_field = array_time(array)
+    epochs = array[time_field]
+
+    if window is not None:
+        if np.all(epochs[1:] >= epochs[:-1]):
+            # Binary search the window on the sorted time column
+            offset = (
+                start_epoch
+                if time_kind == activity_streams_codec_utils.TIME_KIND_DATETIME
+                else 0
+            )
+            start_index = np.searchsorted(epochs, offset + window[0], side="left")
+            end_index = np.searchsorted(epochs, offset + window[1], side="right")
+            array = array[start_index:end_index]
+        else:
+            array = array[
+                activity_streams_codec_utils.window_selection(
+                    time_kind, epochs, window, start_epoch
+                )
+            ]
+
+    # Convert the selected records to Python values
+    values = {}
+    for channel in array.dtype.names:
+        if channel == time_field:
+            continue
+
+        column = array[channel]
+        kind = CHANNEL_KINDS[column.dtype]
+        missing = (
+            column == activity_streams_codec_utils.INT16_MISSING
+            if kind == activity_streams_codec_utils.CHANNEL_KIND_INT16
+            else np.isnan(column)
+        )
+        values[channel] = activity_streams_codec_utils.array_to_values(
+            kind, column, missing
+        )
+
+    columns = (time_kind, np.asarray(array[time_field]), values)
+    if is_table:
+        return [activity_streams_codec_utils.columns_to_table(*columns)]
+
+    return activity_streams_codec_utils.columns_to_waypoints(*columns)
+
+
+def read_stream_file_float_columns(file_path: str, checksum: str | None) -> tuple:
+    # Return the epochs and every channel as a float array with NaN for missing values
+    array = load_stream_array(file_path, checksum)
+    time_kind, time_field = array_time(array)
+
+    columns = {}
+    for channel in array.dtype.names:
+        if channel == time_field:
+            continue
+
+        column = array[channel].astype(np.float64)
+        if array.dtype[channel] == np.dtype("<i2"):
+            column[column == activity_streams_codec_utils.INT16_MISSING] = np.nan
+        columns[channel] = column
+
+    return time_kind, np.asarray(array[time_field]), columns
+
+
+def delete_activity_streams_files(activity_id: int):
+    # Remove the streams files of the activity, if any
+    shutil.rmtree(
+        os.path.join(ACTIVITY_STREAMS_FILES_DIR, activity_streams_dir(activity_id)),
+        ignore_errors=True,
+    )
@@ -0,0 +1,271 @@
+import numpy as np
+
+from datetime import datetime, timezone
+
+# Channels stored per record, all sharing the same time column
+RECORD_CHANNELS = ("lat", "lon", "ele", "hr", "cad", "power", "vel")
+
+# Channels that hold integer values and are rendered as integers in waypoints
+INTEGER_CHANNELS = ("hr", "cad", "power")
+
+# Mapping between stream types and the record channel that feeds them
+STREAM_TYPE_CHANNELS = {
+    1: "hr",
+    2: "power",
+    3: "cad",
+    4: "ele",
+    5: "vel",
+    6: "pace",
+    7: "lat_lon",
+}
+
+# Stream types of the velocity and lat/lon streams
+STREAM_TYPE_VELOCITY = 5
+STREAM_TYPE_LAT_LON = 7
+
+# Stream type of the single columnar stream holding every channel of an activity
+STREAM_TYPE_COLUMNAR = 8
+
+# Channels of the columnar stream, in the order they are stored
+TABLE_CHANNELS = ("lat", "lon", "ele", "hr", "cad", "power", "vel", "pace")
+
+
+class RecordsBuffer:
+    def __init__(self, capacity: int = 4096):
+        # Number of records appended so far
+        self.size = 0
+        # Shared epoch seconds column
+        self.time = np.empty(capacity, dtype=np.int64)
+        # Value columns, NaN marks a missing value
+        self.channels = {
+            channel: np.full(capacity, np.nan, dtype=np.float64)
+            for channel in RECORD_CHANNELS
+        }
+
+    def _grow(self):
+        # Double the capacity of every column
+        capacity = len(self.time) * 2
+
+        time = np.empty(capacity, dtype=np.int64)
+        time[: self.size] = self.time[: self.size]
+        self.time = time
+
+        for channel, values in self.channels.items():
+            grown = np.full(capacity, np.nan, dtype=np.float64)
+            grown[: self.size] = values[: self.size]
+            self.channels[channel] = grown
+
+    def append(
+        self,
+        time: int,
+        lat=None,
+        lon=None,
+        ele=None,
+        hr=None,
+        cad=None,
+        power=None,
+        vel=None,
+    ):
+        # Grow the columns if the buffer is full
+        if self.size == len(self.time):
+            self._grow()
+
+        index = self.size
+        self.time[index] = time
+
+        # Columns are prefilled with NaN so only set values are written
+        for channel, value in zip(
+            RECORD_CHANNELS, (lat, lon, ele, hr, cad, power, vel)
+        ):
+            if value is not None:
+                self.channels[channel][index] = value
+
+        self.size += 1
+
+    def to_records(self) -> dict:
+        # Return the columns trimmed to the number of appended records
+        records = {"time": self.time[: self.size]}
+        for channel, values in self.channels.items():
+            records[channel] = values[: self.size]
+
+        return records
+
+
+def datetime_to_epoch(time: datetime) -> int:
+    # Naive datetimes are considered to be in UTC
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=timezone.utc)
+
+    return int(time.timestamp())
+
+
+def slice_records(records: dict, mask) -> dict:
+    # Apply the same selection to every column
+    return {key: values[mask] for key, values in records.items()}
+
+
+def sort_records_by_time(records: dict) -> dict:
+    # Records are usually already sorted, avoid any copy in that case
+    if np.all(records["time"][1:] >= records["time"][:-1]):
+        return records
+
+    # Reorder every column once using a stable sort on the time column
+    order = np.argsort(records["time"], kind="stable")
+    return slice_records(records, order)
+
+
+def slice_records_by_time(records: dict, start_time: int, end_time: int) -> dict:
+    # Binary search the inclusive [start_time, end_time] window on the sorted time column
+    start_index = np.searchsorted(records["time"], start_time, side="left")
+    end_index = np.searchsorted(records["time"], end_time, side="right")
+
+    # Basic slicing returns views so no record data is copied
+    return slice_records(records, slice(start_index, end_index))
+
+
+def is_channel_set(records: dict, channel: str) -> bool:
+    # A channel is set if at least one record has a value for it
+    return bool(np.any(~np.isnan(records[channel])))
+
+
+def first_lat_lon(records: dict) -> tuple:
+    # Get the coordinates of the first record with latitude and longitude set
+    indexes = np.flatnonzero(~np.isnan(records["lat"]) & ~np.isnan(records["lon"]))
+    if len(indexes) == 0:
+        return None, None
+
+    return float(records["lat"][indexes[0]]), float(records["lon"][indexes[0]])
+
+
+def records_to_waypoints(records: dict, stream_type: int) -> list[dict]:
+    channel = STREAM_TYPE_CHANNELS[stream_type]
+
+    # Convert the epoch column to "%Y-%m-%dT%H:%M:%S" strings
+    times = np.datetime_as_string(records["time"].astype("datetime64[s]"))
+
+    if channel == "lat_lon":
+        # Only records with both coordinates are kept
+        mask = ~np.isnan(records["lat"]) & ~np.isnan(records["lon"])
+        return [
+            {"time": time, "lat": lat, "lon": lon}
+            for time, lat, lon in zip(
+                times[mask].tolist(),
+                records["lat"][mask].tolist(),
+                records["lon"][mask].tolist(),
+            )
+        ]
+
+    if channel == "pace":
+        # Pace is derived from velocity and only defined for positive speeds
+        mask = records["vel"] > 0
+        values = 1 / records["vel"][mask]
+    else:
+        values = records[channel]
+        mask = ~np.isnan(values)
+        values = values[mask]
+
+        if channel in INTEGER_CHANNELS:
+            values = values.astype(np.int64)
+
+    # Build the dict-shaped waypoints only for the requested stream
+    return [
+        {"time": time, channel: value}
+        for time, value in zip(times[mask].tolist(), values.tolist())
+    ]
+
+
+def waypoints_to_columns(waypoints: list[dict], key: str) -> tuple:
+    # Waypoint times are "%Y-%m-%dT%H:%M:%S" strings or, for Strava streams, seconds since the start
+    times = [waypoint["time"] for waypoint in waypoints]
+    if times and isinstance(times[0], str):
+        times = np.array(times, dtype="datetime64[s]").astype(np.int64)
+    else:
+        times = np.array(times, dtype=np.float64)
+
+    # Missing values become NaN
+    values = np.array(
+        [
+            np.nan if waypoint.get(key) is None else waypoint[key]
+            for waypoint in waypoints
+        ],
+        dtype=np.float64,
+    )
+
+    return times, values
+
+
+def stream_type_keys(stream_type: int) -> tuple:
+    # Waypoint keys holding the values of a stream type
+    channel = STREAM_TYPE_CHANNELS[stream_type]
+    return ("lat", "lon") if channel == "lat_lon" else (channel,)
+
+
+def records_to_table(records: dict, stream_types: list[int]) -> dict:
+    # Convert the epoch column to "%Y-%m-%dT%H:%M:%S" strings
+    table = {
+        "time": np.datetime_as_string(records["time"].astype("datetime64[s]")).tolist()
+    }
+
+    channels = {
+        key for stream_type in stream_types for key in stream_type_keys(stream_type)
+    }
+
+    for channel in TABLE_CHANNELS:
+        if channel not in channels:
+            continue
+
+        if channel == "pace":
+            # Pace is derived from velocity and only defined for positive speeds
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.where(records["vel"] > 0, 1 / records["vel"], np.nan)
+        else:
+            values = records[channel]
+
+        # Missing values are stored as None, integer channels as integers
+        mask = np.isnan(values)
+        column = np.where(mask, 0, values)
+        if channel in INTEGER_CHANNELS:
+            column = column.astype(np.int64)
+        table[channel] = [
+            None if is_missing else value
+            for value, is_missing in zip(column.tolist(), mask.tolist())
+        ]
+
+    return table
+
+
+def waypoints_to_table(streams: dict) -> dict:
+    # Align the waypoints of every stream type on the union of their times
+    times = sorted(
+        {waypoint["time"] for waypoints in streams.values() for waypoint in waypoints}
+    )
+    indexes = {time: index for index, time in enumerate(times)}
+
+    table = {"time": times}
+    for stream_type, waypoints in sorted(streams.items()):
+        for key in stream_type_keys(stream_type):
+            column = table[key] = [None] * len(times)
+            for waypoint in waypoints:
+                column[indexes[waypoint["time"]]] = waypoint.get(key)
+
+    return table
+
+
+def table_stream_types(table: dict) -> list[int]:
+    # Stream types that can be rebuilt from the columnar stream channels
+    return [
+        stream_type
+        for stream_type in STREAM_TYPE_CHANNELS
+        if all(key in table for key in stream_type_keys(stream_type))
+    ]
+
+
+def table_to_waypoints(table: dict, stream_type: int) -> list[dict]:
+    keys = stream_type_keys(stream_type)
+
+    # Only the times with every value of the stream set are kept
+    return [
+        {"time": time, **dict(zip(keys, values))}
+        for time, *values in zip(table["time"], *(table[key] for key in keys))
+        if None not in values
+    ]
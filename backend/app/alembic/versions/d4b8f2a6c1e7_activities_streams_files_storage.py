@@ -0,0 +1,314 @@
+"""Activities streams files storage
+
+Revision ID: d4b8f2a6c1e7
+Revises: c9e3a5f70d12
+Create Date: 2026-10-17 19:12:40.318265
+
+"""
+import hashlib
+import json
+import os
+import struct
+import zlib
+from typing import Sequence, Union
+
+import numpy as np
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b8f2a6c1e7'
+down_revision: Union[str, None] = 'c9e3a5f70d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Number of streams moved per query so big databases are not loaded in memory
+BATCH_SIZE = 100
+
+# Directory of the activities streams files, read the same way as config.py does
+ACTIVITY_STREAMS_FILES_DIR = os.environ.get(
+    "ACTIVITY_STREAMS_FILES_DIR", "files/streams"
+)
+
+# Stream type of the columnar streams, one stream per activity with a shared time list
+STREAM_TYPE_COLUMNAR = 8
+
+# Frozen copy of the stream files reader and of the binary stream codec encoder,
+# format version 1, so this migration keeps writing the same data when
+# activity_streams.storage_utils and activity_streams.codec_utils change
+STREAM_CODEC_VERSION = 1
+
+LAYOUT_JSON = 0
+LAYOUT_COLUMNAR = 1
+LAYOUT_TABLE = 2
+
+TIME_KIND_DATETIME = 0
+TIME_KIND_SECONDS = 1
+
+CHANNEL_KIND_INT16 = 0
+CHANNEL_KIND_FLOAT32 = 1
+CHANNEL_KIND_COORDINATE = 2
+CHANNEL_KIND_MASKED_COORDINATE = 3
+
+INT16_MISSING = -32768
+
+COORDINATE_SCALE = 10**7
+COORDINATE_CHANNELS = ("lat", "lon")
+
+COMPRESSION_LEVEL = 6
+
+FLOAT32_SIGNIFICANT_DIGITS = 7
+
+# Time kind by name of the time field of the stream files
+TIME_FIELDS = {"time": TIME_KIND_DATETIME, "elapsed": TIME_KIND_SECONDS}
+
+
+class StreamEncodeError(Exception):
+    pass
+
+
+def calculate_checksum(file_path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            file_hash.update(chunk)
+
+    # Return the hex digest of the file content
+    return file_hash.hexdigest()
+
+
+def load_stream_file(file_path: str, checksum: str | None) -> np.ndarray:
+    # Fails the downgrade if a file is missing or corrupted instead of losing the stream
+    full_path = os.path.join(ACTIVITY_STREAMS_FILES_DIR, file_path)
+    if checksum is not None and calculate_checksum(full_path) != checksum:
+        raise ValueError(f"Checksum mismatch for stream file {file_path}")
+
+    return np.load(full_path, allow_pickle=False)
+
+
+def array_time_field(array: np.ndarray) -> str:
+    for field in TIME_FIELDS:
+        if field in array.dtype.names:
+            return field
+
+    raise ValueError("Stream file without time field")
+
+
+def array_to_columns(array: np.ndarray) -> tuple:
+    # Return the epochs and every channel as a float array with NaN for missing values
+    time_field = array_time_field(array)
+    values = {}
+    for channel in array.dtype.names:
+        if channel == time_field:
+            continue
+
+        column = array[channel].astype(np.float64)
+        if array.dtype[channel] == np.dtype("<i2"):
+            column[column == INT16_MISSING] = np.nan
+        values[channel] = column
+
+    return TIME_FIELDS[time_field], array[time_field].astype(np.int64), values
+
+
+def round_float32_values(array: np.ndarray) -> np.ndarray:
+    # Round to the significant digits float32 keeps so 123.4 isn't returned as 123.40000152
+    values = array.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitudes = np.floor(np.log10(np.abs(values)))
+    exponents = np.where(
+        np.isfinite(magnitudes), FLOAT32_SIGNIFICANT_DIGITS - 1 - magnitudes, 0
+    )
+
+    # Powers of ten are only exact as factors, so large values are divided instead
+    factors = 10.0 ** np.abs(exponents)
+    return np.where(
+        exponents >= 0,
+        np.round(values * factors) / factors,
+        np.round(values / factors) * factors,
+    )
+
+
+def array_to_waypoints(array: np.ndarray, is_table: bool) -> list:
+    # Rebuild the waypoints as the app returned them, used for the JSON layout
+    time_field = array_time_field(array)
+    epochs = array[time_field].astype(np.int64)
+    if TIME_FIELDS[time_field] == TIME_KIND_DATETIME:
+        times = np.datetime_as_string(epochs.astype("datetime64[s]")).tolist()
+    else:
+        times = epochs.tolist()
+
+    values = {}
+    for channel in array.dtype.names:
+        if channel == time_field:
+            continue
+
+        column = array[channel]
+        if column.dtype == np.dtype("<i2"):
+            missing = column == INT16_MISSING
+            column = column.tolist()
+        elif column.dtype == np.dtype("<f4"):
+            missing = np.isnan(column)
+            column = round_float32_values(column).tolist()
+        else:
+            missing = np.isnan(column)
+            column = column.tolist()
+
+        # Missing values are returned as None
+        values[channel] = [
+            None if is_missing else value
+            for value, is_missing in zip(column, missing.tolist())
+        ]
+
+    if is_table:
+        return [{"time": times, **values}]
+
+    channels = list(values)
+    rows = zip(*values.values()) if channels else ((),) * len(times)
+    return [
+        {"time": time, **dict(zip(channels, row))} for time, row in zip(times, rows)
+    ]
+
+
+def encode_columns(
+    layout: int, time_kind: int, epochs: np.ndarray, values: dict
+) -> bytes:
+    # Time is stored as the first value and the int32 differences to the previous value
+    time_deltas = np.diff(epochs)
+    if len(time_deltas) and (
+        time_deltas.min() < np.iinfo(np.int32).min
+        or time_deltas.max() > np.iinfo(np.int32).max
+    ):
+        raise StreamEncodeError("Waypoint time differences don't fit in int32")
+
+    parts = [
+        struct.pack("<BIqB", time_kind, len(epochs), int(epochs[0]), len(values)),
+        time_deltas.astype("<i4").tobytes(),
+    ]
+
+    for channel, column in values.items():
+        missing = np.isnan(column)
+        if channel in COORDINATE_CHANNELS:
+            if (np.abs(column[~missing]) > 180).any():
+                raise StreamEncodeError("Invalid coordinates")
+            # Quantize the coordinates and store the differences to the previous value
+            quantized = np.round(np.where(missing, 0, column) * COORDINATE_SCALE)
+            if missing.any():
+                # Missing coordinates repeat the previous value and are flagged in a bit mask
+                kind = CHANNEL_KIND_MASKED_COORDINATE
+                indexes = np.where(missing, 0, np.arange(len(column)))
+                quantized = quantized[np.maximum.accumulate(indexes)]
+                mask = np.packbits(missing).tobytes()
+            else:
+                kind = CHANNEL_KIND_COORDINATE
+                mask = b""
+            deltas = np.diff(quantized.astype(np.int64), prepend=0)
+            if (np.abs(deltas) > np.iinfo(np.int32).max).any():
+                raise StreamEncodeError("Coordinate differences don't fit in int32")
+            data = mask + deltas.astype("<i4").tobytes()
+        elif (
+            np.array_equal(column[~missing], np.round(column[~missing]))
+            and (np.abs(column[~missing]) < -INT16_MISSING).all()
+        ):
+            # Integer channels that fit in int16, like heart rate, cadence and power
+            kind = CHANNEL_KIND_INT16
+            data = np.where(missing, INT16_MISSING, column).astype("<i2").tobytes()
+        else:
+            kind = CHANNEL_KIND_FLOAT32
+            data = column.astype("<f4").tobytes()
+
+        name = channel.encode()
+        parts.append(struct.pack(f"<B{len(name)}sB", len(name), name, kind))
+        parts.append(data)
+
+    return struct.pack("<BB", STREAM_CODEC_VERSION, layout) + zlib.compress(
+        b"".join(parts), COMPRESSION_LEVEL
+    )
+
+
+def encode_stream_file(file_path: str, checksum: str | None, stream_type: int) -> bytes:
+    array = load_stream_file(file_path, checksum)
+    is_table = stream_type == STREAM_TYPE_COLUMNAR
+
+    try:
+        # The typed columns of the file are encoded without going through Python values
+        return encode_columns(
+            LAYOUT_TABLE if is_table else LAYOUT_COLUMNAR, *array_to_columns(array)
+        )
+    except StreamEncodeError:
+        # Keep any other waypoints as compressed JSON
+        return struct.pack("<BB", STREAM_CODEC_VERSION, LAYOUT_JSON) + zlib.compress(
+            json.dumps(
+                array_to_waypoints(array, is_table), separators=(",", ":")
+            ).encode(),
+            COMPRESSION_LEVEL,
+        )
+
+
+def inline_streams_files():
+    # Move the waypoints of the streams stored in files back to the database
+    streams = sa.table(
+        'activities_streams',
+        sa.column('id', sa.Integer),
+        sa.column('stream_type', sa.Integer),
+        sa.column('stream_waypoints', sa.LargeBinary),
+        sa.column('stream_file_path', sa.String),
+        sa.column('stream_file_checksum', sa.String),
+    )
+    connection = op.get_bind()
+    last_id = 0
+
+    while True:
+        rows = connection.execute(
+            sa.select(
+                streams.c.id,
+                streams.c.stream_type,
+                streams.c.stream_file_path,
+                streams.c.stream_file_checksum,
+            )
+            .where(streams.c.id > last_id, streams.c.stream_file_path.isnot(None))
+            .order_by(streams.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        for stream_id, stream_type, file_path, checksum in rows:
+            connection.execute(
+                streams.update()
+                .where(streams.c.id == stream_id)
+                .values(
+                    stream_waypoints=encode_stream_file(
+                        file_path, checksum, stream_type
+                    )
+                )
+            )
+
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.add_column('activities_streams', sa.Column('stream_file_path', sa.String(length=250), nullable=True, comment='Path of the waypoints file relative to the streams files directory'))
+    op.add_column('activities_streams', sa.Column('stream_file_checksum', sa.String(length=64), nullable=True, comment='SHA-256 checksum of the waypoints file'))
+    op.alter_column('activities_streams', 'stream_waypoints',
+               existing_type=mysql.LONGBLOB(),
+               nullable=True,
+               comment='Waypoints data encoded with the binary stream codec, null if stored in a file',
+               existing_comment='Waypoints data encoded with the binary stream codec')
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    # The stream files are left on disk, remove ACTIVITY_STREAMS_FILES_DIR afterwards
+    inline_streams_files()
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.alter_column('activities_streams', 'stream_waypoints',
+               existing_type=mysql.LONGBLOB(),
+               nullable=False,
+               comment='Waypoints data encoded with the binary stream codec',
+               existing_comment='Waypoints data encoded with the binary stream codec, null if stored in a file')
+    op.drop_column('activities_streams', 'stream_file_checksum')
+    op.drop_column('activities_streams', 'stream_file_path')
+    # ### end Alembic commands ###
@@ -0,0 +1,38 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Cache-Control of resources that never change once created
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# Cache-Control of resources that can change, clients revalidate them with the ETag
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def create_etag(*parts) -> str:
+    # Strong ETag built from the parts identifying the resource version
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def is_etag_matched(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    return if_none_match.strip() == "*" or etag in (
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    )
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified_response(etag: str, cache_control: str) -> Response:
+    # Return a 304 Not Modified response without body
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag, cache_control)
+    return response
@@ -1,2 +1,46 @@
+import os
+
 # Constant related to version
-API_VERSION = "v0.6.0"
\ No newline at end of file
+API_VERSION = "v0.6.0"
+
+# Number of worker processes used to parse and store bulk imported files
+BULK_IMPORT_MAX_WORKERS = int(
+    os.environ.get("BULK_IMPORT_MAX_WORKERS", min(4, os.cpu_count() or 1))
+)
+
+# Maximum number of requests per second made to the geocode maps API
+GEOCODES_MAPS_API_RATE_LIMIT = float(
+    os.environ.get("GEOCODES_MAPS_API_RATE_LIMIT", 1)
+)
+if not GEOCODES_MAPS_API_RATE_LIMIT > 0:
+    raise ValueError(
+        f"Invalid GEOCODES_MAPS_API_RATE_LIMIT value {GEOCODES_MAPS_API_RATE_LIMIT}, "
+        "expected a number of requests per second above 0"
+    )
+
+# Maximum size in bytes of an uploaded activity file
+UPLOAD_MAX_FILE_SIZE = int(
+    os.environ.get("UPLOAD_MAX_FILE_SIZE", 100 * 1024 * 1024)
+)
+
+# FIT file CRC check: disabled, warn or raise
+FIT_CHECK_CRC = os.environ.get("FIT_CHECK_CRC", "disabled")
+if FIT_CHECK_CRC not in ("disabled", "warn", "raise"):
+    raise ValueError(
+        f"Invalid FIT_CHECK_CRC value {FIT_CHECK_CRC!r}, "
+        "expected disabled, warn or raise"
+    )
+
+# Activity streams layout: per_type stores one stream per stream type, columnar stores one stream per activity
+ACTIVITY_STREAMS_LAYOUT = os.environ.get("ACTIVITY_STREAMS_LAYOUT", "per_type")
+
+# Activity streams storage: database stores the waypoints in the database, files stores them in memory-mapped files
+ACTIVITY_STREAMS_STORAGE = os.environ.get("ACTIVITY_STREAMS_STORAGE", "database")
+
+# Directory of the activity streams files when the files storage is used
+ACTIVITY_STREAMS_FILES_DIR = os.environ.get(
+    "ACTIVITY_STREAMS_FILES_DIR", "files/streams"
+)
+
+# Serve the hot read routes with an async engine and AsyncSession: false or true
+DB_ASYNC_ENABLED = os.environ.get("DB_ASYNC_ENABLED", "false").lower() == "true"
@@ -1,9 +1,12 @@
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.engine.url import URL
 
+import config
+
 
 def get_db():
     # Create a new database session and return it
@@ -17,6 +20,13 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    # Create a new async database session and return it
+    async with AsyncSessionLocal() as db:
+        # Yield the async database session, it is closed when the request ends
+        yield db
+
+
 # Define the database connection URL using environment variables
 db_url = URL.create(
     drivername="mysql",
@@ -35,5 +45,24 @@ engine = create_engine(
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine is only created when enabled, the sync engine is still used by
+# every other route and by the background jobs
+async_engine = None
+AsyncSessionLocal = None
+if config.DB_ASYNC_ENABLED:
+    # Create the SQLAlchemy async engine with the async MySQL driver
+    async_engine = create_async_engine(
+        db_url.set(drivername="mysql+aiomysql"),
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=180,
+        pool_recycle=3600,
+    )
+
+    # Create an async session factory
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
 # Create a base class for declarative models
 Base = declarative_base()
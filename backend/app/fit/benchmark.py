@@ -0,0 +1,76 @@
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+import fit.utils as fit_utils
+
+# Compare the fast path FIT decoder with the fitdecode parser:
+#   cd backend/app && python -m fit.benchmark files/processed/*.fit
+
+
+def time_parser(parser, file_path: str, repeat: int) -> tuple:
+    # Keep the best time of all the runs
+    best_time = None
+    parsed_data = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        parsed_data = parser(file_path)
+        elapsed_time = time.perf_counter() - start_time
+        if best_time is None or elapsed_time < best_time:
+            best_time = elapsed_time
+
+    return best_time, parsed_data
+
+
+def is_same_parsed_data(fast_data: dict, fitdecode_data: dict) -> bool:
+    # Compare every record column and the sessions
+    return fast_data["sessions"] == fitdecode_data["sessions"] and all(
+        np.array_equal(values, fitdecode_data["records"][channel], equal_nan=True)
+        for channel, values in fast_data["records"].items()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the fast path FIT decoder against fitdecode"
+    )
+    parser.add_argument("files", nargs="+", help="FIT files to parse")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of runs per file and parser"
+    )
+    args = parser.parse_args()
+
+    # fitdecode warns about unknown developer fields on every file
+    warnings.simplefilter("ignore")
+
+    total_fitdecode_time = total_fast_time = 0.0
+    for file_path in args.files:
+        fitdecode_time, fitdecode_data = time_parser(
+            fit_utils.parse_fit_file_with_fitdecode, file_path, args.repeat
+        )
+        fast_time, fast_data = time_parser(
+            fit_utils.parse_fit_file_fast, file_path, args.repeat
+        )
+        total_fitdecode_time += fitdecode_time
+        total_fast_time += fast_time
+
+        print(
+            f"{file_path}: {len(fast_data['records']['time'])} records, "
+            f"fitdecode {fitdecode_time * 1000:.1f} ms, "
+            f"fast path {fast_time * 1000:.1f} ms, "
+            f"{fitdecode_time / fast_time:.1f}x faster, "
+            f"{'same' if is_same_parsed_data(fast_data, fitdecode_data) else 'DIFFERENT'} data"
+        )
+
+    if len(args.files) > 1:
+        print(
+            f"Total: fitdecode {total_fitdecode_time * 1000:.1f} ms, "
+            f"fast path {total_fast_time * 1000:.1f} ms, "
+            f"{total_fitdecode_time / total_fast_time:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
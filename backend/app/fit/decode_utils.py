@@ -0,0 +1,368 @@
+import mmap
+import os
+import struct
+
+from datetime import datetime, timezone
+from typing import BinaryIO
+
+import fitdecode.profile as fit_profile
+
+# Seconds between the unix epoch and the FIT epoch (1989-12-31T00:00:00Z)
+FIT_EPOCH_OFFSET = 631065600
+
+# FIT timestamp field number, present in most messages
+TIMESTAMP_FIELD = 253
+
+# CRC check modes, same as fitdecode.CrcCheck
+CRC_CHECK_DISABLED = "disabled"
+CRC_CHECK_WARN = "warn"
+CRC_CHECK_RAISE = "raise"
+
+# Base type number (bits 0-4 of the base type byte) to struct format and invalid value
+BASE_TYPES = {
+    0x00: ("B", 0xFF),  # enum
+    0x01: ("b", 0x7F),  # sint8
+    0x02: ("B", 0xFF),  # uint8
+    0x03: ("h", 0x7FFF),  # sint16
+    0x04: ("H", 0xFFFF),  # uint16
+    0x05: ("i", 0x7FFFFFFF),  # sint32
+    0x06: ("I", 0xFFFFFFFF),  # uint32
+    0x07: ("s", None),  # string
+    0x08: ("f", None),  # float32, invalid is NaN
+    0x09: ("d", None),  # float64, invalid is NaN
+    0x0A: ("B", 0x00),  # uint8z
+    0x0B: ("H", 0x0000),  # uint16z
+    0x0C: ("I", 0x00000000),  # uint32z
+    0x0D: ("B", 0xFF),  # byte
+    0x0E: ("q", 0x7FFFFFFFFFFFFFFF),  # sint64
+    0x0F: ("Q", 0xFFFFFFFFFFFFFFFF),  # uint64
+    0x10: ("Q", 0x0000000000000000),  # uint64z
+}
+
+# Messages decoded by the fast path, every other message is skipped without being decoded.
+# Each field is (name, field numbers by priority, scale, offset, kind)
+MESSAGE_FIELDS = {
+    0: (
+        "file_id",
+        (
+            ("serial_number", (3,), None, None, "value"),
+            ("time_created", (4,), None, None, "date_time"),
+        ),
+    ),
+    18: (
+        "session",
+        (
+            ("start_position_lat", (3,), None, None, "value"),
+            ("start_position_long", (4,), None, None, "value"),
+            ("sport", (5,), None, None, "sport"),
+            ("sub_sport", (6,), None, None, "sub_sport"),
+            ("start_time", (2,), None, None, "date_time"),
+            ("total_elapsed_time", (7,), 1000, None, "value"),
+            ("total_timer_time", (8,), 1000, None, "value"),
+            ("total_calories", (11,), None, None, "value"),
+            ("total_distance", (9,), 100, None, "value"),
+            ("avg_heart_rate", (16,), None, None, "value"),
+            ("max_heart_rate", (17,), None, None, "value"),
+            ("avg_cadence", (18,), None, None, "value"),
+            ("max_cadence", (19,), None, None, "value"),
+            ("avg_power", (20,), None, None, "value"),
+            ("max_power", (21,), None, None, "value"),
+            ("total_ascent", (22,), None, None, "value"),
+            ("total_descent", (23,), None, None, "value"),
+            ("normalized_power", (34,), None, None, "value"),
+            ("enhanced_avg_speed", (124, 14), 1000, None, "value"),
+            ("enhanced_max_speed", (125, 15), 1000, None, "value"),
+            ("workout_feeling", (192,), None, None, "value"),
+            ("workout_rpe", (193,), None, None, "value"),
+        ),
+    ),
+    20: (
+        "record",
+        (
+            ("timestamp", (TIMESTAMP_FIELD,), None, None, "timestamp"),
+            ("position_lat", (0,), None, None, "value"),
+            ("position_long", (1,), None, None, "value"),
+            ("enhanced_altitude", (78, 2), 5, 500, "value"),
+            ("heart_rate", (3,), None, None, "value"),
+            ("cadence", (4,), None, None, "value"),
+            ("power", (7,), None, None, "value"),
+        ),
+    ),
+    26: (
+        "workout",
+        (("wkt_name", (8,), None, None, "string"),),
+    ),
+    313: (
+        "split_summary",
+        (
+            ("split_type", (0,), None, None, "value"),
+            ("total_timer_time", (4,), 1000, None, "value"),
+        ),
+    ),
+}
+
+# Field names of the decoded messages, in the order the values are yielded
+MESSAGE_FIELD_NAMES = {
+    name: tuple(field[0] for field in fields) for name, fields in MESSAGE_FIELDS.values()
+}
+
+
+class FitDecodeError(Exception):
+    pass
+
+
+class MessageDefinition:
+    __slots__ = ("name", "size", "struct", "fields", "timestamp_struct")
+
+    def __init__(
+        self, global_number: int, endian: str, field_definitions: list, size: int
+    ):
+        # Total size of the data message, developer fields included
+        self.size = size
+
+        # Find the offset, struct format and invalid value of every field
+        field_offsets = {}
+        offset = 0
+        for number, field_size, base_type in field_definitions:
+            struct_format, invalid = BASE_TYPES.get(base_type & 0x1F, ("s", None))
+            field_offsets[number] = (offset, field_size, struct_format, invalid)
+            offset += field_size
+
+        # Read the timestamp of every message to follow the compressed timestamps
+        self.timestamp_struct = None
+        if TIMESTAMP_FIELD in field_offsets:
+            timestamp_offset, field_size, _, _ = field_offsets[TIMESTAMP_FIELD]
+            if field_size == 4:
+                self.timestamp_struct = (
+                    struct.Struct(f"{endian}{timestamp_offset}xI"),
+                    0xFFFFFFFF,
+                )
+
+        self.name = None
+        self.struct = None
+        self.fields = ()
+        if global_number not in MESSAGE_FIELDS:
+            return
+
+        # Look up the fields of the decoded messages once per definition
+        self.name, message_fields = MESSAGE_FIELDS[global_number]
+        struct_format = endian
+        raw_offset = 0
+        raw_indexes = {}
+        for number, (offset, field_size, field_format, invalid) in sorted(
+            field_offsets.items(), key=lambda item: item[1][0]
+        ):
+            is_used = any(number in numbers for _, numbers, _, _, _ in message_fields)
+            if field_format == "s":
+                field_format = f"{field_size}s"
+            elif struct.calcsize(field_format) != field_size:
+                # Arrays are not used by the decoded fields
+                is_used = False
+
+            if not is_used:
+                continue
+
+            # Skip the bytes between the previous used field and this one
+            if offset > raw_offset:
+                struct_format += f"{offset - raw_offset}x"
+            struct_format += field_format
+            raw_offset = offset + field_size
+            raw_indexes[number] = (len(raw_indexes), invalid)
+
+        self.struct = struct.Struct(struct_format)
+        self.fields = tuple(
+            (
+                tuple(
+                    raw_indexes[number] for number in numbers if number in raw_indexes
+                ),
+                scale,
+                value_offset,
+                kind,
+                TIMESTAMP_FIELD in numbers,
+            )
+            for _, numbers, scale, value_offset, kind in message_fields
+        )
+
+    def decode(self, data, offset: int, timestamp: int | None) -> tuple:
+        raw_values = self.struct.unpack_from(data, offset)
+        values = []
+
+        for candidates, scale, value_offset, kind, is_timestamp in self.fields:
+            value = None
+            for index, invalid in candidates:
+                raw_value = raw_values[index]
+                # Floats are invalid when NaN
+                if raw_value != invalid and raw_value == raw_value:
+                    value = raw_value
+                    break
+
+            # Messages with a compressed timestamp header have no timestamp field
+            if value is None and is_timestamp:
+                value = timestamp
+
+            if value is not None:
+                value = convert_value(value, scale, value_offset, kind)
+
+            # Zero values are considered not set, like get_value_from_frame does
+            values.append(value if value else None)
+
+        return tuple(values)
+
+
+def convert_value(value, scale, value_offset, kind: str):
+    if kind == "value":
+        if scale:
+            value = value / scale
+        if value_offset:
+            value = value - value_offset
+        return value
+    if kind == "timestamp":
+        return value + FIT_EPOCH_OFFSET
+    if kind == "date_time":
+        return datetime.fromtimestamp(value + FIT_EPOCH_OFFSET, timezone.utc)
+    if kind == "string":
+        return value.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+    # Enum values are converted to their profile names
+    return fit_profile.FIELD_TYPES[kind].enum.get(value, value)
+
+
+def create_crc_table() -> tuple:
+    # CRC-16 with the reflected 0x8005 polynomial used by FIT files
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+
+    return tuple(table)
+
+
+CRC_TABLE = create_crc_table()
+
+
+def calculate_crc(data, start: int, end: int) -> int:
+    crc = 0
+    for byte in data[start:end]:
+        crc = (crc >> 8) ^ CRC_TABLE[(crc ^ byte) & 0xFF]
+
+    return crc
+
+
+def read_fit_data(file: str | BinaryIO):
+    # Memory mapped files and bytes are decoded in place
+    if isinstance(file, (bytes, bytearray, memoryview, mmap.mmap)):
+        return file
+
+    # Read the FIT file, either from a path or from an open file
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as fit_file:
+            return fit_file.read()
+
+    return file.read()
+
+
+def iterate_fit_messages(
+    file: str | BinaryIO, check_crc: str = CRC_CHECK_DISABLED, logger=None
+):
+    data = read_fit_data(file)
+    offset = 0
+
+    # A FIT file may be made of several chained FIT files
+    while offset < len(data):
+        if len(data) - offset < 12:
+            raise FitDecodeError(f"Truncated FIT file header at offset {offset}")
+
+        header_size = data[offset]
+        if header_size not in (12, 14) or data[offset + 8 : offset + 12] != b".FIT":
+            raise FitDecodeError(f"Invalid FIT file header at offset {offset}")
+
+        data_size = struct.unpack_from("<I", data, offset + 4)[0]
+        end = offset + header_size + data_size
+        if end + 2 > len(data):
+            raise FitDecodeError(f"Truncated FIT file at offset {offset}")
+
+        if check_crc != CRC_CHECK_DISABLED:
+            # The file CRC covers the header and the records
+            crc = struct.unpack_from("<H", data, end)[0]
+            if calculate_crc(data, offset, end) != crc:
+                if check_crc == CRC_CHECK_RAISE:
+                    raise FitDecodeError(f"Invalid FIT file CRC at offset {end}")
+                if logger is not None:
+                    logger.warning(f"Invalid FIT file CRC at offset {end}")
+
+        yield from iterate_fit_records(data, offset + header_size, end)
+
+        offset = end + 2
+
+
+def iterate_fit_records(data, offset: int, end: int):
+    # Definitions by local message number
+    definitions = {}
+    # Last timestamp, used to expand the compressed timestamp headers
+    last_timestamp = 0
+
+    while offset < end:
+        header = data[offset]
+        offset += 1
+        timestamp = None
+
+        if header & 0x80:
+            # Compressed timestamp header, the time offset is relative to the last timestamp
+            local_number = (header >> 5) & 0x3
+            time_offset = header & 0x1F
+            timestamp = time_offset + (last_timestamp & ~0x1F)
+            if time_offset < (last_timestamp & 0x1F):
+                timestamp += 0x20
+            last_timestamp = timestamp
+        elif header & 0x40:
+            # Definition message
+            endian = ">" if data[offset + 1] else "<"
+            global_number = struct.unpack_from(f"{endian}H", data, offset + 2)[0]
+            field_count = data[offset + 4]
+            offset += 5
+
+            field_definitions = [
+                (data[index], data[index + 1], data[index + 2])
+                for index in range(offset, offset + 3 * field_count, 3)
+            ]
+            offset += 3 * field_count
+            size = sum(field_size for _, field_size, _ in field_definitions)
+
+            if header & 0x20:
+                # Developer fields are only skipped
+                developer_field_count = data[offset]
+                offset += 1
+                size += sum(
+                    data[index + 1]
+                    for index in range(offset, offset + 3 * developer_field_count, 3)
+                )
+                offset += 3 * developer_field_count
+
+            definitions[header & 0x0F] = MessageDefinition(
+                global_number, endian, field_definitions, size
+            )
+            continue
+        else:
+            local_number = header & 0x0F
+
+        definition = definitions.get(local_number)
+        if definition is None:
+            raise FitDecodeError(
+                f"Data message without definition for local message {local_number}"
+            )
+        if offset + definition.size > end:
+            raise FitDecodeError(f"Truncated data message at offset {offset}")
+
+        if definition.timestamp_struct is not None:
+            # Keep the last timestamp for the following compressed timestamp headers
+            timestamp_struct, invalid = definition.timestamp_struct
+            message_timestamp = timestamp_struct.unpack_from(data, offset)[0]
+            if message_timestamp != invalid:
+                last_timestamp = message_timestamp
+
+        if definition.name is not None:
+            yield definition.name, definition.decode(data, offset, timestamp)
+
+        offset += definition.size
@@ -3,14 +3,44 @@ import logging
 
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
-import time as timelib
+from typing import BinaryIO
 
 import activities.utils as activities_utils
 import activities.schema as activities_schema
+import activities.distance_utils as activities_distance_utils
+import activities.metrics_utils as activities_metrics_utils
+
+import activity_streams.utils as activity_streams_utils
+
+import fit.decode_utils as fit_decode_utils
+
+from config import FIT_CHECK_CRC
 
 # Define a logger created on main.py
 logger = logging.getLogger("myLogger")
 
+# fitdecode CRC check modes by FIT_CHECK_CRC value
+FIT_CHECK_CRC_MODES = {
+    fit_decode_utils.CRC_CHECK_DISABLED: fitdecode.CrcCheck.DISABLED,
+    fit_decode_utils.CRC_CHECK_WARN: fitdecode.CrcCheck.WARN,
+    fit_decode_utils.CRC_CHECK_RAISE: fitdecode.CrcCheck.RAISE,
+}
+
+# Session summary values calculated from the records when the device didn't record them
+SESSION_METRICS = (
+    "avg_hr",
+    "max_hr",
+    "avg_cadence",
+    "max_cadence",
+    "avg_power",
+    "max_power",
+    "np",
+    "avg_speed",
+    "max_speed",
+    "ele_gain",
+    "ele_loss",
+)
+
 
 def create_activity_objects(sessions_records: dict, user_id: int, garmin_activity_id: int = None) -> list:
     try:
@@ -25,6 +55,11 @@ def create_activity_objects(sessions_records: dict, user_id: int, garmin_activit
             if session_record["activity_name"]:
                 activity_name = session_record["activity_name"]
 
+            # Fill the summary values missing from the session with the ones calculated from the records
+            fill_missing_session_metrics(
+                session_record["session"], session_record["records"]
+            )
+
             # Calculate elevation gain/loss, pace, average speed, and average power
             total_timer_time, pace = calculate_pace(
                 session_record["session"]["distance"],
@@ -53,9 +88,8 @@ def create_activity_objects(sessions_records: dict, user_id: int, garmin_activit
                     ),
                     total_elapsed_time=session_record["session"]["total_elapsed_time"],
                     total_timer_time=total_timer_time,
-                    city=session_record["session"]["city"],
-                    town=session_record["session"]["town"],
-                    country=session_record["session"]["country"],
+                    initial_latitude=session_record["session"]["initial_latitude"],
+                    initial_longitude=session_record["session"]["initial_longitude"],
                     elevation_gain=session_record["session"]["ele_gain"],
                     elevation_loss=session_record["session"]["ele_loss"],
                     pace=pace,
@@ -75,20 +109,20 @@ def create_activity_objects(sessions_records: dict, user_id: int, garmin_activit
                     strava_gear_id=None,
                     strava_activity_id=None,
                     garminconnect_activity_id=garmin_activity_id,
+                    fit_file_id_serial_number=session_record["file_id"][
+                        "serial_number"
+                    ],
+                    fit_file_id_time_created=session_record["file_id"][
+                        "time_created"
+                    ],
                 ),
+                "records": session_record["records"],
                 "is_elevation_set": session_record["is_elevation_set"],
-                "ele_waypoints": session_record["ele_waypoints"],
                 "is_power_set": session_record["is_power_set"],
-                "power_waypoints": session_record["power_waypoints"],
                 "is_heart_rate_set": session_record["is_heart_rate_set"],
-                "hr_waypoints": session_record["hr_waypoints"],
                 "is_velocity_set": session_record["is_velocity_set"],
-                "vel_waypoints": session_record["vel_waypoints"],
-                "pace_waypoints": session_record["pace_waypoints"],
                 "is_cadence_set": session_record["is_cadence_set"],
-                "cad_waypoints": session_record["cad_waypoints"],
                 "is_lat_lon_set": session_record["is_lat_lon_set"],
-                "lat_lon_waypoints": session_record["lat_lon_waypoints"],
             }
 
             activities.append(parsed_activity)
@@ -106,15 +140,33 @@ def create_activity_objects(sessions_records: dict, user_id: int, garmin_activit
         ) from err
 
 
+def fill_missing_session_metrics(session: dict, records: dict):
+    # Skip the calculation if the device recorded every summary value
+    if all(session[key] is not None for key in SESSION_METRICS):
+        return
+
+    # Calculate all the summary metrics from the session records in a single pass
+    metrics = activities_metrics_utils.calculate_activity_metrics(
+        records["time"],
+        hr=records["hr"],
+        cad=records["cad"],
+        power=records["power"],
+        vel=records["vel"],
+        ele=records["ele"],
+    )
+
+    for key in SESSION_METRICS:
+        if session[key] is None and metrics[key] is not None:
+            # Speeds are stored as decimals, every other value as an integer
+            session[key] = (
+                metrics[key] if key in ("avg_speed", "max_speed") else round(metrics[key])
+            )
+
+
 def split_records_by_activity(parsed_data: dict) -> dict:
     sessions = parsed_data["sessions"]
-    lat_lon_waypoints = parsed_data["lat_lon_waypoints"]
-    ele_waypoints = parsed_data.get("ele_waypoints", [])
-    hr_waypoints = parsed_data.get("hr_waypoints", [])
-    cad_waypoints = parsed_data.get("cad_waypoints", [])
-    power_waypoints = parsed_data.get("power_waypoints", [])
-    vel_waypoints = parsed_data.get("vel_waypoints", [])
-    pace_waypoints = parsed_data.get("pace_waypoints", [])
+    # Sort the records once so each session is a binary search plus a slice
+    records = activity_streams_utils.sort_records_by_time(parsed_data["records"])
 
     # Check for each auxiliary flag
     is_lat_lon_set = parsed_data.get("is_lat_lon_set", False)
@@ -124,24 +176,9 @@ def split_records_by_activity(parsed_data: dict) -> dict:
     is_power_set = parsed_data.get("is_power_set", False)
     is_velocity_set = parsed_data.get("is_velocity_set", False)
 
-    # Dictionary to hold split waypoints per activity
-    activity_waypoints = {
-        i: {
-            "lat_lon_waypoints": [] if is_lat_lon_set else None,
-            "ele_waypoints": [] if is_elevation_set else None,
-            "hr_waypoints": [] if is_heart_rate_set else None,
-            "cad_waypoints": [] if is_cadence_set else None,
-            "power_waypoints": [] if is_power_set else None,
-            "vel_waypoints": [] if is_velocity_set else None,
-            "pace_waypoints": [] if is_velocity_set else None,
-        }
-        for i in range(len(sessions))
-    }
-
     sessions_records = []
 
-    # Convert session times to datetime objects for easier comparison
-    for i, session in enumerate(sessions):
+    for session in sessions:
         # Use the time as is if it’s already a datetime object; otherwise, parse it
         start_time = session["first_waypoint_time"]
         if not isinstance(start_time, datetime):
@@ -155,284 +192,187 @@ def split_records_by_activity(parsed_data: dict) -> dict:
         start_time = start_time.replace(tzinfo=None)
         end_time = end_time.replace(tzinfo=None)
 
+        # Select the records inside the session time window
+        session_records = activity_streams_utils.slice_records_by_time(
+            records,
+            activity_streams_utils.datetime_to_epoch(start_time),
+            activity_streams_utils.datetime_to_epoch(end_time),
+        )
+
         # Initialize a parsed session dictionary
         parsed_session = {
             "session": session,
             "activity_name": parsed_data["activity_name"],
-            "lat_lon_waypoints": [],
+            "records": session_records,
             "is_lat_lon_set": False,
-            "ele_waypoints": [],
             "is_elevation_set": False,
-            "hr_waypoints": [],
             "is_heart_rate_set": False,
-            "cad_waypoints": [],
             "is_cadence_set": False,
-            "power_waypoints": [],
             "is_power_set": False,
-            "vel_waypoints": [],
-            "pace_waypoints": [],
             "is_velocity_set": False,
             "split_summary": parsed_data["split_summary"],
+            "file_id": parsed_data["file_id"],
         }
 
-        # Only parse arrays if the respective flag is set
-        if is_lat_lon_set:
-            activity_waypoints[i]["lat_lon_waypoints"] = [
-                wp
-                for wp in lat_lon_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["lat_lon_waypoints"]:
-                parsed_session["lat_lon_waypoints"] = activity_waypoints[i][
-                    "lat_lon_waypoints"
-                ]
-                parsed_session["is_lat_lon_set"] = True
-
-                # If initial latitude and longitude are not set, set them to the first waypoint's coordinates
-                if (
-                    parsed_session["session"]["initial_latitude"] is None
-                    or parsed_session["session"]["initial_longitude"] is None
-                ):
-                    # Set initial latitude and longitude to the first waypoint's coordinates
-                    parsed_session["session"]["initial_latitude"] = activity_waypoints[
-                        i
-                    ]["lat_lon_waypoints"][0]["lat"]
-                    parsed_session["session"]["initial_longitude"] = activity_waypoints[
-                        i
-                    ]["lat_lon_waypoints"][0]["lon"]
-
-                # Use geocoding API to get city, town, and country based on coordinates
-                location_data = activities_utils.location_based_on_coordinates(
-                    session["initial_latitude"], session["initial_longitude"]
-                )
-
-                # Extract city, town, and country from location data
-                if location_data:
-                    parsed_session["session"]["city"] = location_data["city"]
-                    parsed_session["session"]["town"] = location_data["town"]
-                    parsed_session["session"]["country"] = location_data["country"]
+        # Only check channels if the respective flag is set
+        if is_lat_lon_set and activity_streams_utils.is_channel_set(
+            session_records, "lat"
+        ):
+            parsed_session["is_lat_lon_set"] = True
+
+            # If initial latitude and longitude are not set, set them to the first waypoint's coordinates
+            if (
+                parsed_session["session"]["initial_latitude"] is None
+                or parsed_session["session"]["initial_longitude"] is None
+            ):
+                # Set initial latitude and longitude to the first waypoint's coordinates
+                (
+                    parsed_session["session"]["initial_latitude"],
+                    parsed_session["session"]["initial_longitude"],
+                ) = activity_streams_utils.first_lat_lon(session_records)
 
         if is_elevation_set:
-            activity_waypoints[i]["ele_waypoints"] = [
-                wp
-                for wp in ele_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["ele_waypoints"]:
-                parsed_session["ele_waypoints"] = activity_waypoints[i]["ele_waypoints"]
-                parsed_session["is_elevation_set"] = True
+            parsed_session["is_elevation_set"] = activity_streams_utils.is_channel_set(
+                session_records, "ele"
+            )
         if is_heart_rate_set:
-            activity_waypoints[i]["hr_waypoints"] = [
-                wp
-                for wp in hr_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["hr_waypoints"]:
-                parsed_session["hr_waypoints"] = activity_waypoints[i]["hr_waypoints"]
-                parsed_session["is_heart_rate_set"] = True
+            parsed_session["is_heart_rate_set"] = (
+                activity_streams_utils.is_channel_set(session_records, "hr")
+            )
         if is_cadence_set:
-            activity_waypoints[i]["cad_waypoints"] = [
-                wp
-                for wp in cad_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["cad_waypoints"]:
-                parsed_session["cad_waypoints"] = activity_waypoints[i]["cad_waypoints"]
-                parsed_session["is_cadence_set"] = True
+            parsed_session["is_cadence_set"] = activity_streams_utils.is_channel_set(
+                session_records, "cad"
+            )
         if is_power_set:
-            activity_waypoints[i]["power_waypoints"] = [
-                wp
-                for wp in power_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["power_waypoints"]:
-                parsed_session["power_waypoints"] = activity_waypoints[i][
-                    "power_waypoints"
-                ]
-                parsed_session["is_power_set"] = True
+            parsed_session["is_power_set"] = activity_streams_utils.is_channel_set(
+                session_records, "power"
+            )
         if is_velocity_set:
-            activity_waypoints[i]["vel_waypoints"] = [
-                wp
-                for wp in vel_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["vel_waypoints"]:
-                parsed_session["vel_waypoints"] = activity_waypoints[i]["vel_waypoints"]
-                parsed_session["is_velocity_set"] = True
-            activity_waypoints[i]["pace_waypoints"] = [
-                wp
-                for wp in pace_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["pace_waypoints"]:
-                parsed_session["pace_waypoints"] = activity_waypoints[i][
-                    "pace_waypoints"
-                ]
-                parsed_session["is_velocity_set"] = True
+            parsed_session["is_velocity_set"] = activity_streams_utils.is_channel_set(
+                session_records, "vel"
+            )
 
         # Append the parsed session to the sessions list
         sessions_records.append(parsed_session)
 
-    # Return dictionary with each activity's waypoints
+    # Return list with each activity's records
     return sessions_records
 
 
-def parse_fit_file(file: str) -> dict:
+def parse_fit_file(file: str | BinaryIO) -> dict:
+    try:
+        # Decode only the used messages with the fast path decoder
+        return parse_fit_file_fast(file)
+    except Exception as err:
+        # Log the exception and parse the file again with fitdecode
+        logger.warning(
+            f"Fast FIT decoder failed, parsing the file with fitdecode: {err}"
+        )
+
+    # Parse the file from the start
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+    return parse_fit_file_with_fitdecode(file)
+
+
+def parse_fit_file_fast(file: str | BinaryIO) -> dict:
+    # Initialize default values for various variables
+    sessions = []
+    activity_name = "Workout"
+    serial_number = None
+    time_created = None
+
+    # Columnar buffer to store record data
+    records = activity_streams_utils.RecordsBuffer()
+
+    # Array to store split summary info
+    split_summary = []
+
+    # Iterate over the used FIT messages, the other messages are skipped
+    for name, values in fit_decode_utils.iterate_fit_messages(
+        file, FIT_CHECK_CRC, logger
+    ):
+        if name == "record":
+            # Records are decoded to a tuple with the timestamp as an epoch
+            time, latitude, longitude, elevation, heart_rate, cadence, power = values
+
+            # Records without timestamp can't be placed in the streams
+            if time is None:
+                continue
+
+            # Only store coordinates if both are set, they are converted to degrees at the end
+            if latitude is None or longitude is None:
+                latitude, longitude = None, None
+
+            # Append record data to the columnar buffer
+            records.append(
+                time, latitude, longitude, elevation, heart_rate, cadence, power
+            )
+            continue
+
+        # The other messages are few, parse them like fitdecode frames
+        frame = dict(zip(fit_decode_utils.MESSAGE_FIELD_NAMES[name], values))
+
+        if name == "session":
+            # Append the session data to the sessions list
+            sessions.append(create_session_data(frame))
+        elif name == "workout":
+            # Extract activity name
+            activity_name = parse_frame_workout(frame)
+        elif name == "split_summary":
+            split_summary.append(create_split_summary_data(frame))
+        elif name == "file_id":
+            # Extract the device serial number and file creation time
+            serial_number, time_created = parse_frame_file_id(frame)
+
+    # Convert the coordinates of every record to degrees at once
+    records = records.to_records()
+    records["lat"] *= 180 / 2**31
+    records["lon"] *= 180 / 2**31
+
+    # Return parsed data as a dictionary
+    return create_parsed_data(
+        sessions, activity_name, records, split_summary, serial_number, time_created
+    )
+
+
+def parse_fit_file_with_fitdecode(file: str | BinaryIO) -> dict:
     try:
         # Initialize default values for various variables
         sessions = []
-        last_waypoint_time = None
         activity_name = "Workout"
+        serial_number = None
+        time_created = None
 
-        # Arrays to store waypoint data
-        lat_lon_waypoints = []
-        ele_waypoints = []
-        hr_waypoints = []
-        cad_waypoints = []
-        power_waypoints = []
-        vel_waypoints = []
-        pace_waypoints = []
+        # Columnar buffer to store record data
+        records = activity_streams_utils.RecordsBuffer()
 
         # Array to store split summary info
         split_summary = []
 
-        # Initialize variables to store previous latitude and longitude
-        prev_latitude, prev_longitude = None, None
-
-        # Initialize variables to store whether elevation, power, heart rate, cadence, and velocity are set
-        is_lat_lon_set = False
-        is_elevation_set = False
-        is_power_set = False
-        is_heart_rate_set = False
-        is_cadence_set = False
-        is_velocity_set = False
-
-        # Open the FIT file
-        with open(file, "rb") as fit_file:
-            fit_data = fitdecode.FitReader(fit_file)
+        # Read the FIT file, either from a path or from an open file
+        with fitdecode.FitReader(
+            file, check_crc=FIT_CHECK_CRC_MODES[FIT_CHECK_CRC]
+        ) as fit_data:
 
             # Iterate over FIT messages
             for frame in fit_data:
                 if isinstance(frame, fitdecode.FitDataMessage):
                     if frame.name == "session":
-                        # Initialize session data
-                        city, town, country = None, None, None
-
-                        # Extract session data
-                        (
-                            initial_latitude,
-                            initial_longitude,
-                            activity_type,
-                            first_waypoint_time,
-                            total_elapsed_time,
-                            total_timer_time,
-                            calories,
-                            distance,
-                            avg_hr,
-                            max_hr,
-                            avg_cadence,
-                            max_cadence,
-                            avg_power,
-                            max_power,
-                            ele_gain,
-                            ele_loss,
-                            np,
-                            avg_speed,
-                            max_speed,
-                            workout_feeling,
-                            workout_rpe,
-                        ) = parse_frame_session(frame)
-
-                        # If initial latitude and longitude are set, use them to get city, town, and country
-                        if (
-                            initial_latitude is not None
-                            and initial_longitude is not None
-                        ):
-                            # Use geocoding API to get city, town, and country based on coordinates
-                            location_data = (
-                                activities_utils.location_based_on_coordinates(
-                                    initial_latitude, initial_longitude
-                                )
-                            )
-
-                            # Extract city, town, and country from location data
-                            if location_data:
-                                city = location_data["city"]
-                                town = location_data["town"]
-                                country = location_data["country"]
-
-                            # Wait for 1 second (for geocoding API rate limiting)
-                            timelib.sleep(1)
-
-                        # Initialize the session dictionary with parsed data
-                        session_data = {
-                            "initial_latitude": initial_latitude,
-                            "initial_longitude": initial_longitude,
-                            "city": city,
-                            "town": town,
-                            "country": country,
-                            "activity_type": activity_type,
-                            "first_waypoint_time": first_waypoint_time,
-                            "last_waypoint_time": first_waypoint_time
-                            + timedelta(seconds=total_elapsed_time),
-                            "total_elapsed_time": total_elapsed_time,
-                            "total_timer_time": total_timer_time,
-                            "calories": calories,
-                            "distance": distance,
-                            "avg_hr": avg_hr,
-                            "max_hr": max_hr,
-                            "avg_cadence": avg_cadence,
-                            "max_cadence": max_cadence,
-                            "avg_power": avg_power,
-                            "max_power": max_power,
-                            "ele_gain": ele_gain,
-                            "ele_loss": ele_loss,
-                            "np": np,
-                            "avg_speed": avg_speed,
-                            "max_speed": max_speed,
-                            "workout_feeling": workout_feeling,
-                            "workout_rpe": workout_rpe,
-                        }
-
                         # Append the session data to the sessions list
-                        sessions.append(session_data)
+                        sessions.append(create_session_data(frame))
+
+                    # Extract the device serial number and file creation time
+                    if frame.name == "file_id":
+                        serial_number, time_created = parse_frame_file_id(frame)
 
                     # Extract activity name
                     if frame.name == "workout":
                         activity_name = parse_frame_workout(frame)
 
                     if frame.name == "split_summary" or frame.name == "unknown_313":
-                        split_summary_split_type, split_summary_total_timer_time = (
-                            parse_frame_split_summary(frame)
-                        )
-
-                        split_summary.append(
-                            {
-                                "split_type": split_summary_split_type,
-                                "total_timer_time": split_summary_total_timer_time,
-                            }
-                        )
+                        split_summary.append(create_split_summary_data(frame))
 
                     # Extract waypoint data
                     if frame.name == "record":
@@ -447,101 +387,34 @@ def parse_fit_file(file: str) -> dict:
                             power,
                         ) = parse_frame_record(frame)
 
-                        # Check elevation
-                        if elevation is not None:
-                            is_elevation_set = True
-
-                        # Check if heart rate, cadence, power are set
-                        if heart_rate is not None:
-                            is_heart_rate_set = True
-
-                        if cadence is not None:
-                            is_cadence_set = True
-
-                        if power is not None:
-                            is_power_set = True
-
-                        instant_speed = None
-                        # Calculate instant speed, pace, and update waypoint arrays
-                        if (
-                            latitude is not None
-                            and prev_latitude is not None
-                            and longitude is not None
-                            and prev_longitude is not None
-                        ):
-                            instant_speed = activities_utils.calculate_instant_speed(
-                                last_waypoint_time,
-                                time,
-                                latitude,
-                                longitude,
-                                prev_latitude,
-                                prev_longitude,
-                            )
-
-                        # Calculate instance pace
-                        instant_pace = None
-                        if instant_speed:
-                            instant_pace = 1 / instant_speed
-                            is_velocity_set = True
-
-                        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
-
-                        # Append waypoint data to respective arrays
-                        if latitude is not None and longitude is not None:
-                            lat_lon_waypoints.append(
-                                {
-                                    "time": timestamp,
-                                    "lat": latitude,
-                                    "lon": longitude,
-                                }
-                            )
-                            is_lat_lon_set = True
-
-                        activities_utils.append_if_not_none(
-                            ele_waypoints, timestamp, elevation, "ele"
-                        )
-                        activities_utils.append_if_not_none(
-                            hr_waypoints, timestamp, heart_rate, "hr"
-                        )
-                        activities_utils.append_if_not_none(
-                            cad_waypoints, timestamp, cadence, "cad"
-                        )
-                        activities_utils.append_if_not_none(
-                            power_waypoints, timestamp, power, "power"
-                        )
-                        activities_utils.append_if_not_none(
-                            vel_waypoints, timestamp, instant_speed, "vel"
-                        )
-                        activities_utils.append_if_not_none(
-                            pace_waypoints, timestamp, instant_pace, "pace"
-                        )
+                        # Records without timestamp can't be placed in the streams
+                        if time is None:
+                            continue
 
-                        # Update previous latitude, longitude, and last waypoint time
-                        prev_latitude, prev_longitude, last_waypoint_time = (
+                        if latitude is None or longitude is None:
+                            # Only store coordinates if both are set
+                            latitude, longitude = None, None
+
+                        # Append record data to the columnar buffer
+                        records.append(
+                            activity_streams_utils.datetime_to_epoch(time),
                             latitude,
                             longitude,
-                            time,
+                            elevation,
+                            heart_rate,
+                            cadence,
+                            power,
                         )
 
         # Return parsed data as a dictionary
-        return {
-            "sessions": sessions,
-            "activity_name": activity_name,
-            "is_elevation_set": is_elevation_set,
-            "ele_waypoints": ele_waypoints,
-            "is_power_set": is_power_set,
-            "power_waypoints": power_waypoints,
-            "is_heart_rate_set": is_heart_rate_set,
-            "hr_waypoints": hr_waypoints,
-            "is_velocity_set": is_velocity_set,
-            "vel_waypoints": vel_waypoints,
-            "pace_waypoints": pace_waypoints,
-            "is_cadence_set": is_cadence_set,
-            "cad_waypoints": cad_waypoints,
-            "is_lat_lon_set": is_lat_lon_set,
-            "lat_lon_waypoints": lat_lon_waypoints,
-            "split_summary": split_summary,
-        }
+        return create_parsed_data(
+            sessions,
+            activity_name,
+            records.to_records(),
+            split_summary,
+            serial_number,
+            time_created,
+        )
     except HTTPException as http_err:
         raise http_err
     except Exception as err:
@@ -554,6 +427,134 @@ def parse_fit_file(file: str) -> dict:
         ) from err
 
 
+def create_parsed_data(
+    sessions: list,
+    activity_name: str,
+    records: dict,
+    split_summary: list,
+    serial_number,
+    time_created,
+) -> dict:
+    # Calculate the instant speed for every record in a single pass
+    records["vel"] = activities_distance_utils.calculate_track_distances(
+        records["time"], records["lat"], records["lon"]
+    )["instant_speeds"]
+
+    # Return parsed data as a dictionary, channels are set if at least one record has a value
+    return {
+        "sessions": sessions,
+        "activity_name": activity_name,
+        "records": records,
+        "is_elevation_set": activity_streams_utils.is_channel_set(records, "ele"),
+        "is_power_set": activity_streams_utils.is_channel_set(records, "power"),
+        "is_heart_rate_set": activity_streams_utils.is_channel_set(records, "hr"),
+        # Velocity is set if there is at least one positive instant speed
+        "is_velocity_set": bool((records["vel"] > 0).any()),
+        "is_cadence_set": activity_streams_utils.is_channel_set(records, "cad"),
+        "is_lat_lon_set": activity_streams_utils.is_channel_set(records, "lat"),
+        "split_summary": split_summary,
+        "file_id": {
+            "serial_number": serial_number,
+            "time_created": time_created,
+        },
+    }
+
+
+def create_session_data(frame) -> dict:
+    # Extract session data
+    (
+        initial_latitude,
+        initial_longitude,
+        activity_type,
+        first_waypoint_time,
+        total_elapsed_time,
+        total_timer_time,
+        calories,
+        distance,
+        avg_hr,
+        max_hr,
+        avg_cadence,
+        max_cadence,
+        avg_power,
+        max_power,
+        ele_gain,
+        ele_loss,
+        np,
+        avg_speed,
+        max_speed,
+        workout_feeling,
+        workout_rpe,
+    ) = parse_frame_session(frame)
+
+    # Return the session dictionary with parsed data
+    return {
+        "initial_latitude": initial_latitude,
+        "initial_longitude": initial_longitude,
+        "activity_type": activity_type,
+        "first_waypoint_time": first_waypoint_time,
+        "last_waypoint_time": first_waypoint_time
+        + timedelta(seconds=total_elapsed_time),
+        "total_elapsed_time": total_elapsed_time,
+        "total_timer_time": total_timer_time,
+        "calories": calories,
+        "distance": distance,
+        "avg_hr": avg_hr,
+        "max_hr": max_hr,
+        "avg_cadence": avg_cadence,
+        "max_cadence": max_cadence,
+        "avg_power": avg_power,
+        "max_power": max_power,
+        "ele_gain": ele_gain,
+        "ele_loss": ele_loss,
+        "np": np,
+        "avg_speed": avg_speed,
+        "max_speed": max_speed,
+        "workout_feeling": workout_feeling,
+        "workout_rpe": workout_rpe,
+    }
+
+
+def create_split_summary_data(frame) -> dict:
+    split_summary_split_type, split_summary_total_timer_time = (
+        parse_frame_split_summary(frame)
+    )
+
+    # Return the split summary dictionary with parsed data
+    return {
+        "split_type": split_summary_split_type,
+        "total_timer_time": split_summary_total_timer_time,
+    }
+
+
+def read_fit_file_id(file: str | BinaryIO) -> tuple:
+    try:
+        # The file_id message is the first data message of a FIT file
+        for name, values in fit_decode_utils.iterate_fit_messages(file):
+            if name == "file_id":
+                return parse_frame_file_id(
+                    dict(zip(fit_decode_utils.MESSAGE_FIELD_NAMES[name], values))
+                )
+            break
+
+        # Return None if the file has no file_id message
+        return None, None
+    except Exception as err:
+        # Log the exception, the file is still parsed and checked by the hash
+        logger.warning(f"Error in read_fit_file_id: {err}")
+        return None, None
+
+
+def parse_frame_file_id(frame):
+    # Extracting the device serial number and the file creation time
+    serial_number = get_value_from_frame(frame, "serial_number")
+    time_created = get_value_from_frame(frame, "time_created")
+    if time_created:
+        time_created = time_created.replace(tzinfo=None)
+
+    # Return the extracted values
+    return serial_number, time_created
+
+
 def parse_frame_session(frame):
     # Extracting coordinates
     initial_latitude = get_value_from_frame(frame, "start_position_lat")
@@ -589,10 +590,15 @@ def parse_frame_session(frame):
     np = get_value_from_frame(frame, "normalized_power")
     avg_speed = get_value_from_frame(frame, "enhanced_avg_speed")
     max_speed = get_value_from_frame(frame, "enhanced_max_speed")
-    # Feeling after workout 0 to 100
+    # Feeling after workout 0 to 100, fitdecode profiles without the field name
+    # only know it by its field number
     workout_feeling = get_value_from_frame(frame, "workout_feeling")
+    if workout_feeling is None:
+        workout_feeling = get_value_from_frame(frame, 192)
     # RPE (Rate of Perceived Exertion) scale from 10 to 100
     workout_rpe = get_value_from_frame(frame, "workout_rpe")
+    if workout_rpe is None:
+        workout_rpe = get_value_from_frame(frame, 193)
 
     initial_latitude, initial_longitude = convert_coordinates_to_degrees(
         initial_latitude, initial_longitude
@@ -705,7 +711,8 @@ def parse_frame_split_summary(frame):
 
 def get_value_from_frame(frame, key, default=None):
     try:
-        value = frame.get_value(key)
+        # Frames from the fast path decoder are dictionaries
+        value = frame[key] if isinstance(frame, dict) else frame.get_value(key)
         return value if value else default
     except KeyError:
         return default
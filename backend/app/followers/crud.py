@@ -1,6 +1,7 @@
 import logging
 
 from fastapi import HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 import models
@@ -34,6 +35,26 @@ def get_all_followers_by_user_id(user_id: int, db: Session):
         ) from err
 
 
+def get_all_followers_number_by_user_id(user_id: int, db: Session) -> int:
+    try:
+        # Count the followers by user ID in the database
+        return (
+            db.query(func.count(models.Follower.follower_id))
+            .filter(models.Follower.follower_id == user_id)
+            .scalar()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_all_followers_number_by_user_id: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_accepted_followers_by_user_id(user_id: int, db: Session):
     try:
         # Get the followers by user ID from the database
@@ -64,6 +85,29 @@ def get_accepted_followers_by_user_id(user_id: int, db: Session):
         ) from err
 
 
+def get_accepted_followers_number_by_user_id(user_id: int, db: Session) -> int:
+    try:
+        # Count the accepted followers by user ID in the database
+        return (
+            db.query(func.count(models.Follower.follower_id))
+            .filter(
+                (models.Follower.follower_id == user_id)
+                & (models.Follower.is_accepted)
+            )
+            .scalar()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_accepted_followers_number_by_user_id: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_all_following_by_user_id(user_id: int, db: Session):
     try:
         # Get the followers by user ID from the database
@@ -89,6 +133,26 @@ def get_all_following_by_user_id(user_id: int, db: Session):
         ) from err
 
 
+def get_all_following_number_by_user_id(user_id: int, db: Session) -> int:
+    try:
+        # Count the followings by user ID in the database
+        return (
+            db.query(func.count(models.Follower.follower_id))
+            .filter(models.Follower.following_id == user_id)
+            .scalar()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_all_following_number_by_user_id: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_accepted_following_by_user_id(user_id: int, db: Session):
     try:
         # Get the followers by user ID from the database
@@ -119,6 +183,29 @@ def get_accepted_following_by_user_id(user_id: int, db: Session):
         ) from err
 
 
+def get_accepted_following_number_by_user_id(user_id: int, db: Session) -> int:
+    try:
+        # Count the accepted followings by user ID in the database
+        return (
+            db.query(func.count(models.Follower.follower_id))
+            .filter(
+                (models.Follower.following_id == user_id)
+                & (models.Follower.is_accepted)
+            )
+            .scalar()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(
+            f"Error in get_accepted_following_number_by_user_id: {err}", exc_info=True
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_follower_for_user_id_and_target_user_id(
     user_id: int, target_user_id: int, db: Session
 ):
@@ -25,7 +25,7 @@ logger = logging.getLogger("myLogger")
     "/user/{user_id}/followers/all",
     response_model=list[followers_schema.Follower] | None,
 )
-async def get_user_follower_all(
+def get_user_follower_all(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -44,7 +44,7 @@ async def get_user_follower_all(
     "/user/{user_id}/followers/count/all",
     response_model=int,
 )
-async def get_user_follower_count_all(
+def get_user_follower_count_all(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -55,22 +55,15 @@ async def get_user_follower_count_all(
         Depends(database.get_db),
     ],
 ):
-    # Return followers
-    followers = followers_crud.get_all_followers_by_user_id(user_id, db)
-
-    # Check if followers is None and return 0 if it is
-    if followers is None:
-        return 0
-
     # Return the number of followers
-    return len(followers)
+    return followers_crud.get_all_followers_number_by_user_id(user_id, db)
 
 
 @router.get(
     "/user/{user_id}/followers/count/accepted",
     response_model=int,
 )
-async def get_user_follower_count(
+def get_user_follower_count(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -81,22 +74,15 @@ async def get_user_follower_count(
         Depends(database.get_db),
     ],
 ):
-    # Return followers
-    followers = followers_crud.get_accepted_followers_by_user_id(user_id, db)
-
-    # Check if followers is None and return 0 if it is
-    if followers is None:
-        return 0
-
-    # Return the number of followers
-    return len(followers)
+    # Return the number of accepted followers
+    return followers_crud.get_accepted_followers_number_by_user_id(user_id, db)
 
 
 @router.get(
     "/user/{user_id}/following/all",
     response_model=list[followers_schema.Follower] | None,
 )
-async def get_user_following_all(
+def get_user_following_all(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -115,7 +101,7 @@ async def get_user_following_all(
     "/user/{user_id}/following/count/all",
     response_model=int,
 )
-async def get_user_following_count_all(
+def get_user_following_count_all(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -126,22 +112,15 @@ async def get_user_following_count_all(
         Depends(database.get_db),
     ],
 ):
-    # Return followings
-    followings = followers_crud.get_all_following_by_user_id(user_id, db)
-
-    # Check if followings is None and return 0 if it is
-    if followings is None:
-        return 0
-
     # Return the number of followings
-    return len(followings)
+    return followers_crud.get_all_following_number_by_user_id(user_id, db)
 
 
 @router.get(
     "/user/{user_id}/following/count/accepted",
     response_model=int,
 )
-async def get_user_following_count(
+def get_user_following_count(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -152,22 +131,15 @@ async def get_user_following_count(
         Depends(database.get_db),
     ],
 ):
-    # Return followings
-    followings = followers_crud.get_accepted_following_by_user_id(user_id, db)
-
-    # Check if followings is None and return 0 if it is
-    if followings is None:
-        return 0
-
-    # Return the number of followings
-    return len(followings)
+    # Return the number of accepted followings
+    return followers_crud.get_accepted_following_number_by_user_id(user_id, db)
 
 
 @router.get(
     "/user/{user_id}/targetUser/{target_user_id}",
     response_model=followers_schema.Follower | None,
 )
-async def read_followers_user_specific_user(
+def read_followers_user_specific_user(
     user_id: int,
     validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     target_user_id: int,
@@ -193,7 +165,7 @@ async def read_followers_user_specific_user(
     status_code=201,
     response_model=followers_schema.Follower,
 )
-async def create_follow(
+def create_follow(
     # user_id: int,
     # validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     target_user_id: int,
@@ -219,7 +191,7 @@ async def create_follow(
 @router.put(
     "/accept/targetUser/{target_user_id}",
 )
-async def accept_follow(
+def accept_follow(
     # user_id: int,
     # validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     target_user_id: int,
@@ -248,7 +220,7 @@ async def accept_follow(
 @router.delete(
     "/delete/follower/targetUser/{target_user_id}",
 )
-async def delete_follower(
+def delete_follower(
     # user_id: int,
     # validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     target_user_id: int,
@@ -277,7 +249,7 @@ async def delete_follower(
 @router.delete(
     "/delete/following/targetUser/{target_user_id}",
 )
-async def delete_following(
+def delete_following(
     # user_id: int,
     # validate_user_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     target_user_id: int,
@@ -22,7 +22,7 @@ logger = logging.getLogger("myLogger")
 @router.put(
     "/link",
 )
-async def garminconnect_link(
+def garminconnect_link(
     garmin_user: garmin_schema.GarminLogin,
     validate_access_token: Annotated[
         Callable,
@@ -51,7 +51,7 @@ async def garminconnect_link(
     "/activities/days/{days}",
     status_code=202,
 )
-async def garminconnect_retrieve_activities_days(
+def garminconnect_retrieve_activities_days(
     days: int,
     validate_access_token: Annotated[
         Callable,
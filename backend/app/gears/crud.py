@@ -1,11 +1,13 @@
 import logging
 
 from fastapi import HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from urllib.parse import unquote
 
 import models
+import pagination_utils
 
 import gears.schema as gears_schema
 import gears.utils as gears_utils
@@ -71,6 +73,48 @@ def get_gear_users_with_pagination(
         ) from err
 
 
+def get_gear_users_with_cursor(
+    user_id: int, db: Session, cursor: str | None = None, num_records: int = 5
+) -> dict:
+    # Decode the cursor before querying, an invalid cursor is a client error
+    values = pagination_utils.decode_cursor(cursor, [str, int]) if cursor else None
+
+    try:
+        # Get the gear by user ID from the database after the cursor
+        query = db.query(models.Gear).filter(models.Gear.user_id == user_id)
+        if values:
+            query = query.filter(
+                pagination_utils.keyset_condition(
+                    [models.Gear.nickname, models.Gear.id], values, descending=False
+                )
+            )
+        gear = (
+            query.order_by(models.Gear.nickname.asc(), models.Gear.id.asc())
+            .limit(num_records + 1)
+            .all()
+        )
+
+        # Build the page before the dates are formatted
+        page = pagination_utils.cursor_page(
+            gear, num_records, lambda g: [g.nickname, g.id]
+        )
+
+        # Format the created_at date
+        for g in page["records"]:
+            g.created_at = g.created_at.strftime("%Y-%m-%d %H:%M:%S")
+
+        # Return the page of gear
+        return page
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_gear_users_with_cursor: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_gear_user(user_id: int, db: Session) -> list[gears_schema.Gear] | None:
     try:
         # Get the gear by user ID from the database
@@ -96,6 +140,24 @@ def get_gear_user(user_id: int, db: Session) -> list[gears_schema.Gear] | None:
         ) from err
 
 
+def get_gear_user_number(user_id: int, db: Session) -> int:
+    try:
+        # Count the gear by user ID in the database
+        return (
+            db.query(func.count(models.Gear.id))
+            .filter(models.Gear.user_id == user_id)
+            .scalar()
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_gear_user_number: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_gear_user_by_nickname(
     user_id: int, nickname: str, db: Session
 ) -> list[gears_schema.Gear] | None:
@@ -12,6 +12,8 @@ import gears.crud as gears_crud
 import gears.dependencies as gears_dependencies
 
 import database
+import dependencies_global
+import pagination_utils
 
 # Define the API router
 router = APIRouter()
@@ -24,7 +26,7 @@ logger = logging.getLogger("myLogger")
     "/id/{gear_id}",
     response_model=gears_schema.Gear | None,
 )
-async def read_gear_id(
+def read_gear_id(
     gear_id: int,
     validate_gear_id: Annotated[Callable, Depends(gears_dependencies.validate_gear_id)],
     check_scopes: Annotated[
@@ -40,7 +42,7 @@ async def read_gear_id(
     "/page_number/{page_number}/num_records/{num_records}",
     response_model=list[gears_schema.Gear] | None,
 )
-async def read_gear_user_pagination(
+def read_gear_user_pagination(
     page_number: int,
     num_records: int,
     check_scopes: Annotated[
@@ -61,10 +63,14 @@ async def read_gear_user_pagination(
 
 
 @router.get(
-    "/number",
-    response_model=int,
+    "/cursor/num_records/{num_records}",
+    response_model=pagination_utils.CursorPage[gears_schema.Gear],
 )
-async def read_gear_user_number(
+def read_gear_user_cursor(
+    num_records: int,
+    validate_pagination_values: Annotated[
+        Callable, Depends(dependencies_global.validate_cursor_pagination_values)
+    ],
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["gears:read"])
     ],
@@ -75,23 +81,39 @@ async def read_gear_user_number(
         Session,
         Depends(database.get_db),
     ],
+    cursor: str | None = None,
 ):
-    # Get the gear
-    gear = gears_crud.get_gear_user(token_user_id, db)
+    # Return the page of gear after the cursor
+    return gears_crud.get_gear_users_with_cursor(
+        token_user_id, db, cursor, num_records
+    )
 
-    # Check if gear is None and return 0 if it is
-    if gear is None:
-        return 0
 
+@router.get(
+    "/number",
+    response_model=int,
+)
+def read_gear_user_number(
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["gears:read"])
+    ],
+    token_user_id: Annotated[
+        int, Depends(session_security.get_user_id_from_access_token)
+    ],
+    db: Annotated[
+        Session,
+        Depends(database.get_db),
+    ],
+):
     # Return the number of gears
-    return len(gear)
+    return gears_crud.get_gear_user_number(token_user_id, db)
 
 
 @router.get(
     "/nickname/{nickname}",
     response_model=list[gears_schema.Gear] | None,
 )
-async def read_gear_user_by_nickname(
+def read_gear_user_by_nickname(
     nickname: str,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["gears:read"])
@@ -112,7 +134,7 @@ async def read_gear_user_by_nickname(
     "/type/{gear_type}",
     response_model=list[gears_schema.Gear] | None,
 )
-async def read_gear_user_by_type(
+def read_gear_user_by_type(
     gear_type: int,
     validate_type: Annotated[Callable, Depends(gears_dependencies.validate_gear_type)],
     check_scopes: Annotated[
@@ -134,7 +156,7 @@ async def read_gear_user_by_type(
     "/create",
     status_code=201,
 )
-async def create_gear(
+def create_gear(
     gear: gears_schema.Gear,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["gears:write"])
@@ -155,7 +177,7 @@ async def create_gear(
 
 
 @router.put("/{gear_id}/edit")
-async def edit_gear(
+def edit_gear(
     gear_id: int,
     validate_id: Annotated[Callable, Depends(gears_dependencies.validate_gear_id)],
     gear: gears_schema.Gear,
@@ -194,7 +216,7 @@ async def edit_gear(
 
 
 @router.delete("/{gear_id}/delete")
-async def delete_gear(
+def delete_gear(
     gear_id: int,
     validate_id: Annotated[Callable, Depends(gears_dependencies.validate_gear_id)],
     check_scopes: Annotated[
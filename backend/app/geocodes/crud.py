@@ -0,0 +1,72 @@
+import logging
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+
+import models
+
+# Define a loggger created on main.py
+logger = logging.getLogger("myLogger")
+
+
+def get_geocode_by_cell(latitude_cell: int, longitude_cell: int, db: Session):
+    try:
+        # Get the cached geocode for the grid cell from the database
+        geocode = (
+            db.query(models.GeocodeCache)
+            .filter(
+                models.GeocodeCache.latitude_cell == latitude_cell,
+                models.GeocodeCache.longitude_cell == longitude_cell,
+            )
+            .first()
+        )
+
+        # Check if geocode is None and return None if it is
+        if geocode is None:
+            return None
+
+        # Return the geocode
+        return geocode
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_geocode_by_cell: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def create_geocode(
+    latitude_cell: int, longitude_cell: int, location: dict, db: Session
+):
+    try:
+        # Create a new geocode cache entry
+        db_geocode = models.GeocodeCache(
+            latitude_cell=latitude_cell,
+            longitude_cell=longitude_cell,
+            city=location["city"],
+            town=location["town"],
+            country=location["country"],
+            created_at=func.now(),
+        )
+
+        # Add the geocode to the database
+        db.add(db_geocode)
+        db.commit()
+    except IntegrityError:
+        # The cell was cached by another worker in the meantime
+        db.rollback()
+    except Exception as err:
+        # Rollback the transaction
+        db.rollback()
+
+        # Log the exception
+        logger.error(f"Error in create_geocode: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
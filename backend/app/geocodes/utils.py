@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+import time
+import requests
+
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import geocodes.crud as geocodes_crud
+
+from config import GEOCODES_MAPS_API_RATE_LIMIT
+from database import SessionLocal
+
+# Define a loggger created on main.py
+logger = logging.getLogger("myLogger")
+
+# Size of the grid cells in degrees (0.01 degrees is about 1.1 km of latitude)
+GEOCODE_CELL_SCALE = 100
+
+# Maximum number of grid cells kept in memory
+GEOCODE_MEMORY_CACHE_SIZE = 1024
+
+
+class GeocodeRequestError(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1):
+        # Tokens added per second and maximum number of tokens
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate: float):
+        with self.lock:
+            self.rate = rate
+
+    def acquire(self):
+        with self.lock:
+            # Refill the bucket based on the time passed since the last refill
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.last_refill) * self.rate
+            )
+            self.last_refill = now
+
+            # Reserve a token, callers wait in order if the bucket is empty
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+# Rate limiter shared by every remote geocoding request of this process
+rate_limiter = TokenBucket(GEOCODES_MAPS_API_RATE_LIMIT)
+
+# In memory LRU cache of grid cells, backed by the geocodes_cache table
+memory_cache: OrderedDict[tuple[int, int], dict] = OrderedDict()
+memory_cache_lock = threading.Lock()
+
+
+def coordinates_to_cell(latitude: float, longitude: float) -> tuple[int, int]:
+    # Round the coordinates to the grid cell they belong to
+    return (
+        round(latitude * GEOCODE_CELL_SCALE),
+        round(longitude * GEOCODE_CELL_SCALE),
+    )
+
+
+def get_memory_cached_location(cell: tuple[int, int]) -> dict | None:
+    with memory_cache_lock:
+        location = memory_cache.get(cell)
+
+        # Mark the cell as recently used
+        if location is not None:
+            memory_cache.move_to_end(cell)
+
+        return location
+
+
+def set_memory_cached_location(cell: tuple[int, int], location: dict):
+    with memory_cache_lock:
+        memory_cache[cell] = location
+        memory_cache.move_to_end(cell)
+
+        # Evict the least recently used cells
+        while len(memory_cache) > GEOCODE_MEMORY_CACHE_SIZE:
+            memory_cache.popitem(last=False)
+
+
+def location_based_on_coordinates(latitude, longitude) -> dict | None:
+    if latitude is None or longitude is None:
+        return None
+
+    if os.environ.get("GEOCODES_MAPS_API") == "changeme":
+        return None
+
+    cell = coordinates_to_cell(latitude, longitude)
+
+    # Check the in memory cache first
+    location = get_memory_cached_location(cell)
+    if location is not None:
+        return location
+
+    # Create a new database session
+    db = SessionLocal()
+
+    try:
+        # Check the database cache
+        geocode = geocodes_crud.get_geocode_by_cell(cell[0], cell[1], db)
+
+        if geocode is not None:
+            location = {
+                "city": geocode.city,
+                "town": geocode.town,
+                "country": geocode.country,
+            }
+        else:
+            # Get the location from the geocode maps API and store it in the database cache
+            location = request_location(latitude, longitude)
+            geocodes_crud.create_geocode(cell[0], cell[1], location, db)
+    finally:
+        # Ensure the session is closed after use
+        db.close()
+
+    # Store the location in the in memory cache and return it
+    set_memory_cached_location(cell, location)
+    return location
+
+
+def request_location(latitude, longitude) -> dict:
+    # Create a dictionary with the parameters for the request
+    url_params = {
+        "lat": latitude,
+        "lon": longitude,
+        "api_key": os.environ.get("GEOCODES_MAPS_API"),
+    }
+
+    # Create the URL for the request
+    url = f"https://geocode.maps.co/reverse?{urlencode(url_params)}"
+
+    # Wait for the rate limiter before making the request
+    rate_limiter.acquire()
+
+    try:
+        # Make the request and get the response
+        response = requests.get(url)
+        response.raise_for_status()
+
+        # Get the data from the response
+        data = response.json().get("address", {})
+
+        # Return the data
+        return {
+            "city": data.get("city"),
+            "town": data.get("town"),
+            "country": data.get("country"),
+        }
+    except requests.exceptions.RequestException as err:
+        # Log the error
+        logger.error(f"Error in request_location - {str(err)}")
+        raise GeocodeRequestError(
+            f"Error in location_based_on_coordinates: {str(err)}"
+        ) from err
@@ -0,0 +1,161 @@
+import argparse
+import math
+import os
+import tempfile
+import time
+
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import gpxpy
+
+import gpx.utils as gpx_utils
+
+# Compare the iterparse GPX parser with the gpxpy tree parser it replaced:
+#   cd backend/app && python -m gpx.benchmark
+#   cd backend/app && python -m gpx.benchmark files/processed/*.gpx
+# Without files a synthetic track is generated, 100k points by default.
+
+
+def write_gpx_track(file_path: str, points: int):
+    # 1 Hz track with elevation, heart rate, cadence and power on every point
+    start_time = datetime(2024, 1, 1, 8, 0, 0, tzinfo=timezone.utc)
+    with open(file_path, "w") as gpx_file:
+        gpx_file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gpx version="1.1" creator="benchmark"'
+            ' xmlns="http://www.topografix.com/GPX/1/1"'
+            ' xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">\n'
+            "<trk><name>Benchmark ride</name><type>cycling</type><trkseg>\n"
+        )
+        for index in range(points):
+            latitude = 45 + index * 0.00005 + 0.0001 * math.sin(index / 50)
+            longitude = 7 + index * 0.00004 + 0.0001 * math.cos(index / 70)
+            point_time = start_time + timedelta(seconds=index)
+            gpx_file.write(
+                f'<trkpt lat="{latitude:.7f}" lon="{longitude:.7f}">'
+                f"<ele>{300 + 50 * math.sin(index / 500):.1f}</ele>"
+                f"<time>{point_time.strftime('%Y-%m-%dT%H:%M:%SZ')}</time>"
+                f"<extensions><power>{200 + index % 60}</power>"
+                "<gpxtpx:TrackPointExtension>"
+                f"<gpxtpx:hr>{120 + index % 40}</gpxtpx:hr>"
+                f"<gpxtpx:cad>{80 + index % 10}</gpxtpx:cad>"
+                "</gpxtpx:TrackPointExtension></extensions></trkpt>\n"
+            )
+        gpx_file.write("</trkseg></trk></gpx>\n")
+
+
+def iterate_gpx_track_points_with_gpxpy(file: str):
+    # Track points read from the gpxpy object tree, as parse_gpx_file did before
+    with open(file, "r") as gpx_file:
+        gpx = gpxpy.parse(gpx_file)
+
+    for track in gpx.tracks:
+        for segment in track.segments:
+            for point in segment.points:
+                # Heart rate, cadence, and power default to 0 when not present
+                heart_rate, cadence, power = 0, 0, 0
+
+                for extension in point.extensions:
+                    if extension.tag.endswith("TrackPointExtension"):
+                        hr_element = extension.find(
+                            f".//{gpx_utils.TRACK_POINT_EXTENSION_HR}"
+                        )
+                        if hr_element is not None:
+                            heart_rate = hr_element.text
+                        cad_element = extension.find(
+                            f".//{gpx_utils.TRACK_POINT_EXTENSION_CAD}"
+                        )
+                        if cad_element is not None:
+                            cadence = cad_element.text
+                    elif extension.tag.endswith("power"):
+                        power = extension.text
+
+                yield (
+                    track.name,
+                    track.type,
+                    point.latitude,
+                    point.longitude,
+                    point.elevation,
+                    point.time,
+                    heart_rate,
+                    cadence,
+                    power,
+                )
+
+
+def parse_gpx_file_with_gpxpy(file: str, user_id: int) -> dict:
+    # Same parse_gpx_file, only the track points come from the gpxpy object tree
+    with mock.patch.object(
+        gpx_utils, "iterate_gpx_track_points", iterate_gpx_track_points_with_gpxpy
+    ):
+        return gpx_utils.parse_gpx_file(file, user_id)
+
+
+def time_parser(parser, file_path: str, repeat: int) -> tuple:
+    # Keep the best time of all the runs
+    best_time = None
+    parsed_data = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        parsed_data = parser(file_path, 1)
+        elapsed_time = time.perf_counter() - start_time
+        if best_time is None or elapsed_time < best_time:
+            best_time = elapsed_time
+
+    return best_time, parsed_data
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the iterparse GPX parser against the gpxpy tree parser"
+    )
+    parser.add_argument(
+        "files", nargs="*", help="GPX files to parse, a synthetic track if none"
+    )
+    parser.add_argument(
+        "--points",
+        type=int,
+        default=100000,
+        help="Number of points of the synthetic track",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of runs per file and parser"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = args.files
+        if not files:
+            files = [os.path.join(temp_dir, f"synthetic_{args.points}.gpx")]
+            write_gpx_track(files[0], args.points)
+
+        total_gpxpy_time = total_iterparse_time = 0.0
+        for file_path in files:
+            gpxpy_time, gpxpy_data = time_parser(
+                parse_gpx_file_with_gpxpy, file_path, args.repeat
+            )
+            iterparse_time, iterparse_data = time_parser(
+                gpx_utils.parse_gpx_file, file_path, args.repeat
+            )
+            total_gpxpy_time += gpxpy_time
+            total_iterparse_time += iterparse_time
+
+            print(
+                f"{file_path}: {len(iterparse_data['lat_lon_waypoints'])} points, "
+                f"gpxpy {gpxpy_time * 1000:.1f} ms, "
+                f"iterparse {iterparse_time * 1000:.1f} ms, "
+                f"{gpxpy_time / iterparse_time:.1f}x faster, "
+                f"{'same' if iterparse_data == gpxpy_data else 'DIFFERENT'} data"
+            )
+
+    if len(files) > 1:
+        print(
+            f"Total: gpxpy {total_gpxpy_time * 1000:.1f} ms, "
+            f"iterparse {total_iterparse_time * 1000:.1f} ms, "
+            f"{total_gpxpy_time / total_iterparse_time:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
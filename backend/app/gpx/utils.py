@@ -1,19 +1,33 @@
-import gpxpy
-import gpxpy.gpx
 import logging
-from geopy.distance import geodesic
+import numpy as np
+
+from datetime import datetime
+from typing import BinaryIO
+from xml.etree.ElementTree import iterparse
 
 from fastapi import HTTPException, status
 
 import activities.utils as activities_utils
 import activities.schema as activities_schema
+import activities.distance_utils as activities_distance_utils
+import activities.metrics_utils as activities_metrics_utils
+
+import activity_streams.utils as activity_streams_utils
 
 
 # Define a loggger created on main.py
 logger = logging.getLogger("myLogger")
 
+# Garmin TrackPointExtension elements
+TRACK_POINT_EXTENSION_HR = (
+    "{http://www.garmin.com/xmlschemas/TrackPointExtension/v1}hr"
+)
+TRACK_POINT_EXTENSION_CAD = (
+    "{http://www.garmin.com/xmlschemas/TrackPointExtension/v1}cad"
+)
+
 
-def parse_gpx_file(file: str, user_id: int) -> dict:
+def parse_gpx_file(file: str | BinaryIO, user_id: int) -> dict:
     try:
         # Initialize default values for various variables
         activity_type = "Workout"
@@ -29,15 +43,13 @@ def parse_gpx_file(file: str, user_id: int) -> dict:
         max_power = None
         ele_gain = None
         ele_loss = None
-        np = None
+        normalized_power = None
         avg_speed = None
         max_speed = None
         activity_name = "Workout"
-        process_one_time_fields = 0
 
-        city = None
-        town = None
-        country = None
+        initial_latitude = None
+        initial_longitude = None
         pace = 0
         visibility = 0
 
@@ -47,11 +59,16 @@ def parse_gpx_file(file: str, user_id: int) -> dict:
         hr_waypoints = []
         cad_waypoints = []
         power_waypoints = []
-        vel_waypoints = []
-        pace_waypoints = []
 
-        # Initialize variables to store previous latitude and longitude
-        prev_latitude, prev_longitude = None, None
+        # Arrays to store the values used to calculate distance, speed and the summary metrics
+        timestamps = []
+        epochs = []
+        latitudes = []
+        longitudes = []
+        elevations = []
+        heart_rates = []
+        cadences = []
+        powers = []
 
         # Initialize variables to store whether elevation, power, heart rate, cadence, and velocity are set
         is_lat_lon_set = False
@@ -59,184 +76,144 @@ def parse_gpx_file(file: str, user_id: int) -> dict:
         is_power_set = False
         is_heart_rate_set = False
         is_cadence_set = False
-        is_velocity_set = False
-
-        # Parse the GPX file
-        with open(file, "r") as gpx_file:
-            gpx = gpxpy.parse(gpx_file)
-
-            # Iterate over tracks in the GPX file
-            for track in gpx.tracks:
-                # Set activity name and type if available
-                activity_name = track.name if track.name else "Workout"
-                activity_type = track.type if track.type else "Workout"
-
-                # Iterate over segments in each track
-                for segment in track.segments:
-                    # Iterate over points in each segment
-                    for point in segment.points:
-                        # Extract latitude and longitude from the point
-                        latitude, longitude = point.latitude, point.longitude
-
-                        # Calculate distance between waypoints
-                        if prev_latitude is not None and prev_longitude is not None:
-                            distance += geodesic(
-                                (prev_latitude, prev_longitude), (latitude, longitude)
-                            ).meters
-
-                        # Extract elevation, time, and location details
-                        elevation, time = point.elevation, point.time
-
-                        if elevation != 0:
-                            is_elevation_set = True
-
-                        if first_waypoint_time is None:
-                            first_waypoint_time = point.time
-
-                        if process_one_time_fields == 0:
-                            # Use geocoding API to get city, town, and country based on coordinates
-                            location_data = (
-                                activities_utils.location_based_on_coordinates(
-                                    latitude, longitude
-                                )
-                            )
-
-                            # Extract city, town, and country from location data
-                            if location_data:
-                                city = location_data["city"]
-                                town = location_data["town"]
-                                country = location_data["country"]
-
-                                process_one_time_fields = 1
-
-                        # Extract heart rate, cadence, and power data from point extensions
-                        heart_rate, cadence, power = 0, 0, 0
-
-                        if point.extensions:
-                            # Iterate through each extension element
-                            for extension in point.extensions:
-                                if extension.tag.endswith("TrackPointExtension"):
-                                    hr_element = extension.find(
-                                        ".//{http://www.garmin.com/xmlschemas/TrackPointExtension/v1}hr"
-                                    )
-                                    if hr_element is not None:
-                                        heart_rate = hr_element.text
-                                    cad_element = extension.find(
-                                        ".//{http://www.garmin.com/xmlschemas/TrackPointExtension/v1}cad"
-                                    )
-                                    if cad_element is not None:
-                                        cadence = cad_element.text
-                                elif extension.tag.endswith("power"):
-                                    # Extract 'power' value
-                                    power = extension.text
-
-                        # Check if heart rate, cadence, power are set
-                        if heart_rate != 0:
-                            is_heart_rate_set = True
-
-                        if cadence != 0:
-                            is_cadence_set = True
-
-                        if power != 0:
-                            is_power_set = True
-                        else:
-                            power = None
-
-                        # Calculate instant speed, pace, and update waypoint arrays
-                        instant_speed = activities_utils.calculate_instant_speed(
-                            last_waypoint_time,
-                            time,
-                            latitude,
-                            longitude,
-                            prev_latitude,
-                            prev_longitude,
-                        )
-
-                        # Calculate instance pace
-                        instant_pace = 0
-                        if instant_speed > 0:
-                            instant_pace = 1 / instant_speed
-                            is_velocity_set = True
-
-                        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
-
-                        # Append waypoint data to respective arrays
-                        if latitude is not None and longitude is not None:
-                            lat_lon_waypoints.append(
-                                {
-                                    "time": timestamp,
-                                    "lat": latitude,
-                                    "lon": longitude,
-                                }
-                            )
-                            is_lat_lon_set = True
-
-                        activities_utils.append_if_not_none(
-                            ele_waypoints, timestamp, elevation, "ele"
-                        )
-                        activities_utils.append_if_not_none(
-                            hr_waypoints, timestamp, heart_rate, "hr"
-                        )
-                        activities_utils.append_if_not_none(
-                            cad_waypoints, timestamp, cadence, "cad"
-                        )
-                        activities_utils.append_if_not_none(
-                            power_waypoints, timestamp, power, "power"
-                        )
-                        activities_utils.append_if_not_none(
-                            vel_waypoints, timestamp, instant_speed, "vel"
-                        )
-                        activities_utils.append_if_not_none(
-                            pace_waypoints, timestamp, instant_pace, "pace"
-                        )
-
-                        # Update previous latitude, longitude, and last waypoint time
-                        prev_latitude, prev_longitude, last_waypoint_time = (
-                            latitude,
-                            longitude,
-                            time,
-                        )
-
-        # Calculate elevation gain/loss, pace, average speed, and average power
-        if ele_waypoints:
-            ele_gain, ele_loss = activities_utils.calculate_elevation_gain_loss(
-                ele_waypoints
+
+        # Stream the track points from the GPX file
+        for (
+            track_name,
+            track_type,
+            latitude,
+            longitude,
+            elevation,
+            time,
+            heart_rate,
+            cadence,
+            power,
+        ) in iterate_gpx_track_points(file):
+            # Set activity name and type if available
+            activity_name = track_name if track_name else "Workout"
+            activity_type = track_type if track_type else "Workout"
+
+            if elevation != 0:
+                is_elevation_set = True
+
+            if first_waypoint_time is None:
+                first_waypoint_time = time
+
+            if initial_latitude is None:
+                # Keep the first coordinates, the location is resolved after the activity is stored
+                initial_latitude = latitude
+                initial_longitude = longitude
+
+            # Check if heart rate, cadence, power are set
+            if heart_rate != 0:
+                is_heart_rate_set = True
+
+            if cadence != 0:
+                is_cadence_set = True
+
+            if power != 0:
+                is_power_set = True
+            else:
+                power = None
+
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+            # Append waypoint data to respective arrays
+            if latitude is not None and longitude is not None:
+                lat_lon_waypoints.append(
+                    {
+                        "time": timestamp,
+                        "lat": latitude,
+                        "lon": longitude,
+                    }
+                )
+                is_lat_lon_set = True
+
+            activities_utils.append_if_not_none(
+                ele_waypoints, timestamp, elevation, "ele"
+            )
+            activities_utils.append_if_not_none(
+                hr_waypoints, timestamp, heart_rate, "hr"
+            )
+            activities_utils.append_if_not_none(
+                cad_waypoints, timestamp, cadence, "cad"
+            )
+            activities_utils.append_if_not_none(
+                power_waypoints, timestamp, power, "power"
             )
 
-        pace = activities_utils.calculate_pace(
-            distance, first_waypoint_time, last_waypoint_time
+            # Store the values needed to calculate distance, speed and the summary metrics
+            timestamps.append(timestamp)
+            epochs.append(activity_streams_utils.datetime_to_epoch(time))
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+            elevations.append(elevation)
+            # Heart rate and cadence default to 0 when not present
+            heart_rates.append(float(heart_rate) if heart_rate else None)
+            cadences.append(float(cadence) if cadence else None)
+            powers.append(float(power) if power is not None else None)
+
+            # Update last waypoint time
+            last_waypoint_time = time
+
+        # Calculate distance and instant speeds for the whole track in a single pass
+        track_distances = activities_distance_utils.calculate_track_distances(
+            epochs,
+            np.array(latitudes, dtype=np.float64),
+            np.array(longitudes, dtype=np.float64),
+            ellipsoidal_total=True,
         )
+        distance = track_distances["total_distance"]
+
+        # The first waypoint has no previous waypoint so its speed is 0
+        instant_speeds = np.nan_to_num(track_distances["instant_speeds"], nan=0.0)
+
+        # Pace is the inverse of speed, 0 if speed is not positive
+        instant_paces = np.zeros(len(instant_speeds))
+        np.divide(1, instant_speeds, out=instant_paces, where=instant_speeds > 0)
+
+        # Velocity is set if there is at least one positive speed
+        is_velocity_set = bool(np.any(instant_speeds > 0))
+
+        # Append velocity and pace data to respective arrays
+        vel_waypoints = [
+            {"time": timestamp, "vel": speed}
+            for timestamp, speed in zip(timestamps, instant_speeds.tolist())
+        ]
+        pace_waypoints = [
+            {"time": timestamp, "pace": pace}
+            for timestamp, pace in zip(timestamps, instant_paces.tolist())
+        ]
+
+        # Calculate all the summary metrics in a single pass over the columns
+        metrics = activities_metrics_utils.calculate_activity_metrics(
+            epochs,
+            hr=heart_rates,
+            cad=cadences,
+            power=powers,
+            vel=instant_speeds,
+            ele=elevations,
+        )
+        avg_hr, max_hr = metrics["avg_hr"], metrics["max_hr"]
+        avg_cadence, max_cadence = metrics["avg_cadence"], metrics["max_cadence"]
+        avg_speed, max_speed = metrics["avg_speed"], metrics["max_speed"]
+        avg_power, max_power = metrics["avg_power"], metrics["max_power"]
+        normalized_power = metrics["np"]
+        ele_gain, ele_loss = metrics["ele_gain"], metrics["ele_loss"]
 
         # Activity type
         activity_type = activities_utils.define_activity_type(activity_type)
 
-        # Calculate average and maximum heart rate
-        if hr_waypoints:
-            avg_hr, max_hr = activities_utils.calculate_avg_and_max(hr_waypoints, "hr")
-
-        # Calculate average and maximum cadence
-        if cad_waypoints:
-            avg_cadence, max_cadence = activities_utils.calculate_avg_and_max(
-                cad_waypoints, "cad"
-            )
-
-        # Calculate average and maximum velocity
-        if vel_waypoints:
-            avg_speed, max_speed = activities_utils.calculate_avg_and_max(
-                vel_waypoints, "vel"
-            )
-
-        # Calculate average and maximum power
-        if power_waypoints:
-            avg_power, max_power = activities_utils.calculate_avg_and_max(
-                power_waypoints, "power"
-            )
-
-            # Calculate normalised power
-            np = activities_utils.calculate_np(power_waypoints)
+        # Calculate the elapsed time, the timer time is the moving time if there is speed data
+        elapsed_time = (last_waypoint_time - first_waypoint_time).total_seconds()
+        timer_time = (
+            metrics["moving_time"]
+            if metrics["moving_time"] is not None
+            else elapsed_time
+        )
 
-        # Calculate the elapsed time
-        elapsed_time = last_waypoint_time - first_waypoint_time
+        # Calculate pace in seconds per meter over the timer time
+        pace = timer_time / distance if distance else 0
 
         # Create an Activity object with parsed data
         activity = activities_schema.Activity(
@@ -246,23 +223,22 @@ def parse_gpx_file(file: str, user_id: int) -> dict:
             activity_type=activity_type,
             start_time=first_waypoint_time.strftime("%Y-%m-%dT%H:%M:%S"),
             end_time=last_waypoint_time.strftime("%Y-%m-%dT%H:%M:%S"),
-            total_elapsed_time=elapsed_time.total_seconds(),
-            total_timer_time=elapsed_time.total_seconds(),
-            city=city,
-            town=town,
-            country=country,
+            total_elapsed_time=elapsed_time,
+            total_timer_time=timer_time,
+            initial_latitude=initial_latitude,
+            initial_longitude=initial_longitude,
             elevation_gain=round(ele_gain) if ele_gain else None,
             elevation_loss=round(ele_loss) if ele_loss else None,
             pace=pace,
             average_speed=avg_speed,
             max_speed=max_speed,
             average_power=round(avg_power) if avg_power else None,
-            max_power=max_power,
-            normalized_power=round(np) if np else None,
+            max_power=round(max_power) if max_power else None,
+            normalized_power=round(normalized_power) if normalized_power else None,
             average_hr=round(avg_hr) if avg_hr else None,
-            max_hr=max_hr,
+            max_hr=round(max_hr) if max_hr else None,
             average_cad=round(avg_cadence) if avg_cadence else None,
-            max_cad=max_cadence,
+            max_cad=round(max_cadence) if max_cadence else None,
             calories=calories,
             visibility=visibility,
             strava_gear_id=None,
@@ -297,3 +273,88 @@ def parse_gpx_file(file: str, user_id: int) -> dict:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Can't open GPX file: {str(err)}",
         ) from err
+
+
+def iterate_gpx_track_points(file: str | BinaryIO):
+    # GPX element tags, qualified with the file namespace on the first element
+    tags = None
+
+    # Current track name and type
+    track_name, track_type = None, None
+
+    # Stack of open elements, used to know the parent of each element
+    elements = []
+
+    # Stream the GPX file, elements are discarded as soon as they are processed
+    for event, element in iterparse(file, events=("start", "end")):
+        if event == "start":
+            if tags is None:
+                tags = gpx_tags(element.tag)
+            elements.append(element)
+            continue
+
+        elements.pop()
+        tag = element.tag
+
+        if tag == tags["trkpt"]:
+            # Yield the parsed track point with the current track name and type
+            yield (track_name, track_type) + parse_track_point(element, tags)
+        elif tag == tags["trk"]:
+            # Reset the track name and type for the next track
+            track_name, track_type = None, None
+        elif elements and elements[-1].tag == tags["trk"]:
+            # Track name and type come before the track segments
+            if tag == tags["name"]:
+                track_name = element.text
+            elif tag == tags["type"]:
+                track_type = element.text
+
+        if tag in tags["points"] and elements:
+            # Drop the processed point so memory stays flat
+            elements[-1].remove(element)
+
+
+def gpx_tags(root_tag: str) -> dict:
+    # Get the namespace from the root element tag, if any
+    namespace = root_tag[: root_tag.index("}") + 1] if root_tag[0] == "{" else ""
+
+    tags = {
+        tag: f"{namespace}{tag}"
+        for tag in ("trk", "trkpt", "name", "type", "ele", "time", "extensions")
+    }
+    tags["points"] = {f"{namespace}{tag}" for tag in ("trkpt", "rtept", "wpt")}
+
+    return tags
+
+
+def parse_track_point(element, tags: dict) -> tuple:
+    # Extract latitude and longitude from the point attributes
+    latitude = float(element.get("lat"))
+    longitude = float(element.get("lon"))
+
+    elevation, time = None, None
+    # Heart rate, cadence, and power default to 0 when not present
+    heart_rate, cadence, power = 0, 0, 0
+
+    for child in element:
+        tag = child.tag
+
+        if tag == tags["ele"] and child.text:
+            elevation = float(child.text)
+        elif tag == tags["time"] and child.text:
+            time = datetime.fromisoformat(child.text.strip())
+        elif tag == tags["extensions"]:
+            # Iterate through each extension element
+            for extension in child:
+                if extension.tag.endswith("TrackPointExtension"):
+                    for value in extension.iter():
+                        if value.tag == TRACK_POINT_EXTENSION_HR:
+                            heart_rate = value.text
+                        elif value.tag == TRACK_POINT_EXTENSION_CAD:
+                            cadence = value.text
+                elif extension.tag.endswith("power"):
+                    # Extract 'power' value
+                    power = extension.text
+
+    # Return all extracted values
+    return latitude, longitude, elevation, time, heart_rate, cadence, power
@@ -2,12 +2,13 @@ import logging
 
 from operator import and_, or_
 from fastapi import HTTPException, status
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy import func, desc
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 import models
+import pagination_utils
 
 import health_data.schema as health_data_schema
 
@@ -91,6 +92,51 @@ def get_health_data_with_pagination(
         ) from err
 
 
+def get_health_data_with_cursor(
+    user_id: int, db: Session, cursor: str | None = None, num_records: int = 5
+) -> dict:
+    # Decode the cursor before querying, an invalid cursor is a client error
+    values = (
+        pagination_utils.decode_cursor(cursor, [date.fromisoformat, int])
+        if cursor
+        else None
+    )
+
+    try:
+        # Get the health_data from the database after the cursor
+        query = db.query(models.HealthData).filter(
+            models.HealthData.user_id == user_id
+        )
+        if values:
+            query = query.filter(
+                pagination_utils.keyset_condition(
+                    [models.HealthData.created_at, models.HealthData.id],
+                    values,
+                    descending=True,
+                )
+            )
+        health_data = (
+            query.order_by(
+                desc(models.HealthData.created_at), desc(models.HealthData.id)
+            )
+            .limit(num_records + 1)
+            .all()
+        )
+
+        # Return the page of health_data
+        return pagination_utils.cursor_page(
+            health_data, num_records, lambda data: [data.created_at, data.id]
+        )
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_health_data_with_cursor: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_health_data_by_created_at(user_id: int, created_at: str, db: Session):
     try:
         # Get the health_data from the database
@@ -12,6 +12,7 @@ import session.security as session_security
 
 import database
 import dependencies_global
+import pagination_utils
 
 # Define the API router
 router = APIRouter()
@@ -24,7 +25,7 @@ logger = logging.getLogger("myLogger")
     "/number",
     response_model=int,
 )
-async def read_health_data_number(
+def read_health_data_number(
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["health:read"])
     ],
@@ -45,7 +46,7 @@ async def read_health_data_number(
     "/",
     response_model=list[health_data_schema.HealthData] | None,
 )
-async def read_health_data_all(
+def read_health_data_all(
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["health:read"])
     ],
@@ -66,7 +67,7 @@ async def read_health_data_all(
     "/page_number/{page_number}/num_records/{num_records}",
     response_model=list[health_data_schema.HealthData] | None,
 )
-async def read_health_data_all_pagination(
+def read_health_data_all_pagination(
     page_number: int,
     num_records: int,
     check_scopes: Annotated[
@@ -90,8 +91,36 @@ async def read_health_data_all_pagination(
     )
 
 
+@router.get(
+    "/cursor/num_records/{num_records}",
+    response_model=pagination_utils.CursorPage[health_data_schema.HealthData],
+)
+def read_health_data_all_cursor(
+    num_records: int,
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["health:read"])
+    ],
+    validate_pagination_values: Annotated[
+        Callable, Depends(dependencies_global.validate_cursor_pagination_values)
+    ],
+    token_user_id: Annotated[
+        int,
+        Depends(session_security.get_user_id_from_access_token),
+    ],
+    db: Annotated[
+        Session,
+        Depends(database.get_db),
+    ],
+    cursor: str | None = None,
+):
+    # Get the page of health_data from the database after the cursor
+    return health_data_crud.get_health_data_with_cursor(
+        token_user_id, db, cursor, num_records
+    )
+
+
 @router.post("/", response_model=health_data_schema.HealthData, status_code=201)
-async def create_health_data(
+def create_health_data(
     health_data: health_data_schema.HealthData,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["health:write"])
@@ -110,7 +139,7 @@ async def create_health_data(
 
 
 @router.post("/weight", response_model=health_data_schema.HealthData, status_code=201)
-async def create_health_weight_data(
+def create_health_weight_data(
     health_data: health_data_schema.HealthData,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["health:write"])
@@ -144,7 +173,7 @@ async def create_health_weight_data(
 
 
 @router.put("/weight/{health_data_id}")
-async def edit_health_weight_data(
+def edit_health_weight_data(
     health_data_id: int,
     health_data: health_data_schema.HealthData,
     check_scopes: Annotated[
@@ -171,7 +200,7 @@ async def edit_health_weight_data(
 
 
 @router.delete("/weight/{health_data_id}")
-async def delete_health_weight_data(
+def delete_health_weight_data(
     health_data_id: int,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["health:write"])
@@ -0,0 +1,74 @@
+import argparse
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+# Measure the latency of API endpoints under concurrent requests:
+#   cd backend/app && python load_test.py http://localhost:98/api/v1 \
+#       --token <access_token> --path /activities/user/1/week/0 --concurrency 50
+
+
+def timed_request(session: requests.Session, url: str, headers: dict) -> tuple:
+    start_time = time.perf_counter()
+    response = session.get(url, headers=headers, timeout=60)
+    return time.perf_counter() - start_time, response.status_code
+
+
+def run_load_test(
+    url: str, headers: dict, requests_number: int, concurrency: int
+) -> tuple:
+    # Each worker thread reuses its own connection, like a browser would
+    thread_data = threading.local()
+
+    def thread_request(_) -> tuple:
+        if not hasattr(thread_data, "session"):
+            thread_data.session = requests.Session()
+        return timed_request(thread_data.session, url, headers)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(thread_request, range(requests_number)))
+    total_time = time.perf_counter() - start_time
+
+    # Return the latencies in milliseconds, the status codes and the total time
+    return (
+        np.array([latency for latency, _ in results]) * 1000,
+        [status_code for _, status_code in results],
+        total_time,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the latency of API endpoints under concurrent requests"
+    )
+    parser.add_argument("base_url", help="API URL, e.g. http://localhost:98/api/v1")
+    parser.add_argument(
+        "--path", action="append", required=True, help="Endpoint path to request"
+    )
+    parser.add_argument("--token", help="Access token sent as a bearer token")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+
+    for path in args.path:
+        latencies, status_codes, total_time = run_load_test(
+            args.base_url.rstrip("/") + path, headers, args.requests, args.concurrency
+        )
+        errors = sum(status_code >= 400 for status_code in status_codes)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(
+            f"{path}: {args.requests / total_time:.0f} req/s, "
+            f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, "
+            f"max {latencies.max():.1f} ms, {errors} errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
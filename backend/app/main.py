@@ -24,6 +24,9 @@ import garmin.activity_utils as garmin_activity_utils
 
 import migrations.utils as migrations_utils
 
+import activities.utils as activities_utils
+import activities.bulk_import_utils as activities_bulk_import_utils
+
 from config import API_VERSION
 from database import SessionLocal
 from routes import router as api_router
@@ -63,6 +66,12 @@ def startup_event():
         retrieve_garminconnect_user_activities_for_last_day, "interval", minutes=60
     )
 
+    # Add scheduler job to resolve the location of the stored activities
+    logger.info(
+        "Added scheduler job to resolve pending activities locations every minute"
+    )
+    scheduler.add_job(enrich_activities_location, "interval", minutes=1)
+
 
 def shutdown_event():
     print("Backend shutdown event")
@@ -71,6 +80,9 @@ def shutdown_event():
     # Shutdown the scheduler when the application is shutting down
     scheduler.shutdown()
 
+    # Shutdown the bulk import process pool
+    activities_bulk_import_utils.shutdown_executor()
+
 
 def check_migrations():
     logger.info("Checking for migrations not executed")
@@ -106,6 +118,17 @@ def retrieve_garminconnect_user_activities_for_last_day():
     garmin_activity_utils.retrieve_garminconnect_users_activities_for_days(1)
 
 
+def enrich_activities_location():
+    # Create a new database session
+    db = SessionLocal()
+    try:
+        # Resolve the location of the activities stored without one
+        activities_utils.enrich_activities_location(db)
+    finally:
+        # Ensure the session is closed after use
+        db.close()
+
+
 # Create loggger
 logger = logging.getLogger("myLogger")
 logger.setLevel(logging.DEBUG)
@@ -6,12 +6,15 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 
 import activities.crud as activities_crud
-import activities.utils as activities_utils
+import activities.metrics_utils as activities_metrics_utils
 
 import activity_streams.crud as activity_streams_crud
+import activity_streams.utils as activity_streams_utils
 
 import migrations.crud as migrations_crud
 
+import user_activity_rollups.crud as user_activity_rollups_crud
+
 # Define a loggger created on main.py
 mainLogger = logging.getLogger("myLogger")
 
@@ -52,6 +55,14 @@ def check_migrations_not_executed(db: Session):
                 # Execute the migration
                 process_migration_1(db)
 
+            if migration.id == 2:
+                # Execute the migration
+                process_migration_2(db)
+
+            if migration.id == 3:
+                # Execute the migration
+                process_migration_3(db)
+
 
 def process_migration_1(db: Session):
     logger.info("Started migration 1")
@@ -88,6 +99,7 @@ def process_migration_1(db: Session):
                     "max_cadence": None,
                     "avg_speed": None,
                     "max_speed": None,
+                    "moving_time": None,
                 }
 
                 # Get activity streams
@@ -103,43 +115,46 @@ def process_migration_1(db: Session):
                     activities_processed_with_no_errors = False
                     continue
 
-                # Map stream processing functions
-                stream_processing = {
-                    StreamType.HEART_RATE: ("avg_hr", "max_hr", "hr"),
-                    StreamType.POWER: ("avg_power", "max_power", "power", "np"),
-                    StreamType.CADENCE: ("avg_cadence", "max_cadence", "cad"),
-                    StreamType.ELEVATION: None,
-                    StreamType.SPEED: ("avg_speed", "max_speed", "vel"),
-                    StreamType.PACE: None,
-                    StreamType.LATLONG: None,
+                # Map stream types to the metrics engine channels
+                stream_channels = {
+                    StreamType.HEART_RATE: "hr",
+                    StreamType.POWER: "power",
+                    StreamType.CADENCE: "cad",
+                    StreamType.SPEED: "vel",
                 }
 
                 for stream in activity_streams:
-                    stream_type = StreamType(stream.stream_type)
-                    if (
-                        stream_type in stream_processing
-                        and stream_processing[stream_type] is not None
-                    ):
-                        attr_avg, attr_max, stream_key = stream_processing[stream_type][:3]
-                        metrics[attr_avg], metrics[attr_max] = (
-                            activities_utils.calculate_avg_and_max(
-                                stream.stream_waypoints, stream_key
-                            )
-                        )
-                        # Special handling for normalized power
-                        if stream_type == StreamType.POWER:
-                            metrics["np"] = activities_utils.calculate_np(
-                                stream.stream_waypoints
-                            )
+                    channel = stream_channels.get(StreamType(stream.stream_type))
+                    if channel is None:
+                        continue
+
+                    # Calculate the stream metrics from its columns
+                    times, values = activity_streams_utils.waypoints_to_columns(
+                        stream.stream_waypoints, channel
+                    )
+                    stream_metrics = activities_metrics_utils.calculate_activity_metrics(
+                        times, **{channel: values}
+                    )
+                    metrics.update(
+                        {
+                            key: value
+                            for key, value in stream_metrics.items()
+                            if value is not None
+                        }
+                    )
 
                 # Calculate elapsed time once
                 elapsed_time_seconds = (
                     activity.end_time - activity.start_time
                 ).total_seconds()
 
-                # Set fields on the activity object
+                # Set fields on the activity object, timer time is the moving time if there is a speed stream
                 activity.total_elapsed_time = elapsed_time_seconds
-                activity.total_timer_time = elapsed_time_seconds
+                activity.total_timer_time = (
+                    metrics["moving_time"]
+                    if metrics["moving_time"] is not None
+                    else elapsed_time_seconds
+                )
                 activity.max_speed = metrics["max_speed"]
                 activity.max_power = metrics["max_power"]
                 activity.normalized_power = metrics["np"]
@@ -177,3 +192,78 @@ def process_migration_1(db: Session):
         )
 
     logger.info("Finished migration 1")
+
+
+def process_migration_2(db: Session):
+    logger.info("Started migration 2")
+
+    activities_processed_with_no_errors = True
+
+    try:
+        activities = activities_crud.get_all_activities(db)
+    except Exception as err:
+        logger.error(f"Error fetching activities: {err}")
+        return
+
+    if activities:
+        for activity in activities:
+            try:
+                # Precompute the levels of detail of the activity streams
+                activity_streams_crud.create_missing_activity_streams_levels(
+                    activity.id, db
+                )
+                logger.info(f"Processed activity: {activity.id} - {activity.name}")
+            except Exception as err:
+                activities_processed_with_no_errors = False
+                print(
+                    f"Failed to process activity {activity.id}. Please check migrations log for more details."
+                )
+                mainLogger.error(
+                    f"Failed to process activity {activity.id}. Please check migrations log for more details."
+                )
+                logger.error(
+                    f"Failed to process activity {activity.id}: {err}", exc_info=True
+                )
+
+    # Mark migration as executed
+    if activities_processed_with_no_errors:
+        try:
+            migrations_crud.set_migration_as_executed(2, db)
+        except Exception as err:
+            logger.error(f"Failed to set migration as executed: {err}", exc_info=True)
+            return
+    else:
+        logger.error(
+            "Migration 2 failed to process all activities. Will try again later."
+        )
+
+    logger.info("Finished migration 2")
+
+
+def process_migration_3(db: Session):
+    logger.info("Started migration 3")
+
+    try:
+        # Build the rollups of every user from the existing activities
+        user_activity_rollups_crud.rebuild_user_activity_rollups(db)
+    except Exception as err:
+        print(
+            "Failed to build the user activity rollups. Please check migrations log for more details."
+        )
+        mainLogger.error(
+            "Failed to build the user activity rollups. Please check migrations log for more details."
+        )
+        logger.error(
+            f"Failed to build the user activity rollups: {err}", exc_info=True
+        )
+        logger.error("Migration 3 failed. Will try again later.")
+        return
+
+    # Mark migration as executed
+    try:
+        migrations_crud.set_migration_as_executed(3, db)
+    except Exception as err:
+        logger.error(f"Failed to set migration as executed: {err}", exc_info=True)
+        return
+
+    logger.info("Finished migration 3")
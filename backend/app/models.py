@@ -8,10 +8,13 @@ from sqlalchemy import (
     DECIMAL,
     BigInteger,
     Boolean,
+    Index,
+    literal_column,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.mysql import JSON
 from database import Base
+from activity_streams.codec_utils import StreamWaypointsType
 
 
 class Migration(Base):
@@ -160,6 +163,13 @@ class User(Base):
         cascade="all, delete-orphan",
     )
 
+    # Establish a one-to-many relationship with 'user_activity_rollups'
+    activity_rollups = relationship(
+        "UserActivityRollup",
+        back_populates="user",
+        cascade="all, delete-orphan",
+    )
+
 
 class UserIntegrations(Base):
     __tablename__ = "users_integrations"
@@ -237,6 +247,15 @@ class Gear(Base):
 # Data model for activities table using SQLAlchemy's ORM
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_activities_user_id_start_time", "user_id", "start_time"),
+        Index(
+            "ix_activities_user_id_visibility_start_time",
+            "user_id",
+            "visibility",
+            "start_time",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(
@@ -285,6 +304,23 @@ class Activity(Base):
         nullable=True,
         comment="Activity country (May include spaces)",
     )
+    initial_latitude = Column(
+        DECIMAL(precision=10, scale=8),
+        nullable=True,
+        comment="Activity initial latitude used to resolve the location",
+    )
+    initial_longitude = Column(
+        DECIMAL(precision=11, scale=8),
+        nullable=True,
+        comment="Activity initial longitude used to resolve the location",
+    )
+    location_pending = Column(
+        Boolean,
+        nullable=False,
+        default=False,
+        index=True,
+        comment="Whether the activity location is waiting to be resolved",
+    )
     created_at = Column(
         DateTime, nullable=False, comment="Activity creation date (datetime)"
     )
@@ -343,6 +379,30 @@ class Activity(Base):
     garminconnect_activity_id = Column(
         BigInteger, unique=True, nullable=True, comment="Garmin Connect activity ID"
     )
+    file_hash = Column(
+        String(length=64),
+        nullable=True,
+        index=True,
+        comment="SHA-256 hash of the file the activity was imported from",
+    )
+    fit_file_id_serial_number = Column(
+        BigInteger,
+        nullable=True,
+        comment="Serial number of the device that created the FIT file",
+    )
+    fit_file_id_time_created = Column(
+        DateTime,
+        nullable=True,
+        comment="FIT file creation date (datetime)",
+    )
+    version = Column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default="1",
+        onupdate=literal_column("version + 1"),
+        comment="Activity version, incremented on every update",
+    )
 
     # Define a relationship to the User model
     user = relationship("User", back_populates="activities")
@@ -357,6 +417,13 @@ class Activity(Base):
         cascade="all, delete-orphan",
     )
 
+    # Establish a one-to-many relationship with 'activities_streams_levels'
+    activities_streams_levels = relationship(
+        "ActivityStreamLevels",
+        back_populates="activity",
+        cascade="all, delete-orphan",
+    )
+
 
 class ActivityStreams(Base):
     __tablename__ = "activities_streams"
@@ -372,9 +439,24 @@ class ActivityStreams(Base):
     stream_type = Column(
         Integer,
         nullable=False,
-        comment="Stream type (1 - HR, 2 - Power, 3 - Cadence, 4 - Elevation, 5 - Velocity, 6 - Pace, 7 - lat/lon)",
+        comment="Stream type (1 - HR, 2 - Power, 3 - Cadence, 4 - Elevation, 5 - Velocity, 6 - Pace, 7 - lat/lon, 8 - Columnar)",
+    )
+    stream_waypoints = Column(
+        StreamWaypointsType,
+        nullable=True,
+        doc="Store waypoints data",
+        comment="Waypoints data encoded with the binary stream codec, null if stored in a file",
+    )
+    stream_file_path = Column(
+        String(length=250),
+        nullable=True,
+        comment="Path of the waypoints file relative to the streams files directory",
+    )
+    stream_file_checksum = Column(
+        String(length=64),
+        nullable=True,
+        comment="SHA-256 checksum of the waypoints file",
     )
-    stream_waypoints = Column(JSON, nullable=False, doc="Store waypoints data")
     strava_activity_stream_id = Column(
         BigInteger, nullable=True, comment="Strava activity stream ID"
     )
@@ -383,6 +465,38 @@ class ActivityStreams(Base):
     activity = relationship("Activity", back_populates="activities_streams")
 
 
+class ActivityStreamLevels(Base):
+    __tablename__ = "activities_streams_levels"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    activity_id = Column(
+        Integer,
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="Activity ID that the activity stream level belongs",
+    )
+    stream_type = Column(
+        Integer,
+        nullable=False,
+        comment="Stream type (1 - HR, 2 - Power, 3 - Cadence, 4 - Elevation, 5 - Velocity, 6 - Pace, 7 - lat/lon)",
+    )
+    max_points = Column(
+        Integer,
+        nullable=False,
+        comment="Maximum number of points of the level of detail",
+    )
+    stream_waypoints = Column(
+        StreamWaypointsType,
+        nullable=False,
+        doc="Store downsampled waypoints data",
+        comment="Waypoints data encoded with the binary stream codec",
+    )
+
+    # Define a relationship to the Activity model
+    activity = relationship("Activity", back_populates="activities_streams_levels")
+
+
 class HealthData(Base):
     __tablename__ = "health_data"
 
@@ -430,3 +544,83 @@ class HealthTargets(Base):
 
     # Define a relationship to the User model
     user = relationship("User", back_populates="health_targets")
+
+
+class UserActivityRollup(Base):
+    __tablename__ = "user_activity_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="User ID that the activity rollup belongs",
+    )
+    day = Column(Date, nullable=False, comment="Activities start date (date)")
+    activity_type = Column(
+        Integer,
+        nullable=False,
+        comment="Activities type (1 - mountain bike, 2 - gravel bike, ...)",
+    )
+    visibility = Column(
+        Integer,
+        nullable=False,
+        comment="Activities visibility (0 - public, 1 - followers, 2 - private)",
+    )
+    activities_number = Column(Integer, nullable=False, comment="Number of activities")
+    distance = Column(
+        BigInteger, nullable=False, comment="Activities total distance in meters"
+    )
+    moving_time = Column(
+        DECIMAL(precision=20, scale=10),
+        nullable=False,
+        comment="Activities total timer time in seconds",
+    )
+    elevation_gain = Column(
+        BigInteger, nullable=False, comment="Activities total elevation gain in meters"
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_user_activity_rollups_user_id_day_activity_type_visibility",
+            "user_id",
+            "day",
+            "activity_type",
+            "visibility",
+            unique=True,
+        ),
+    )
+
+    # Define a relationship to the User model
+    user = relationship("User", back_populates="activity_rollups")
+
+
+class GeocodeCache(Base):
+    __tablename__ = "geocodes_cache"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    latitude_cell = Column(
+        Integer,
+        nullable=False,
+        comment="Latitude grid cell (latitude rounded to 0.01 degrees times 100)",
+    )
+    longitude_cell = Column(
+        Integer,
+        nullable=False,
+        comment="Longitude grid cell (longitude rounded to 0.01 degrees times 100)",
+    )
+    city = Column(String(length=250), nullable=True, comment="Location city")
+    town = Column(String(length=250), nullable=True, comment="Location town")
+    country = Column(String(length=250), nullable=True, comment="Location country")
+    created_at = Column(
+        DateTime, nullable=False, comment="Geocode cache entry creation date (datetime)"
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_geocodes_cache_latitude_cell_longitude_cell",
+            "latitude_cell",
+            "longitude_cell",
+            unique=True,
+        ),
+    )
@@ -0,0 +1,83 @@
+import base64
+import binascii
+import json
+
+from typing import Callable, Generic, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    records: list[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(values: list) -> str:
+    # Opaque cursor with the sort key values of the last record of the page
+    return (
+        base64.urlsafe_b64encode(
+            json.dumps(values, default=lambda value: value.isoformat()).encode()
+        )
+        .decode()
+        .rstrip("=")
+    )
+
+
+def decode_cursor(cursor: str, parsers: list[Callable]) -> list:
+    try:
+        values = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        )
+
+        # Check if the cursor has one value per sort key
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("Wrong number of cursor values")
+
+        # Convert each value back to the sort key type
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (
+        binascii.Error,
+        UnicodeDecodeError,
+        TypeError,
+        ValueError,
+        OverflowError,
+    ) as err:
+        # Raise an HTTPException with a 422 Unprocessable Entity status code
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid Cursor",
+        ) from err
+
+
+def keyset_condition(columns: list, values: list, descending: bool):
+    # Records after the cursor in the sort order, the leading column bound lets
+    # the database range scan the index instead of skipping an offset
+    conditions = []
+    for index, column in enumerate(columns):
+        conditions.append(
+            and_(
+                *[
+                    previous_column == value
+                    for previous_column, value in zip(columns[:index], values)
+                ],
+                column < values[index] if descending else column > values[index],
+            )
+        )
+
+    leading_bound = (
+        columns[0] <= values[0] if descending else columns[0] >= values[0]
+    )
+    return and_(leading_bound, or_(*conditions))
+
+
+def cursor_page(records: list, num_records: int, key: Callable) -> dict:
+    # The query fetches one record more than the page to know if there is a next one
+    if len(records) <= num_records:
+        return {"records": records, "next_cursor": None}
+
+    records = records[:num_records]
+    return {"records": records, "next_cursor": encode_cursor(key(records[-1]))}
@@ -23,7 +23,7 @@ logger = logging.getLogger("myLogger")
 
 
 @router.get("/", response_model=users_schema.UserMe)
-async def read_users_me(
+def read_users_me(
     token_user_id: Annotated[
         int,
         Depends(session_security.get_user_id_from_access_token),
@@ -67,7 +67,7 @@ async def read_users_me(
     status_code=201,
     response_model=str | None,
 )
-async def upload_profile_image(
+def upload_profile_image(
     file: UploadFile,
     token_user_id: Annotated[
         int,
@@ -78,11 +78,11 @@ async def upload_profile_image(
         Depends(database.get_db),
     ],
 ):
-    return await users_utils.save_user_image(token_user_id, file, db)
+    return users_utils.save_user_image(token_user_id, file, db)
 
 
 @router.put("/edit")
-async def edit_user(
+def edit_user(
     user_attributtes: users_schema.User,
     token_user_id: Annotated[
         int,
@@ -101,7 +101,7 @@ async def edit_user(
 
 
 @router.put("/edit/password")
-async def edit_profile_password(
+def edit_profile_password(
     user_attributtes: users_schema.UserEditPassword,
     token_user_id: Annotated[
         int,
@@ -130,7 +130,7 @@ async def edit_profile_password(
 
 
 @router.put("/delete-photo")
-async def delete_profile_photo(
+def delete_profile_photo(
     token_user_id: Annotated[
         int,
         Depends(session_security.get_user_id_from_access_token),
@@ -3,6 +3,7 @@ import session.router as session_router
 import session.security as session_security
 import users.router as users_router
 import profile.router as profile_router
+import activities.async_router as activities_async_router
 import activities.router as activities_router
 import activity_streams.router as activity_streams_router
 import gears.router as gears_router
@@ -12,6 +13,8 @@ import garmin.router as garmin_router
 import health_data.router as health_data_router
 import health_targets.router as health_targets_router
 
+import config
+
 
 router = APIRouter()
 
@@ -36,6 +39,14 @@ router.include_router(
         Security(session_security.check_scopes, scopes=["profile"]),
     ],
 )
+if config.DB_ASYNC_ENABLED:
+    # The async routes are matched first and take over the sync routes of the same path
+    router.include_router(
+        activities_async_router.router,
+        prefix="/activities",
+        tags=["activities"],
+        dependencies=[Depends(session_security.validate_access_token)],
+    )
 router.include_router(
     activities_router.router,
     prefix="/activities",
@@ -28,7 +28,7 @@ logger = logging.getLogger("myLogger")
 
 
 @router.post("/token")
-async def login_for_access_token(
+def login_for_access_token(
     response: Response,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Annotated[
@@ -61,7 +61,7 @@ async def login_for_access_token(
 
 
 @router.post("/refresh")
-async def refresh_token(
+def refresh_token(
     response: Response,
     validate_refresh_token: Annotated[
         Callable, Depends(session_security.validate_refresh_token)
@@ -101,7 +101,7 @@ async def refresh_token(
 
 
 @router.post("/logout")
-async def logout(
+def logout(
     response: Response,
     client_type: str = Depends(session_security.header_client_type_scheme),
 ):
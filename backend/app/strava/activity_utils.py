@@ -7,9 +7,9 @@ from stravalib.client import Client
 import activities.schema as activities_schema
 import activities.crud as activities_crud
 import activities.utils as activities_utils
+import activities.metrics_utils as activities_metrics_utils
 
 import activity_streams.schema as activity_streams_schema
-import activity_streams.crud as activity_streams_crud
 
 import user_integrations.schema as user_integrations_schema
 
@@ -162,29 +162,33 @@ def parse_activity(
         pace_waypoints.append({"time": time[i], "pace": pace_calculation})
         is_velocity_set = True
 
-    ele_gain, ele_loss = None, None
-    # Calculate elevation gain and loss
-    if ele_waypoints:
-        ele_gain, ele_loss = activities_utils.calculate_elevation_gain_loss(
-            ele_waypoints
-        )
+    # Calculate all the summary metrics from the stream columns in a single pass
+    metrics = activities_metrics_utils.calculate_activity_metrics(
+        time,
+        hr=hr or None,
+        cad=cad or None,
+        power=power or None,
+        vel=vel or None,
+        ele=ele or None,
+    )
 
-        if detailedActivity.total_elevation_gain is not None:
-            ele_gain = round(detailedActivity.total_elevation_gain)
+    # Calculate elevation gain and loss, Strava total elevation gain is preferred
+    ele_gain, ele_loss = metrics["ele_gain"], metrics["ele_loss"]
+    if ele_waypoints and detailedActivity.total_elevation_gain is not None:
+        ele_gain = round(detailedActivity.total_elevation_gain)
 
     # Get average and max speed
-    avg_speed = None
+    avg_speed, max_speed = metrics["avg_speed"], metrics["max_speed"]
     if detailedActivity.average_speed is not None:
         avg_speed = detailedActivity.average_speed
 
-    max_speed = None
     if detailedActivity.max_speed is not None:
         max_speed = detailedActivity.max_speed
 
     # Calculate average pace
-    average_pace = 1 / avg_speed if avg_speed != 0 else None
+    average_pace = 1 / avg_speed if avg_speed else None
 
-    avg_hr, max_hr = None, None
+    avg_hr, max_hr = metrics["avg_hr"], metrics["max_hr"]
     # Get average and max heart rate
     if detailedActivity.average_heartrate is not None:
         avg_hr = detailedActivity.average_heartrate
@@ -192,29 +196,21 @@ def parse_activity(
     if detailedActivity.max_heartrate is not None:
         max_hr = detailedActivity.max_heartrate
 
-    avg_cadence, max_cadence = None, None
     # Calculate average and maximum cadence
-    if cad_waypoints:
-        avg_cadence, max_cadence = activities_utils.calculate_avg_and_max(
-            cad_waypoints, "cad"
-        )
-
-        if detailedActivity.average_cadence is not None:
-            avg_cadence = detailedActivity.average_cadence
+    avg_cadence, max_cadence = metrics["avg_cadence"], metrics["max_cadence"]
+    if cad_waypoints and detailedActivity.average_cadence is not None:
+        avg_cadence = detailedActivity.average_cadence
 
     # Get average and max power
-    avg_power = None
+    avg_power, max_power = metrics["avg_power"], metrics["max_power"]
     if detailedActivity.average_watts is not None:
         avg_power = detailedActivity.average_watts
 
-    max_power = None
     if detailedActivity.max_watts is not None:
         max_power = detailedActivity.max_watts
 
     # Calculate normalized power
-    np = None
-    if power_waypoints:
-        np = activities_utils.calculate_np(power_waypoints)
+    np = metrics["np"]
 
     # List of conditions, stream types, and corresponding waypoints
     stream_data = [
@@ -280,26 +276,21 @@ def parse_activity(
 def save_activity_and_streams(
     activity: activities_schema.Activity, stream_data: list, db: Session
 ):
-    # Create the activity and get the ID
-    created_activity = activities_crud.create_activity(activity, db)
-
-    # Create the empty array of activity streams
-    activity_streams = []
-
-    # Create the activity streams objects
-    for is_set, stream_type, waypoints in stream_data:
-        if is_set:
-            activity_streams.append(
-                activity_streams_schema.ActivityStreams(
-                    activity_id=created_activity.id,
-                    stream_type=stream_type,
-                    stream_waypoints=waypoints,
-                    strava_activity_stream_id=None,
-                )
+    # Create the activity and its streams in the database in a single transaction
+    activities_crud.create_activities(
+        [activity],
+        db,
+        lambda index, activity_id: [
+            activity_streams_schema.ActivityStreams(
+                activity_id=activity_id,
+                stream_type=stream_type,
+                stream_waypoints=waypoints,
+                strava_activity_stream_id=None,
             )
-
-    # Create the activity streams in the database
-    activity_streams_crud.create_activity_streams(activity_streams, db)
+            for is_set, stream_type, waypoints in stream_data
+            if is_set
+        ],
+    )
 
 
 def process_activity(
@@ -31,7 +31,7 @@ logger = logging.getLogger("myLogger")
 @router.get(
     "/link",
 )
-async def strava_link(
+def strava_link(
     state: str,
     code: str,
     db: Annotated[
@@ -102,7 +102,7 @@ async def strava_link(
     "/activities/days/{days}",
     status_code=202,
 )
-async def strava_retrieve_activities_days(
+def strava_retrieve_activities_days(
     days: int,
     validate_access_token: Annotated[
         Callable,
@@ -140,7 +140,7 @@ async def strava_retrieve_activities_days(
 @router.put(
     "/set-user-unique-state/{state}",
 )
-async def strava_set_user_unique_state(
+def strava_set_user_unique_state(
     state: str,
     validate_access_token: Annotated[
         Callable,
@@ -166,7 +166,7 @@ async def strava_set_user_unique_state(
 @router.put(
     "/unset-user-unique-state",
 )
-async def strava_unset_user_unique_state(
+def strava_unset_user_unique_state(
     validate_access_token: Annotated[
         Callable,
         Depends(session_security.validate_access_token),
@@ -189,7 +189,7 @@ async def strava_unset_user_unique_state(
 
 
 @router.delete("/unlink")
-async def strava_unlink(
+def strava_unlink(
     validate_access_token: Annotated[
         Callable,
         Depends(session_security.validate_access_token),
@@ -221,7 +221,7 @@ async def strava_unlink(
 
 
 @router.get("/gear", status_code=202)
-async def strava_retrieve_gear(
+def strava_retrieve_gear(
     validate_access_token: Annotated[
         Callable,
         Depends(session_security.validate_access_token),
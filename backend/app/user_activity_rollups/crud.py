@@ -0,0 +1,169 @@
+import logging
+
+from datetime import date
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, true
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+import models
+
+# Define a loggger created on main.py
+logger = logging.getLogger("myLogger")
+
+# Number of rollup rows inserted per statement
+ROLLUPS_BATCH_SIZE = 1000
+
+# Rollup columns summed from the activities
+ROLLUP_TOTALS = ("activities_number", "distance", "moving_time", "elevation_gain")
+
+
+def get_activities_rollups(condition, db: Session, sign: int = 1) -> list[dict]:
+    # Sum the activities matching the condition by user, day, activity type and visibility
+    day = func.date(models.Activity.start_time)
+    rows = (
+        db.query(
+            models.Activity.user_id,
+            day,
+            models.Activity.activity_type,
+            models.Activity.visibility,
+            func.count(models.Activity.id),
+            func.sum(models.Activity.distance),
+            func.sum(models.Activity.total_timer_time),
+            func.sum(func.coalesce(models.Activity.elevation_gain, 0)),
+        )
+        .filter(condition)
+        .group_by(
+            models.Activity.user_id,
+            day,
+            models.Activity.activity_type,
+            models.Activity.visibility,
+        )
+        .all()
+    )
+
+    # Return the rollup rows, negated when the activities are removed
+    return [
+        {
+            "user_id": user_id,
+            "day": day,
+            "activity_type": activity_type,
+            "visibility": visibility,
+            **{column: sign * total for column, total in zip(ROLLUP_TOTALS, totals)},
+        }
+        for user_id, day, activity_type, visibility, *totals in rows
+    ]
+
+
+def apply_rollups_deltas(deltas: list[dict], db: Session):
+    # Add the deltas to the existing rollups or create them
+    for index in range(0, len(deltas), ROLLUPS_BATCH_SIZE):
+        statement = insert(models.UserActivityRollup).values(
+            deltas[index : index + ROLLUPS_BATCH_SIZE]
+        )
+        db.execute(
+            statement.on_duplicate_key_update(
+                **{
+                    column: getattr(models.UserActivityRollup, column)
+                    + getattr(statement.inserted, column)
+                    for column in ROLLUP_TOTALS
+                }
+            )
+        )
+
+
+def add_activities_to_rollups(activity_ids: list[int], db: Session):
+    # Runs in the transaction of the caller, after the activities are written
+    if activity_ids:
+        apply_rollups_deltas(
+            get_activities_rollups(models.Activity.id.in_(activity_ids), db), db
+        )
+
+
+def remove_activities_from_rollups(activity_ids: list[int], db: Session):
+    # Runs in the transaction of the caller, before the activities are changed or deleted
+    if not activity_ids:
+        return
+
+    deltas = get_activities_rollups(models.Activity.id.in_(activity_ids), db, -1)
+    apply_rollups_deltas(deltas, db)
+
+    # Remove the rollups without activities left
+    db.query(models.UserActivityRollup).filter(
+        models.UserActivityRollup.user_id.in_({delta["user_id"] for delta in deltas}),
+        models.UserActivityRollup.activities_number <= 0,
+    ).delete(synchronize_session=False)
+
+
+def get_user_activity_rollups_totals_statement(
+    user_id: int,
+    start: date,
+    end: date,
+    visibilities: list[int] | None = None,
+    group_by=None,
+):
+    # Sum the rollups of the days between start and end, optionally grouped
+    statement = select(
+        *([group_by] if group_by is not None else []),
+        *(
+            func.coalesce(func.sum(getattr(models.UserActivityRollup, column)), 0)
+            for column in ROLLUP_TOTALS
+        ),
+    ).where(
+        models.UserActivityRollup.user_id == user_id,
+        models.UserActivityRollup.day >= start,
+        models.UserActivityRollup.day <= end,
+    )
+    if visibilities is not None:
+        statement = statement.where(
+            models.UserActivityRollup.visibility.in_(visibilities)
+        )
+    if group_by is not None:
+        statement = statement.group_by(group_by)
+
+    # Return the statement, it is shared by the sync and async CRUD
+    return statement
+
+
+def get_user_activity_rollups_totals(
+    user_id: int,
+    start: date,
+    end: date,
+    db: Session,
+    visibilities: list[int] | None = None,
+    group_by=None,
+) -> list:
+    # Return the totals rows
+    return db.execute(
+        get_user_activity_rollups_totals_statement(
+            user_id, start, end, visibilities, group_by
+        )
+    ).all()
+
+
+def rebuild_user_activity_rollups(db: Session, user_id: int | None = None):
+    try:
+        # Remove the rollups of the user, or of every user
+        query = db.query(models.UserActivityRollup)
+        if user_id is not None:
+            query = query.filter(models.UserActivityRollup.user_id == user_id)
+        query.delete(synchronize_session=False)
+
+        # Sum every activity again
+        condition = true() if user_id is None else models.Activity.user_id == user_id
+        apply_rollups_deltas(get_activities_rollups(condition, db), db)
+
+        # Commit the transaction
+        db.commit()
+    except Exception as err:
+        # Rollback the transaction
+        db.rollback()
+
+        # Log the exception
+        logger.error(f"Error in rebuild_user_activity_rollups: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
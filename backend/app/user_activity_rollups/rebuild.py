@@ -0,0 +1,31 @@
+import argparse
+
+import user_activity_rollups.crud as user_activity_rollups_crud
+
+from database import SessionLocal
+
+# Rebuild the user activity rollups from the activities:
+#   cd backend/app && python -m user_activity_rollups.rebuild [--user-id 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the user activity rollups from the activities"
+    )
+    parser.add_argument(
+        "--user-id", type=int, help="Only rebuild the rollups of this user"
+    )
+    args = parser.parse_args()
+
+    # Create a new database session
+    db = SessionLocal()
+
+    try:
+        user_activity_rollups_crud.rebuild_user_activity_rollups(db, args.user_id)
+    finally:
+        # Ensure the session is closed after use
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
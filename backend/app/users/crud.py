@@ -9,7 +9,11 @@ import session.security as session_security
 
 import users.schema as users_schema
 import users.utils as users_utils
+
+import activity_streams.storage_utils as activity_streams_storage_utils
+
 import models
+import pagination_utils
 
 
 # Define a loggger created on main.py
@@ -96,6 +100,42 @@ def get_users_with_pagination(db: Session, page_number: int = 1, num_records: in
         ) from err
 
 
+def get_users_with_cursor(
+    db: Session, cursor: str | None = None, num_records: int = 5
+) -> dict:
+    # Decode the cursor before querying, an invalid cursor is a client error
+    values = pagination_utils.decode_cursor(cursor, [int]) if cursor else None
+
+    try:
+        # Get the users from the database after the cursor
+        query = db.query(models.User)
+        if values:
+            query = query.filter(
+                pagination_utils.keyset_condition(
+                    [models.User.id], values, descending=False
+                )
+            )
+        users = query.order_by(models.User.id).limit(num_records + 1).all()
+
+        # Build the page and format the birthdate
+        page = pagination_utils.cursor_page(users, num_records, lambda user: [user.id])
+        page["records"] = [
+            users_utils.format_user_birthdate(user) for user in page["records"]
+        ]
+
+        # Return the page of users
+        return page
+
+    except Exception as err:
+        # Log the exception
+        logger.error(f"Error in get_users_with_cursor: {err}", exc_info=True)
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_user_if_contains_username(username: str, db: Session):
     try:
         # Define a search term
@@ -397,6 +437,14 @@ def delete_user_photo(user_id: int, db: Session):
 
 def delete_user(user_id: int, db: Session):
     try:
+        # Get the user activities ids to delete their streams files
+        activity_ids = [
+            activity_id
+            for activity_id, in db.query(models.Activity.id).filter(
+                models.Activity.user_id == user_id
+            )
+        ]
+
         # Delete the user
         num_deleted = db.query(models.User).filter(models.User.id == user_id).delete()
 
@@ -412,6 +460,10 @@ def delete_user(user_id: int, db: Session):
 
         # Delete the user photo in the filesystem
         users_utils.delete_user_photo_filesystem(user_id)
+
+        # Delete the user activities streams files, if any
+        for activity_id in activity_ids:
+            activity_streams_storage_utils.delete_activity_streams_files(activity_id)
     except Exception as err:
         # Rollback the transaction
         db.rollback()
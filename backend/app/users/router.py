@@ -18,6 +18,7 @@ import session.security as session_security
 
 import database
 import dependencies_global
+import pagination_utils
 
 # Define the API router
 router = APIRouter()
@@ -27,7 +28,7 @@ logger = logging.getLogger("myLogger")
 
 
 @router.get("/number", response_model=int)
-async def read_users_number(
+def read_users_number(
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["users:read"])
     ],
@@ -43,7 +44,7 @@ async def read_users_number(
     "/all/page_number/{page_number}/num_records/{num_records}",
     response_model=list[users_schema.User] | None,
 )
-async def read_users_all_pagination(
+def read_users_all_pagination(
     page_number: int,
     num_records: int,
     validate_pagination_values: Annotated[
@@ -63,11 +64,35 @@ async def read_users_all_pagination(
     )
 
 
+@router.get(
+    "/all/cursor/num_records/{num_records}",
+    response_model=pagination_utils.CursorPage[users_schema.User],
+)
+def read_users_all_cursor(
+    num_records: int,
+    validate_pagination_values: Annotated[
+        Callable, Depends(dependencies_global.validate_cursor_pagination_values)
+    ],
+    check_scopes: Annotated[
+        Callable, Security(session_security.check_scopes, scopes=["users:read"])
+    ],
+    db: Annotated[
+        Session,
+        Depends(database.get_db),
+    ],
+    cursor: str | None = None,
+):
+    # Get the page of users from the database after the cursor
+    return users_crud.get_users_with_cursor(
+        db=db, cursor=cursor, num_records=num_records
+    )
+
+
 @router.get(
     "/username/contains/{username}",
     response_model=list[users_schema.User] | None,
 )
-async def read_users_contain_username(
+def read_users_contain_username(
     username: str,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["users:read"])
@@ -85,7 +110,7 @@ async def read_users_contain_username(
     "/username/{username}",
     response_model=users_schema.User | None,
 )
-async def read_users_username(
+def read_users_username(
     username: str,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["users:read"])
@@ -100,7 +125,7 @@ async def read_users_username(
 
 
 @router.get("/id/{user_id}", response_model=users_schema.User)
-async def read_users_id(
+def read_users_id(
     user_id: int,
     validate_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -116,7 +141,7 @@ async def read_users_id(
 
 
 @router.get("/{username}/id", response_model=int)
-async def read_users_username_id(
+def read_users_username_id(
     username: str,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["users:read"])
@@ -131,7 +156,7 @@ async def read_users_username_id(
 
 
 @router.get("/{user_id}/photo_path", response_model=str | None)
-async def read_users_id_photo_path(
+def read_users_id_photo_path(
     user_id: int,
     validate_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -147,7 +172,7 @@ async def read_users_id_photo_path(
 
 
 @router.post("/create", response_model=int, status_code=201)
-async def create_user(
+def create_user(
     user: users_schema.UserCreate,
     check_scopes: Annotated[
         Callable, Security(session_security.check_scopes, scopes=["users:write"])
@@ -175,7 +200,7 @@ async def create_user(
     status_code=201,
     response_model=str | None,
 )
-async def upload_user_image(
+def upload_user_image(
     user_id: int,
     validate_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     file: UploadFile,
@@ -187,11 +212,11 @@ async def upload_user_image(
         Depends(database.get_db),
     ],
 ):
-    return await users_utils.save_user_image(user_id, file, db)
+    return users_utils.save_user_image(user_id, file, db)
 
 
 @router.put("/{user_id}/edit")
-async def edit_user(
+def edit_user(
     user_id: int,
     validate_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     user_attributtes: users_schema.User,
@@ -211,7 +236,7 @@ async def edit_user(
 
 
 @router.put("/{user_id}/edit/password")
-async def edit_user_password(
+def edit_user_password(
     user_id: int,
     validate_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     user_attributtes: users_schema.UserEditPassword,
@@ -241,7 +266,7 @@ async def edit_user_password(
 
 
 @router.put("/{user_id}/delete-photo")
-async def delete_user_photo(
+def delete_user_photo(
     user_id: int,
     validate_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -260,7 +285,7 @@ async def delete_user_photo(
 
 
 @router.delete("/{user_id}/delete")
-async def delete_user(
+def delete_user(
     user_id: int,
     validate_id: Annotated[Callable, Depends(users_dependencies.validate_user_id)],
     check_scopes: Annotated[
@@ -34,7 +34,7 @@ def format_user_birthdate(user):
     return user
 
 
-async def save_user_image(user_id: int, file: UploadFile, db: Session):
+def save_user_image(user_id: int, file: UploadFile, db: Session):
     try:
         upload_dir = "user_images"
         os.makedirs(upload_dir, exist_ok=True)
@@ -0,0 +1,142 @@
+import os
+
+from datetime import datetime, timedelta
+
+import pytest
+
+# The query plans are only meaningful on MySQL/MariaDB, skip without a database
+pytest.importorskip("MySQLdb")
+if not os.environ.get("DB_HOST"):
+    pytest.skip(
+        "DB_HOST is not set, no MySQL database to explain the queries on",
+        allow_module_level=True,
+    )
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+import activities.crud as activities_crud
+
+# Number of days with one activity for each of the test users
+ACTIVITIES_DAYS = 600
+
+
+@pytest.fixture
+def db():
+    try:
+        connection = database.engine.connect()
+    except OperationalError as err:
+        pytest.skip(f"MySQL database not reachable: {err}")
+
+    # Everything the test inserts is rolled back at the end
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def user_ids(db) -> list[int]:
+    ids = []
+    for index in range(2):
+        user = models.User(
+            name="Explain test",
+            username=f"explain_test_user_{index}",
+            email=f"explain_test_user_{index}@example.com",
+            password="explain_test",
+            preferred_language="en",
+            gender=1,
+            access_type=1,
+            is_active=1,
+        )
+        db.add(user)
+        db.flush()
+        ids.append(user.id)
+
+    # One activity per day for each user, with every visibility
+    start = datetime(2023, 1, 1, 8)
+    db.execute(
+        insert(models.Activity),
+        [
+            {
+                "user_id": user_id,
+                "name": "Explain test",
+                "distance": 10000,
+                "activity_type": 1,
+                "start_time": start + timedelta(days=day),
+                "end_time": start + timedelta(days=day, hours=1),
+                "total_elapsed_time": 3600,
+                "total_timer_time": 3600,
+                "created_at": start + timedelta(days=day),
+                "visibility": day % 3,
+            }
+            for user_id in ids
+            for day in range(ACTIVITIES_DAYS)
+        ],
+    )
+    db.flush()
+
+    return ids
+
+
+def explained_indexes(db: Session, query_function, *args) -> set:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    # Capture the statement the CRUD function sends to the database
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        query_function(*args, db)
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+    # The function formats the dates of the loaded activities in place
+    db.expunge_all()
+
+    statement, parameters = next(
+        (statement, parameters)
+        for statement, parameters in statements
+        if statement.lstrip().upper().startswith("SELECT")
+        and "FROM activities" in statement
+    )
+
+    # Return the indexes MySQL picks for the statement
+    return {
+        row["key"]
+        for row in connection.exec_driver_sql(
+            f"EXPLAIN {statement}", parameters
+        ).mappings()
+    }
+
+
+def test_user_activities_per_timeframe_uses_user_start_time_index(db, user_ids):
+    assert "ix_activities_user_id_start_time" in explained_indexes(
+        db,
+        activities_crud.get_user_activities_per_timeframe,
+        user_ids[0],
+        datetime(2023, 6, 5, 14, 30),
+        datetime(2023, 6, 11, 14, 30),
+    )
+
+
+def test_user_following_activities_per_timeframe_uses_visibility_index(
+    db, user_ids
+):
+    assert "ix_activities_user_id_visibility_start_time" in explained_indexes(
+        db,
+        activities_crud.get_user_following_activities_per_timeframe,
+        user_ids[0],
+        datetime(2023, 6, 5, 14, 30),
+        datetime(2023, 6, 11, 14, 30),
+    )
@@ -0,0 +1,141 @@
+import struct
+
+import numpy as np
+import pytest
+
+import fit.decode_utils as fit_decode_utils
+import fit.utils as fit_utils
+
+# FIT epoch timestamp of the first record
+START_TIMESTAMP = 1000000000
+
+
+def definition_message(local_type: int, global_number: int, fields: list) -> bytes:
+    # Little endian definition message, fields are (number, size, base type)
+    message = struct.pack("<BBBHB", 0x40 | local_type, 0, 0, global_number, len(fields))
+    for field in fields:
+        message += struct.pack("BBB", *field)
+    return message
+
+
+def data_message(local_type: int, fmt: str, values: tuple) -> bytes:
+    return bytes([local_type]) + struct.pack("<" + fmt, *values)
+
+
+def build_fit_file(records_number: int = 300) -> bytes:
+    timestamp = START_TIMESTAMP
+    latitude, longitude = int(45 / (180 / 2**31)), int(7 / (180 / 2**31))
+
+    # file_id: type, serial number and time created
+    messages = definition_message(0, 0, [(0, 1, 0x00), (3, 4, 0x8C), (4, 4, 0x86)])
+    messages += data_message(0, "BII", (4, 3912345678, timestamp))
+
+    # record: timestamp, position, enhanced altitude, heart rate, cadence and power
+    messages += definition_message(
+        1,
+        20,
+        [
+            (253, 4, 0x86),
+            (0, 4, 0x85),
+            (1, 4, 0x85),
+            (78, 4, 0x86),
+            (3, 1, 0x02),
+            (4, 1, 0x02),
+            (7, 2, 0x84),
+        ],
+    )
+    for index in range(records_number):
+        timestamp += 1
+        latitude += 100 + index % 50
+        longitude += 150 - index % 40
+        messages += data_message(
+            1,
+            "IiiIBBH",
+            (
+                timestamp,
+                latitude,
+                longitude,
+                (300 + index // 10 + 500) * 5,
+                120 + index % 40,
+                80 + index % 10,
+                200 + index % 60,
+            ),
+        )
+
+    # session: sport, times, distance, summary values, workout feeling and RPE
+    messages += definition_message(
+        2,
+        18,
+        [
+            (253, 4, 0x86),
+            (2, 4, 0x86),
+            (5, 1, 0x00),
+            (7, 4, 0x86),
+            (8, 4, 0x86),
+            (9, 4, 0x86),
+            (11, 2, 0x84),
+            (16, 1, 0x02),
+            (17, 1, 0x02),
+            (22, 2, 0x84),
+            (23, 2, 0x84),
+            (192, 1, 0x02),
+            (193, 1, 0x02),
+        ],
+    )
+    elapsed_time = (timestamp - START_TIMESTAMP) * 1000
+    messages += data_message(
+        2,
+        "IIBIIIHBBHHBB",
+        (
+            timestamp,
+            START_TIMESTAMP,
+            1,
+            elapsed_time,
+            elapsed_time,
+            123456,
+            250,
+            140,
+            159,
+            40,
+            35,
+            75,
+            70,
+        ),
+    )
+
+    # 14 bytes header with its CRC, the records and the file CRC
+    header = struct.pack("<BBHI4s", 14, 0x20, 2132, len(messages), b".FIT")
+    header += struct.pack("<H", fit_decode_utils.calculate_crc(header, 0, 12))
+    data = header + messages
+    return data + struct.pack("<H", fit_decode_utils.calculate_crc(data, 0, len(data)))
+
+
+@pytest.fixture
+def fit_file_path(tmp_path) -> str:
+    file_path = tmp_path / "activity.fit"
+    file_path.write_bytes(build_fit_file())
+    return str(file_path)
+
+
+def test_fit_parsers_return_the_same_data(fit_file_path):
+    fast_data = fit_utils.parse_fit_file_fast(fit_file_path)
+    fitdecode_data = fit_utils.parse_fit_file_with_fitdecode(fit_file_path)
+
+    assert fast_data.keys() == fitdecode_data.keys()
+    assert fast_data["sessions"] == fitdecode_data["sessions"]
+    for channel, values in fast_data["records"].items():
+        assert np.array_equal(
+            values, fitdecode_data["records"][channel], equal_nan=True
+        ), channel
+    for key in fast_data.keys() - {"sessions", "records"}:
+        assert fast_data[key] == fitdecode_data[key], key
+
+
+def test_fit_parsers_read_workout_feeling_and_rpe(fit_file_path):
+    for parser in (
+        fit_utils.parse_fit_file_fast,
+        fit_utils.parse_fit_file_with_fitdecode,
+    ):
+        session = parser(fit_file_path)["sessions"][0]
+        assert session["workout_feeling"] == 75
+        assert session["workout_rpe"] == 70